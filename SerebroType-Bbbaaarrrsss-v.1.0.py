@@ -2,79 +2,122 @@
 # -*- coding: utf-8 -*-
 
 from GlyphsApp import *
-from Foundation import NSPoint
-from AppKit import NSBezierPath, NSNonZeroWindingRule
-import vanilla, math
+from AppKit import NSBezierPath, NSColor
+from PyObjCTools.AppHelper import callAfter, callLater
+import vanilla, os, sys, threading
+
+try:
+    _here = os.path.dirname(os.path.abspath(__file__))
+    if _here not in sys.path:
+        sys.path.insert(0, _here)
+except NameError:
+    pass
+
+from serebrotype.outlinecache import cachedOutlineFromLayer
+from serebrotype.shapebuffer import ShapeBuffer
+from serebrotype.bars import layerNameFor, barQuads, barContours, selectLayers, computeBarsBatch
+from serebrotype.bars import parseSweepRange, sweepVariants, barSweep, offsetShapes
+from serebrotype.flatten import DEFAULT_TOLERANCE
 
 PADDING = 12
 FIELD_WIDTH = 120
 INPUT_WIDTH = 100
 WINDOW_WIDTH = PADDING + FIELD_WIDTH + 8 + INPUT_WIDTH + PADDING
-WINDOW_HEIGHT = 190
-
-def makeRectPathFromPoints(points):
-    p = GSPath()
-    p.closed = True
-    p.nodes = [GSNode((pt.x, pt.y), LINE) for pt in points]
-    return p
-
-def makeRectPath(x0, y0, x1, y1):
-    return makeRectPathFromPoints([
-        NSPoint(x0, y0),
-        NSPoint(x1, y0),
-        NSPoint(x1, y1),
-        NSPoint(x0, y1),
-    ])
-
-def bezierPathFromLayerSafe(layer):
-    src = layer.copyDecomposedLayer()
-    if not src or not src.shapes or len(src.shapes) == 0:
+WINDOW_HEIGHT = 550
+PREVIEW_DELAY = 0.15
+PROOF_SPACING = 100
+SWEEP_OUTPUTS = ["Named layers", "One proof layer"]
+
+def newBarsLayer(layer, name):
+    outL = GSLayer()
+    outL.name = name
+    outL.associatedMasterId = layer.associatedMasterId
+    outL.width, outL.LSB, outL.RSB = layer.width, layer.LSB, layer.RSB
+    return outL
+
+def shapeBufferFor(shapes, fitContour):
+    buf = ShapeBuffer()
+    if fitContour:
+        buf.addContours(shapes)
+    else:
+        buf.addQuads(shapes)
+    return buf
+
+def barShapes(outline, n, gap, angleDeg, fitContour, x_min, x_max, tolerance=None):
+    # Contour bands keep their curves; the tolerance only applies to bar
+    # quads. Build Layer and the preview both come here so they agree.
+    if fitContour:
+        return barContours(outline, n, gap, x_min, x_max)
+    return barQuads(outline, n, gap, angleDeg, x_min, x_max, tolerance=tolerance)
+
+def makeBarsLayer(layer, n, gap, angleDeg=0.0, fitContour=False, shapes=None, tolerance=None):
+    x_min = 0.0
+    x_max = layer.width
+
+    outL = newBarsLayer(layer, layerNameFor(n, gap, angleDeg, fitContour))
+    if shapes is None:
+        outline = cachedOutlineFromLayer(layer)
+        if outline is None:
+            raise ValueError("No contours in the layer.")
+        shapes = barShapes(outline, n, gap, angleDeg, fitContour, x_min, x_max, tolerance)
+
+    outL.shapes = shapeBufferFor(shapes, fitContour).paths()
+    # Band slices of an overlap-free outline never overlap each other, and
+    # neither do quads from disjoint spans in rows a positive gap apart.
+    if not fitContour and gap <= 0:
+        outL.removeOverlap()
+    return outL
+
+def makeSweepLayers(layer, results, fitContour=False):
+    """One named bars layer per successful sweep variant."""
+    return [
+        makeBarsLayer(layer, n, gap, angleDeg, fitContour, shapes=shapes)
+        for (n, gap, angleDeg), shapes, err in results if not err
+    ]
+
+def makeSweepProof(layer, results, fitContour=False):
+    """All sweep variants side by side in a single layer, left to right."""
+    variants = [(variant, shapes) for variant, shapes, err in results if not err]
+    if not variants:
         return None
-    try:
-        src.removeOverlap()
-    except Exception:
-        pass
-    bp = getattr(src, "completeBezierPath", None)
-    if bp is None:
-        bp = getattr(src, "bezierPath", None)
-    if bp is not None:
-        try:
-            bp.setWindingRule_(NSNonZeroWindingRule)
-        except Exception:
-            pass
-        return bp
-    return None
-
-def intervalsBySampling(nsbp, y, x_min, x_max, step=0.4, minLen=0.4):
-    res = []
-    x = x_min
-    inside_prev = nsbp.containsPoint_(NSPoint(x, y))
-    start = None
-    while x <= x_max:
-        inside = nsbp.containsPoint_(NSPoint(x, y))
-        if inside and not inside_prev:
-            start = x
-        elif not inside and inside_prev and start is not None:
-            if x - start >= minLen:
-                res.append((start, x))
-            start = None
-        inside_prev = inside
-        x += step
-    if inside_prev and start is not None and x_max - start >= minLen:
-        res.append((start, x_max))
-    return res
-
-def snapPathsY(paths, targetY, tol=0.5, mode="bottom"):
-    for p in paths:
-        if not isinstance(p, GSPath):
-            continue
-        for n in p.nodes:
-            if mode == "bottom":
-                if n.y < targetY + tol:
-                    n.y = targetY
-            else:
-                if n.y > targetY - tol:
-                    n.y = targetY
+    counts = sorted({n for (n, _, _), _ in variants})
+    gaps = sorted({gap for (_, gap, _), _ in variants})
+    name = "Sweep Bars=%s, Gap=%s" % (
+        ",".join("%d" % n for n in counts), ",".join("%g" % g for g in gaps))
+    outL = newBarsLayer(layer, name)
+    step = layer.width + PROOF_SPACING
+    buf = ShapeBuffer()
+    for i, (_, variantShapes) in enumerate(variants):
+        shapes = offsetShapes(variantShapes, i * step, fitContour)
+        if fitContour:
+            buf.addContours(shapes)
+        else:
+            buf.addQuads(shapes)
+    outL.shapes = buf.paths()
+    if not fitContour:
+        outL.removeOverlap()
+    outL.width = max(layer.width, len(variants) * step - PROOF_SPACING)
+    return outL
+
+def previewBezierPath(shapes, fitContour):
+    bp = NSBezierPath.bezierPath()
+    for shape in shapes:
+        if fitContour:
+            bp.moveToPoint_(shape[0][0])
+            for seg in shape:
+                if len(seg) == 4:
+                    bp.curveToPoint_controlPoint1_controlPoint2_(seg[3], seg[1], seg[2])
+                else:
+                    bp.lineToPoint_(seg[1])
+        else:
+            bp.moveToPoint_(shape[0])
+            for pt in shape[1:]:
+                bp.lineToPoint_(pt)
+        bp.closePath()
+    return bp
+
+def layerKey(layer):
+    return (layer.parent.name, layer.associatedMasterId)
 
 class BarsUI(object):
     def __init__(self):
@@ -83,20 +126,34 @@ class BarsUI(object):
             Message("Select a glyph", "Select a glyph layer and run the script again.")
             return
 
+        self._cancel = threading.Event()
+        self._running = False
+        self._previewToken = 0
+        self._previewParams = None
+        self._previewPaths = {}
+
         self.w = vanilla.FloatingWindow((WINDOW_WIDTH, WINDOW_HEIGHT), "Bbbaaarrrsss")
 
         y = PADDING
 
         self.w.nLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Bars (count):")
-        self.w.n = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "11")
+        self.w.n = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "11", callback=self.paramsChanged)
         y += 28
 
         self.w.gapLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Gap:")
-        self.w.gap = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "20")
+        self.w.gap = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "20", callback=self.paramsChanged)
         y += 28
 
         self.w.angleLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Angle (°):")
-        self.w.angle = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "0")
+        self.w.angle = vanilla.EditText((PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "0", callback=self.paramsChanged)
+        y += 28
+
+        # Curves are flattened once per layer to this deviation; 0 keeps them exact.
+        self.w.toleranceLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Flatness (units):")
+        self.w.tolerance = vanilla.EditText(
+            (PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "%g" % DEFAULT_TOLERANCE,
+            placeholder="0 = exact", callback=self.paramsChanged,
+        )
         y += 28
 
         self.w.fitContour = vanilla.CheckBox(
@@ -105,6 +162,14 @@ class BarsUI(object):
             value=False,
             callback=self.toggleContour,
         )
+        y += 26
+
+        self.w.preview = vanilla.CheckBox(
+            (PADDING, y, WINDOW_WIDTH - 2 * PADDING, 20),
+            "Live preview",
+            value=False,
+            callback=self.togglePreview,
+        )
         y += 30
 
         self.w.go = vanilla.Button(
@@ -112,124 +177,319 @@ class BarsUI(object):
             "Build Layer",
             callback=self.build
         )
+        y += 44
+
+        self.w.sweepCountsLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Sweep bars:")
+        self.w.sweepCounts = vanilla.EditText(
+            (PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "5..21:2", placeholder="5..21:2",
+        )
+        y += 28
+
+        self.w.sweepGapsLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Sweep gaps:")
+        self.w.sweepGaps = vanilla.EditText(
+            (PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "20", placeholder="10, 20, 30",
+        )
+        y += 28
+
+        self.w.sweepAnglesLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Sweep angles:")
+        self.w.sweepAngles = vanilla.EditText(
+            (PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "0", placeholder="-10..10:5",
+        )
+        y += 28
+
+        self.w.sweepOutput = vanilla.PopUpButton(
+            (PADDING, y, WINDOW_WIDTH - 2 * PADDING, 22), SWEEP_OUTPUTS,
+        )
+        y += 30
+
+        self.w.goSweep = vanilla.Button(
+            (PADDING, y, WINDOW_WIDTH - 2 * PADDING, 28),
+            "Build Sweep",
+            callback=self.buildSweep
+        )
+        y += 44
 
+        self.w.filterLbl = vanilla.TextBox((PADDING, y, FIELD_WIDTH, 20), "Glyphs (filter):")
+        self.w.glyphFilter = vanilla.EditText(
+            (PADDING + FIELD_WIDTH + 8, y, INPUT_WIDTH, 22), "",
+            placeholder="all, or A* *-cy",
+        )
+        y += 28
+
+        self.w.allMasters = vanilla.CheckBox(
+            (PADDING, y, WINDOW_WIDTH - 2 * PADDING, 20),
+            "All masters",
+            value=True,
+        )
+        y += 30
+
+        self.w.progress = vanilla.ProgressBar((PADDING, y, WINDOW_WIDTH - 2 * PADDING, 16))
+        y += 26
+
+        self.w.goFont = vanilla.Button(
+            (PADDING, y, WINDOW_WIDTH - 2 * PADDING, 28),
+            "Build Font",
+            callback=self.buildFont
+        )
+
+        self.w.bind("close", self.windowClosed)
         self.w.open()
 
     def toggleContour(self, sender):
         on = bool(sender.get())
         self.w.angle.enable(not on)
         self.w.angleLbl.enable(not on)
+        self.w.sweepAngles.enable(not on)
+        self.w.sweepAnglesLbl.enable(not on)
+        self.paramsChanged(sender)
+
+    # ----- live preview -----
+    def togglePreview(self, sender):
+        if sender.get():
+            Glyphs.addCallback(self.drawPreview, DRAWFOREGROUND)
+            self.paramsChanged(sender)
+        else:
+            self.stopPreview()
+
+    def stopPreview(self):
+        try:
+            Glyphs.removeCallback(self.drawPreview, DRAWFOREGROUND)
+        except Exception:
+            pass
+        self._previewParams = None
+        self._previewPaths = {}
+        Glyphs.redraw()
 
-    def build(self, sender):
-        f = Glyphs.font
-        layers = f.selectedLayers
+    def windowClosed(self, sender):
+        if self.w.preview.get():
+            self.stopPreview()
 
+    def paramsChanged(self, sender):
+        if not self.w.preview.get():
+            return
+        # Debounce typing: only the last edit within PREVIEW_DELAY is computed.
+        self._previewToken += 1
+        callLater(PREVIEW_DELAY, self.updatePreview, self._previewToken)
+
+    def updatePreview(self, token):
+        if token != self._previewToken or not self.w.preview.get():
+            return
+        try:
+            params = self.readParams() + (self.readTolerance(),)
+        except ValueError:
+            return
+        if params[0] < 1:
+            return
+        self._previewParams = params
+        self._previewPaths = {}
+        Glyphs.redraw()
+
+    def previewPathForLayer(self, layer):
+        if self._previewParams is None:
+            return None
+        # The outline cache is keyed by content, so edits to the glyph
+        # give a new outline and a fresh preview.
+        outline = cachedOutlineFromLayer(layer)
+        if outline is None:
+            return None
+        key = (layerKey(layer), id(outline))
+        bp = self._previewPaths.get(key)
+        if bp is None:
+            n, gap, angleDeg, fitContour, tolerance = self._previewParams
+            if len(self._previewPaths) > 64:
+                self._previewPaths = {}
+            try:
+                shapes = barShapes(outline, n, gap, angleDeg, fitContour, 0.0, layer.width, tolerance)
+            except ValueError:
+                return None
+            bp = previewBezierPath(shapes, fitContour)
+            self._previewPaths[key] = bp
+        return bp
+
+    def drawPreview(self, layer, info):
+        try:
+            bp = self.previewPathForLayer(layer)
+            if bp is None:
+                return
+            NSColor.colorWithCalibratedRed_green_blue_alpha_(0.1, 0.4, 0.9, 0.35).set()
+            bp.fill()
+        except Exception:
+            pass
+
+    def readParams(self):
         n   = int(self.w.n.get())
         gap = float(self.w.gap.get())
         fitContour = bool(self.w.fitContour.get())
         angleDeg = float(self.w.angle.get()) if not fitContour else 0.0
+        return n, gap, angleDeg, fitContour
+
+    def readTolerance(self):
+        tolerance = float(self.w.tolerance.get() or 0)
+        if tolerance < 0:
+            raise ValueError("Flatness must be ≥ 0")
+        return tolerance or None
+
+    def build(self, sender):
+        f = Glyphs.font
+        layers = f.selectedLayers
 
+        try:
+            n, gap, angleDeg, fitContour = self.readParams()
+            tolerance = self.readTolerance()
+        except ValueError as e:
+            Message("Error", str(e))
+            return
         if n < 1:
             Message("Error", "Bars must be ≥ 1")
             return
 
-        sampleStepX = 0.4
-        epsilonY = 0.15
-
         for layer in layers:
-            nsbp = bezierPathFromLayerSafe(layer)
-            if nsbp is None:
-                Message("Error", "No contours in the layer.")
+            try:
+                outL = makeBarsLayer(layer, n, gap, angleDeg, fitContour, tolerance=tolerance)
+            except ValueError as e:
+                Message("Error", str(e))
                 return
+            layer.parent.layers.append(outL)
 
-            bounds = nsbp.bounds()
-            yMin = bounds.origin.y
-            yMax = bounds.origin.y + bounds.size.height
-            totalH = yMax - yMin
+    # ----- parameter sweep -----
+    def readSweep(self):
+        counts = parseSweepRange(self.w.sweepCounts.get(), int)
+        gaps = parseSweepRange(self.w.sweepGaps.get(), float)
+        fitContour = bool(self.w.fitContour.get())
+        angles = parseSweepRange(self.w.sweepAngles.get() or "0", float) if not fitContour else [0.0]
+        return sweepVariants(counts, gaps, angles, fitContour), fitContour
 
-            x_min = 0.0
-            x_max = layer.width
+    def buildSweep(self, sender):
+        f = Glyphs.font
+        try:
+            variants, fitContour = self.readSweep()
+            tolerance = None if fitContour else self.readTolerance()
+        except ValueError as e:
+            Message("Error", str(e))
+            return
+        asProof = self.w.sweepOutput.get() == 1
 
-            neededGaps = (n - 1) * gap
-            remainForBars = totalH - neededGaps
-            if remainForBars <= 0:
-                Message("Error", "Gap is too large for this height and number of bars.")
-                return
-            barH = remainForBars / n
-
-            # Layer name
-            if fitContour:
-                layerName = f"Bars={n}, Gap={gap:g}"
-            else:
-                if abs(angleDeg) > 0.0001:
-                    layerName = f"Bars={n}, Gap={gap:g}, Angle={angleDeg:g}"
-                else:
-                    layerName = f"Bars={n}, Gap={gap:g}"
-
-            outL = GSLayer()
-            outL.name = layerName
-            outL.associatedMasterId = layer.associatedMasterId
-            outL.width, outL.LSB, outL.RSB = layer.width, layer.LSB, layer.RSB
-
-            if fitContour:
-                baseLayer = layer.copyDecomposedLayer()
-                baseLayer.removeOverlap()
-                srcPaths = list(baseLayer.paths)
-                if not srcPaths:
-                    Message("Error", "No contours in the layer (for boolean operations).")
-                    return
-
-            y0 = yMin
-            for i in range(n):
-                yBottom = y0
-                if i == n - 1:
-                    yTop = yMax
+        built = 0
+        errors = set()
+        f.disableUpdateInterface()
+        try:
+            for layer in f.selectedLayers:
+                # One outline per layer serves every variant, and each distinct
+                # midline or band is intersected only once.
+                outline = cachedOutlineFromLayer(layer)
+                if outline is None:
+                    errors.add("No contours in the layer.")
+                    continue
+                results = barSweep(outline, variants, fitContour, 0.0, layer.width, tolerance=tolerance)
+                errors.update(err for _, _, err in results if err)
+                if asProof:
+                    proof = makeSweepProof(layer, results, fitContour)
+                    outLayers = [proof] if proof is not None else []
                 else:
-                    yTop = y0 + barH
-
-                if fitContour:
-                    bandBottom = yBottom - (epsilonY if i == 0 else 0)
-                    bandTop    = yTop    + (epsilonY if i == n - 1 else 0)
-                    band = makeRectPath(x_min, bandBottom, x_max, bandTop)
-
-                    import GlyphsApp
-                    clippedPaths = GlyphsApp.intersectPaths(srcPaths, [band])
+                    outLayers = makeSweepLayers(layer, results, fitContour)
+                for outL in outLayers:
+                    layer.parent.layers.append(outL)
+                built += len(outLayers)
+        finally:
+            f.enableUpdateInterface()
+        message = f"Built {built} layers from {len(variants)} variants"
+        if errors:
+            message += "; skipped: " + " ".join(sorted(errors))
+        Glyphs.showNotification("Bbbaaarrrsss", message)
+
+    # ----- font-wide batch -----
+    def buildFont(self, sender):
+        if self._running:
+            self._cancel.set()
+            return
 
-                    if i == 0:
-                        snapPathsY(clippedPaths, yMin, tol=0.6, mode="bottom")
-                    if i == n - 1:
-                        snapPathsY(clippedPaths, yMax, tol=0.6, mode="top")
+        f = Glyphs.font
+        try:
+            n, gap, angleDeg, fitContour = self.readParams()
+            tolerance = self.readTolerance()
+        except ValueError as e:
+            Message("Error", str(e))
+            return
+        if n < 1:
+            Message("Error", "Bars must be ≥ 1")
+            return
 
-                    for cp in clippedPaths:
-                        cp.closed = True
-                        outL.shapes.append(cp)
+        masterIds = None if self.w.allMasters.get() else [f.selectedFontMaster.id]
+        layers = selectLayers(f, self.w.glyphFilter.get(), masterIds)
+        if not layers:
+            Message("Error", "No glyphs match the filter.")
+            return
 
-                else:
-                    yMid = (yBottom + yTop) * 0.5
-                    intervals = intervalsBySampling(nsbp, yMid, x_min, x_max, step=sampleStepX)
-
-                    ang = math.radians(angleDeg)
-                    dx = math.tan(ang) * (yTop - yBottom) if angleDeg != 0 else 0.0
-
-                    for (xx0, xx1) in intervals:
-                        if angleDeg == 0:
-                            outL.shapes.append(
-                                makeRectPath(xx0, yBottom, xx1, yTop)
-                            )
-                        else:
-                            pts = [
-                                NSPoint(xx0, yBottom),
-                                NSPoint(xx1, yBottom),
-                                NSPoint(xx1 + dx, yTop),
-                                NSPoint(xx0 + dx, yTop),
-                            ]
-                            outL.shapes.append(makeRectPathFromPoints(pts))
-
-                y0 += barH
-                if i < n - 1:
-                    y0 += gap
-
-            outL.removeOverlap()
-            layer.parent.layers.append(outL)
+        # Outlines are read on the main thread, bars are computed in workers.
+        jobs = []
+        byKey = {}
+        for layer in layers:
+            outline = cachedOutlineFromLayer(layer)
+            if outline is None:
+                continue
+            key = layerKey(layer)
+            byKey[key] = layer
+            jobs.append((key, outline.contours, outline.width))
+
+        self._cancel.clear()
+        self._setRunning(True)
+        args = (jobs, byKey, n, gap, angleDeg, fitContour, tolerance)
+        threading.Thread(target=self._runBatch, args=args, daemon=True).start()
+
+    def _runBatch(self, jobs, byKey, n, gap, angleDeg, fitContour, tolerance):
+        # Written contour bands keep their curves; the tolerance only applies to bar quads.
+        try:
+            results = computeBarsBatch(
+                jobs, n, gap, angleDeg, fitContour=fitContour,
+                tolerance=None if fitContour else tolerance,
+                progress=lambda done, total: callAfter(self._showProgress, done, total),
+                shouldCancel=self._cancel.is_set,
+            )
+        except Exception as e:
+            callAfter(self._batchFailed, e)
+        else:
+            callAfter(self._writeBatch, results, byKey, n, gap, angleDeg, fitContour)
+
+    def _showProgress(self, done, total):
+        self.w.progress.set(100.0 * done / max(1, total))
+
+    def _batchFailed(self, error):
+        self._setRunning(False)
+        Message("Error", f"Font build failed, nothing was written: {error}")
+
+    def _writeBatch(self, results, byKey, n, gap, angleDeg, fitContour):
+        try:
+            if results is None or self._cancel.is_set():
+                Glyphs.showNotification("Bbbaaarrrsss", "Cancelled, nothing was written.")
+                return
 
-BarsUI()
\ No newline at end of file
+            f = Glyphs.font
+            built = failed = 0
+            f.disableUpdateInterface()
+            try:
+                for key, layer in byKey.items():
+                    shapes, err = results.get(key, (None, "No contours in the layer."))
+                    if err:
+                        failed += 1
+                        continue
+                    outL = makeBarsLayer(layer, n, gap, angleDeg, fitContour, shapes=shapes)
+                    layer.parent.layers.append(outL)
+                    built += 1
+            except Exception as e:
+                Message("Error", f"Font build stopped after {built} layers: {e}")
+                return
+            finally:
+                f.enableUpdateInterface()
+            Glyphs.showNotification("Bbbaaarrrsss", f"Built {built} layers, failed {failed}")
+        finally:
+            self._setRunning(False)
+
+    def _setRunning(self, running):
+        self._running = running
+        self.w.goFont.setTitle("Cancel" if running else "Build Font")
+        self.w.go.enable(not running)
+        self.w.goSweep.enable(not running)
+        if not running:
+            self.w.progress.set(0)
+
+BarsUI()
@@ -8,92 +8,23 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import os, time, re, traceback
+import os, sys, threading, traceback
 import GlyphsApp
-from GlyphsApp import Glyphs, GSFont
+from GlyphsApp import Glyphs
 import vanilla
 from AppKit import (
     NSOnState, NSOffState, NSMixedState, NSOpenPanel, NSImageRight
 )
+from PyObjCTools.AppHelper import callAfter
 
-# ---------- helpers ----------
-def sanitize_filename(name: str) -> str:
-    for bad in r'\/:*?"<>|':
-        name = name.replace(bad, "-")
-    return name.strip()
-
-def ensure_dir(path: str):
-    if not os.path.isdir(path):
-        os.makedirs(path, exist_ok=True)
-
-def export_instance(font, instance, dest_folder, fmt,
-                    remove_overlap=True, autohint=True, production_names=True) -> str:
-    fmt = fmt.upper()
-    if fmt not in {"TTF", "OTF"}:
-        raise ValueError("Unsupported format: %s" % fmt)
-
-    family_raw = font.familyName or "Untitled"
-    base_name = re.sub(r"\s*\(.*?\)", "", family_raw).strip()
-    style = instance.name or instance.styleName or "Regular"
-    stem = f"{base_name}-{style}".replace(" ", "")
-    ext = fmt.lower()
-
-    ensure_dir(dest_folder)
-    full_path = os.path.join(dest_folder, f"{stem}.{ext}")
-    t0 = time.time()
-
-    flags = dict(
-        AutoHint=bool(autohint),
-        RemoveOverlap=bool(remove_overlap),
-        UseProductionNames=bool(production_names),
-    )
-
-    candidates = [
-        dict(format=fmt, FontPath=full_path, **flags),
-        dict(Format=fmt, FontPath=full_path, **flags),
-        dict(format=fmt, path=full_path, **flags),
-        dict(Format=fmt, path=full_path, **flags),
-        dict(format=fmt, FontPath=dest_folder, **flags),
-        dict(Format=fmt, FontPath=dest_folder, **flags),
-        dict(format=fmt, path=dest_folder, **flags),
-        dict(Format=fmt, path=dest_folder, **flags),
-    ]
-
-    last_err = None
-    for kw in candidates:
-        try:
-            instance.generate(font, **kw)
-            if os.path.exists(full_path):
-                return full_path
-            fresh = [os.path.join(dest_folder, fn)
-                     for fn in os.listdir(dest_folder)
-                     if fn.lower().endswith("." + ext)
-                     and os.path.getmtime(os.path.join(dest_folder, fn)) >= t0]
-            if fresh:
-                fresh.sort(key=os.path.getmtime, reverse=True)
-                src = fresh[0]
-                if src != full_path:
-                    try: os.replace(src, full_path)
-                    except Exception: return src
-                return full_path
-        except Exception as e:
-            last_err = e
-            continue
-    raise RuntimeError(f"Export failed for {fmt}. Last error: {last_err}")
-
-def generate_source_glyphs(font, instance, dest_folder) -> str:
-    interp = instance.interpolatedFont
-    if not isinstance(interp, GSFont):
-        raise RuntimeError("interpolatedFont failed")
-    fam = font.familyName or "Untitled"
-    sty = instance.name or instance.styleName or "Regular"
-    interp.familyName = fam
-    if interp.masters and len(interp.masters) == 1:
-        interp.masters[0].name = sty
-    fn = f"{sanitize_filename(fam)}-{sanitize_filename(sty)}.glyphs"
-    path = os.path.join(dest_folder, fn)
-    interp.save(path)
-    return path
+try:
+    _here = os.path.dirname(os.path.abspath(__file__))
+    if _here not in sys.path:
+        sys.path.insert(0, _here)
+except NameError:
+    pass
+
+from serebrotype.export import ensure_dir, export_session
 
 # ---------- UI ----------
 class ExportSelectedUI:
@@ -132,12 +63,14 @@ class ExportSelectedUI:
 
             title_h   = 20
             types_h   = 20 + 3*24
-            options_h = 20 + 3*24
+            options_h = 20 + 4*24
+            progress_h = 16 + 4 + 18
             btn_h     = 28
 
             h = (self.PAD + title_h + 6 + scroll_h +
                  self.GAP_SCROLL_TO_TYPES + types_h +
                  self.GAP_TYPES_TO_OPTIONS + options_h +
+                 self.GAP_OPTIONS_TO_BTNS + progress_h +
                  self.GAP_OPTIONS_TO_BTNS + btn_h + self.BOTTOM_PAD)
 
             self.w = vanilla.FloatingWindow((w, h), "Export selected instanses")
@@ -190,6 +123,14 @@ class ExportSelectedUI:
             self.w.cbRO = vanilla.CheckBox((x, oy,          180, 20), "Remove Overlap",  value=True)
             self.w.cbAH = vanilla.CheckBox((x, oy + 24,     180, 20), "Autohint",        value=True)
             self.w.cbPN = vanilla.CheckBox((x, oy + 48,     220, 20), "Production Names", value=True)
+            self.w.cbForce = vanilla.CheckBox((x, oy + 72,  220, 20), "Rebuild unchanged files", value=False)
+
+            # Прогресс экспорта
+            progTop = oy + 72 + 20 + self.GAP_OPTIONS_TO_BTNS
+            self.w.progress = vanilla.ProgressBar((x, progTop, -self.PAD, 16))
+            self.w.status = vanilla.TextBox((x, progTop + 20, -self.PAD, 18), "", sizeStyle="small")
+            self._cancel = threading.Event()
+            self._running = False
 
             # Кнопки: Cancel + Export
             btn_h = 28
@@ -209,7 +150,7 @@ class ExportSelectedUI:
             self.w.btnCancel = vanilla.Button(
                 (cancel_x, -self.BOTTOM_PAD - btn_h, cancel_w, btn_h),
                 "Cancel",
-                callback=lambda s: self.w.close(),
+                callback=self.onCancel,
             )
             self.w.btnExport = vanilla.Button(
                 (export_x, -self.BOTTOM_PAD - btn_h, export_w, btn_h),
@@ -354,7 +295,18 @@ class ExportSelectedUI:
         return None
 
     # ----- actions -----
+    def onCancel(self, sender):
+        if self._running:
+            self._cancel.set()
+            self.w.status.set("Stopping after the running steps…")
+        else:
+            self.w.close()
+
     def onExport(self, sender):
+        if self._running:
+            self.onCancel(sender)
+            return
+
         targets = self.selectedInstances()
         if not targets:
             Glyphs.showNotification("Export Selected", "Nothing selected.")
@@ -376,29 +328,58 @@ class ExportSelectedUI:
         dest = self.chooseFolder("Select destination folder")
         if not dest: return
 
-        ok_src = ok_bin = fail = 0
-
-        if do_source:
-            for inst in targets:
-                try:
-                    generate_source_glyphs(self.font, inst, dest)
-                    ok_src += 1
-                except Exception:
-                    fail += 1
-
-        for inst in targets:
-            for fmt in fmts:
-                try:
-                    export_instance(self.font, inst, dest, fmt,
-                                    remove_overlap=remove_overlap,
-                                    autohint=autohint,
-                                    production_names=production_names)
-                    ok_bin += 1
-                except Exception:
-                    fail += 1
-
+        total = len(targets) * (len(fmts) + (1 if do_source else 0))
+        self._counts = dict(glyphs=0, fonts=0, skipped=0, failed=0, done=0, total=total)
+        self._cancel.clear()
+        self._setRunning(True)
+        kwargs = dict(formats=fmts, source=do_source, force=bool(self.w.cbForce.get()),
+                      remove_overlap=remove_overlap, autohint=autohint,
+                      production_names=production_names)
+        threading.Thread(target=self._runExport, args=(targets, dest, kwargs), daemon=True).start()
+
+    def _runExport(self, targets, dest, kwargs):
+        # Интерполяция, исходники и бинарники идут конвейером в пуле потоков.
+        try:
+            for result in export_session(self.font, targets, dest,
+                                         should_cancel=self._cancel.is_set, **kwargs):
+                callAfter(self._showResult, result)
+        except Exception as e:
+            print("✖ Export:", e)
+            print(traceback.format_exc())
+        callAfter(self._finishExport)
+
+    def _showResult(self, result):
+        c = self._counts
+        c["done"] += 1
+        style = result.instance.name or result.instance.styleName or "Regular"
+        if result.skipped:
+            c["skipped"] += 1
+            self.w.status.set(f"{style} {result.kind} is up to date")
+        elif result.error is None:
+            c["glyphs" if result.kind == "glyphs" else "fonts"] += 1
+            self.w.status.set(f"{style} {result.kind} ✓ {result.seconds:.1f}s")
+        else:
+            c["failed"] += 1
+            self.w.status.set(f"{style} {result.kind} ✖ {result.error}")
+            print(f"✖ {style} {result.kind}: {result.error}")
+        self.w.progress.set(100.0 * c["done"] / max(1, c["total"]))
+
+    def _finishExport(self):
+        c = self._counts
+        cancelled = self._cancel.is_set()
+        self._setRunning(False)
+        self.w.status.set("Cancelled." if cancelled else "Done.")
+        if c["failed"]:
+            Glyphs.showMacroWindow()
         Glyphs.showNotification("Export Selected",
-                                f"Sources {ok_src}, Fonts {ok_bin}, Failed {fail}")
+                                f"Sources {c['glyphs']}, Fonts {c['fonts']}, Up to date {c['skipped']}, Failed {c['failed']}"
+                                + (" (cancelled)" if cancelled else ""))
+
+    def _setRunning(self, running):
+        self._running = running
+        self.w.btnExport.setTitle("Stop" if running else "Export")
+        if running:
+            self.w.progress.set(0)
 
 # run
 ExportSelectedUI()
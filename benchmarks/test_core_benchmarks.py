@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# Timings of the script cores on synthetic fonts, run headless with the
+# GlyphsApp stand-in:
+#
+#     python -m pytest benchmarks --benchmark-only
+#
+# SEREBROTYPE_BENCH_SIZES overrides the glyph counts, e.g. "100,1000".
+
+import math
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from serebrotype.bands import sliceOutline
+from serebrotype.bars import barContours, barQuads, barRows, barSweep, computeBarsBatch, sweepVariants
+from serebrotype.demo import DEMO_PROFILES, make_trial_font, make_trial_fonts, profile_with_options, remove_glyphs
+from serebrotype.democache import DemoGlyphCache
+from serebrotype.edgeindex import EdgeIndex, edgeIndexFor
+from serebrotype.export import export_instance, export_session, generate_source_glyphs
+from serebrotype.features import prune_code
+from serebrotype.flatten import flatOutline, flattenContours
+from serebrotype.outline import Outline, outlineFromLayer
+from serebrotype.scanline import intervalsAtY, intervalsAtYs
+from serebrotype.shapebuffer import ShapeBuffer
+from serebrotype.standin import syntheticFont
+
+SIZES = [int(s) for s in os.environ.get("SEREBROTYPE_BENCH_SIZES", "100,1000,10000,50000").split(",")]
+
+_fonts = {}
+
+
+def fontWithGlyphs(count):
+    if count not in _fonts:
+        _fonts[count] = syntheticFont(count)
+    return _fonts[count]
+
+
+@pytest.fixture(params=SIZES, ids=lambda n: "%dglyphs" % n)
+def font(request):
+    return fontWithGlyphs(request.param)
+
+
+def denseOutline(nodes):
+    """A wavy ring of about ``nodes`` nodes: lines and cubics around a counter."""
+    def ring(count, radius, amplitude, clockwise):
+        points = []
+        for i in range(count):
+            a = 2 * math.pi * i / count
+            r = radius + amplitude * math.sin(i * 1.7) + amplitude * 0.5 * math.cos(i * 5.3)
+            points.append((500 + r * math.cos(a), 400 + r * math.sin(a)))
+        if clockwise:
+            points.reverse()
+        segments = []
+        for i, p0 in enumerate(points):
+            p3 = points[(i + 1) % count]
+            if i % 3 == 0:
+                segments.append((p0, p3))
+            else:
+                dx, dy = p3[0] - p0[0], p3[1] - p0[1]
+                segments.append((p0, (p0[0] + dx / 3 + 5, p0[1] + dy / 3 - 4),
+                                 (p0[0] + 2 * dx / 3 - 3, p0[1] + 2 * dy / 3 + 6), p3))
+        return segments
+    outer = nodes * 2 // 5
+    return Outline([ring(outer, 350, 20, False), ring(outer // 2, 170, 15, True)], 1000.0)
+
+
+def test_intervals_single_line(benchmark):
+    layer = fontWithGlyphs(100).glyphs["O"].layers[0]
+    outline = outlineFromLayer(layer)
+    spans = benchmark(intervalsAtY, outline, 350.0, 0.0, layer.width)
+    assert len(spans) == 2
+
+
+def test_bars_whole_font(benchmark, font):
+    masterId = font.masters[0].id
+    jobs = []
+    for glyph in font.glyphs:
+        outline = outlineFromLayer(glyph.layers[masterId])
+        if outline is not None:
+            jobs.append((glyph.name, outline.contours, outline.width))
+    results = benchmark(computeBarsBatch, jobs, 11, 20.0, workers=1)
+    assert len(results) == len(jobs)
+
+
+def test_edge_index_build(benchmark):
+    outline = denseOutline(2400)
+    index = benchmark(EdgeIndex, outline.edges)
+    assert len(index) == len(outline.edges)
+
+
+def test_flatten_dense_outline(benchmark):
+    outline = denseOutline(2400)
+    polylines = benchmark(flattenContours, outline.contours, 0.05)
+    assert len(polylines) == 2
+
+
+@pytest.mark.parametrize("tolerance", [None, 0.05], ids=["exact", "flat0.05"])
+def test_bar_counts_dense_outline(benchmark, tolerance):
+    # Bar counts 5..21 over one 2400-node outline; the edge index (and the
+    # flattened outline) is shared, the span memo is not, so every line is
+    # intersected.
+    outline = flatOutline(denseOutline(2400), tolerance)
+    edgeIndexFor(outline)
+    _, yMin, _, yMax = outline.bounds
+
+    def run():
+        total = 0
+        for n in range(5, 22):
+            ys = [(b + t) * 0.5 for b, t in barRows(yMin, yMax, n, 10.0)]
+            total += len(intervalsAtYs(outline, ys, 0.0, outline.width))
+        return total
+
+    assert benchmark(run) == sum(range(5, 22))
+
+
+@pytest.mark.parametrize("fitContour", [False, True], ids=["quads", "contours"])
+def test_bar_sweep(benchmark, fitContour):
+    # 17 counts x 3 gaps x 3 angles from one outline analysis; each run
+    # starts from a fresh outline so nothing is memoized between rounds.
+    variants = sweepVariants(range(5, 22), [10.0, 20.0, 30.0], [0.0, 5.0, 10.0], fitContour)
+    contours = denseOutline(2400).contours
+
+    def run():
+        return barSweep(Outline(contours, 1000.0), variants, fitContour)
+
+    results = benchmark(run)
+    assert len(results) == len(variants) and not [r for r in results if r[2]]
+
+
+@pytest.mark.parametrize("fitContour", [False, True], ids=["quads", "contours"])
+def test_bar_layer_paths(benchmark, fitContour):
+    # 21 bars over a 2400-node outline, from shapes to the paths of one layer.
+    outline = denseOutline(2400)
+    if fitContour:
+        shapes = barContours(outline, 21, 10.0)
+    else:
+        shapes = barQuads(outline, 21, 10.0)
+
+    def run():
+        buf = ShapeBuffer()
+        if fitContour:
+            buf.addContours(shapes)
+        else:
+            buf.addQuads(shapes)
+        return buf.paths()
+
+    assert len(benchmark(run)) == len(shapes)
+
+
+def test_slice_dense_outline(benchmark):
+    outline = denseOutline(2400)
+    _, yMin, _, yMax = outline.bounds
+    rows = barRows(yMin, yMax, 21, 10.0)
+    bands = benchmark(sliceOutline, outline, rows, 0.0, outline.width)
+    assert len(bands) == 21
+
+
+def test_make_trial_font(benchmark, font):
+    trial = benchmark(
+        make_trial_font, apply_trial_trap=True, notdef_mode=1, open_in_glyphs=False, font=font,
+    )
+    assert trial.glyphs[".notdef"] is not None
+
+
+def test_make_trial_font_warm_cache(benchmark, font, tmp_path):
+    cache = DemoGlyphCache(str(tmp_path))
+    options = dict(apply_trial_trap=True, notdef_mode=1, open_in_glyphs=False, font=font, cache=cache)
+    make_trial_font(**options)
+    cache.hits = cache.misses = 0
+    benchmark(make_trial_font, **options)
+    assert cache.misses == 0
+
+
+def test_make_trial_fonts_profiles(benchmark, font):
+    profiles = [profile_with_options(profile, notdef_mode=1) for profile in DEMO_PROFILES]
+    trials = benchmark(make_trial_fonts, profiles, open_in_glyphs=False, font=font)
+    assert len(trials) == len(profiles)
+
+
+def test_remove_glyphs(benchmark, font):
+    # Drops every other glyph, the worst case for a per-glyph removal loop.
+    names = set(glyph.name for glyph in font.glyphs[1::2])
+
+    def setup():
+        return (font.copy(), names), {}
+
+    removed = benchmark.pedantic(remove_glyphs, setup=setup, rounds=3)
+    assert removed == len(names)
+
+
+def test_prune_feature_code(benchmark):
+    # 120k lines: a class, a lookup and a kern feature over 10k glyph names,
+    # of which every other one survives.
+    names = [glyph.name for glyph in fontWithGlyphs(10000).glyphs]
+    lines = ["@All = [%s];" % " ".join(names), "lookup SC {"]
+    lines += ["    sub %s by %s.sc;" % (name, name) for name in names]
+    lines += ["} SC;", "feature kern {"]
+    lines += ["    pos %s %s -%d;" % (names[i % len(names)], names[(i * 7) % len(names)], i % 90)
+              for i in range(110000)]
+    lines += ["} kern;"]
+    code = "\n".join(lines)
+    survivors = frozenset(names[::2])
+    pruned, has_rules = benchmark(prune_code, code, survivors)
+    assert has_rules and len(pruned) < len(code)
+
+
+def test_export_instance(benchmark, font, tmp_path):
+    path = benchmark(export_instance, font, font.instances[0], str(tmp_path), "TTF")
+    assert os.path.exists(path)
+
+
+def test_generate_source_glyphs(benchmark, font, tmp_path):
+    path = benchmark(generate_source_glyphs, font, font.instances[0], str(tmp_path))
+    assert os.path.exists(path)
+
+
+def test_export_session(benchmark, font, tmp_path):
+    def run():
+        return list(export_session(font, font.instances, str(tmp_path), formats=["TTF", "OTF"],
+                                   source=True, force=True))
+
+    results = benchmark(run)
+    assert len(results) == 3 * len(font.instances)
+    assert not [r for r in results if r.error]
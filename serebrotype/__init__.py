@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+# Shared core of the SerebroType scripts.
+# Nothing in this package imports GlyphsApp, vanilla or AppKit at module level,
+# so it can be used (and timed) outside of Glyphs.
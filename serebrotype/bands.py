@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+# Slice an overlap-free outline into horizontal bands in one sweep.
+#
+# Every segment is split where it crosses a band edge (or the left/right
+# limits), each piece is assigned to the band it lies in, and the open
+# chains of every band are closed along the band rectangle, walking its
+# perimeter counter-clockwise (Weiler-Atherton on a convex clip region).
+
+import bisect
+
+from serebrotype.edgeindex import edgeIndexFor
+from serebrotype.outline import _cubicExtrema, splitCubic
+from serebrotype.scanline import crossingsAtY
+
+EPS = 1e-9
+
+
+def _evalSeg(seg, t):
+    if len(seg) == 2:
+        (x0, y0), (x1, y1) = seg
+        return (x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+    mt = 1.0 - t
+    a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+    return (a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3)
+
+
+def _tangentAt(seg, t):
+    if len(seg) == 2:
+        return (seg[1][0] - seg[0][0], seg[1][1] - seg[0][1])
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+    mt = 1.0 - t
+    a, b, c = 3 * mt * mt, 6 * mt * t, 3 * t * t
+    tx = a * (x1 - x0) + b * (x2 - x1) + c * (x3 - x2)
+    ty = a * (y1 - y0) + b * (y2 - y1) + c * (y3 - y2)
+    if abs(tx) + abs(ty) < EPS:
+        return (x3 - x0, y3 - y0)
+    return (tx, ty)
+
+
+def _axisRoots(seg, axis, values):
+    """``(t, axis, value)`` for every crossing of ``seg`` with the given lines."""
+    out = []
+    if len(seg) == 2:
+        a, b = seg[0][axis], seg[1][axis]
+        for v in values:
+            if (a < v < b) or (b < v < a):
+                out.append(((v - a) / (b - a), axis, v))
+        return out
+    coords = [p[axis] for p in seg]
+    knots = [0.0] + _cubicExtrema(*coords) + [1.0]
+    for ta, tb in zip(knots, knots[1:]):
+        ca, cb = _evalSeg(seg, ta)[axis], _evalSeg(seg, tb)[axis]
+        lo, hi = min(ca, cb), max(ca, cb)
+        rising = cb > ca
+        for v in values:
+            if not lo < v < hi:
+                continue
+            l, h = ta, tb
+            for _ in range(60):
+                m = (l + h) * 0.5
+                if (_evalSeg(seg, m)[axis] < v) == rising:
+                    l = m
+                else:
+                    h = m
+                if h - l < 1e-14:
+                    break
+            out.append(((l + h) * 0.5, axis, v))
+    return out
+
+
+def _splitAt(seg, cuts):
+    """Split ``seg`` at sorted ``(t, snappedPoint)`` cuts."""
+    if not cuts:
+        return [seg]
+    pieces = []
+    rest, last = seg, 0.0
+    prevPt = seg[0]
+    for t, pt in cuts:
+        if len(seg) == 2:
+            head = (prevPt, pt)
+        else:
+            head, rest = splitCubic(rest, (t - last) / (1.0 - last))
+            head = (prevPt, head[1], head[2], pt)
+            last = t
+        pieces.append(head)
+        prevPt = pt
+    if len(seg) == 2:
+        pieces.append((prevPt, seg[1]))
+    else:
+        pieces.append((prevPt, rest[1], rest[2], rest[3]))
+    return pieces
+
+
+def _signedArea(contour):
+    pts = []
+    for seg in contour:
+        if len(seg) == 2:
+            pts.append(seg[0])
+        else:
+            pts.extend(_evalSeg(seg, t) for t in (0.0, 0.25, 0.5, 0.75))
+    area = 0.0
+    for (x0, y0), (x1, y1) in zip(pts, pts[1:] + pts[:1]):
+        area += x0 * y1 - x1 * y0
+    return area * 0.5
+
+
+def _reverseContour(contour):
+    return [tuple(reversed(seg)) for seg in reversed(contour)]
+
+
+class _Bands(object):
+    def __init__(self, rows, x_min, x_max):
+        self.rows = rows
+        self.bottoms = [b for b, _ in rows]
+        self.x_min = x_min
+        self.x_max = x_max
+
+    def regionOf(self, piece):
+        # Probe just left of the piece's middle (the filled side), so pieces
+        # lying on a band edge go to the band they actually bound.
+        mx, my = _evalSeg(piece, 0.5)
+        tx, ty = _tangentAt(piece, 0.5)
+        length = (tx * tx + ty * ty) ** 0.5 or 1.0
+        px, py = mx - ty / length * 1e-6, my + tx / length * 1e-6
+        if not self.x_min <= px <= self.x_max:
+            return None
+        i = bisect.bisect_right(self.bottoms, py) - 1
+        if i < 0 or py > self.rows[i][1]:
+            return None
+        return i
+
+
+def _perimeterPos(pt, x_min, x_max, yb, yt):
+    w, h = x_max - x_min, yt - yb
+    x, y = pt
+    dists = (abs(y - yb), abs(x - x_max), abs(y - yt), abs(x - x_min))
+    side = dists.index(min(dists))
+    if side == 0:
+        return x - x_min
+    if side == 1:
+        return w + (y - yb)
+    if side == 2:
+        return w + h + (x_max - x)
+    return 2 * w + h + (yt - y)
+
+
+def _closeChains(chains, x_min, x_max, yb, yt):
+    w, h = x_max - x_min, yt - yb
+    perim = 2 * (w + h)
+    corners = [
+        (0.0, (x_min, yb)),
+        (w, (x_max, yb)),
+        (w + h, (x_max, yt)),
+        (2 * w + h, (x_min, yt)),
+    ]
+    entries = sorted(
+        (_perimeterPos(c[0][0], x_min, x_max, yb, yt), i) for i, c in enumerate(chains)
+    )
+    used = set()
+    contours = []
+    for first in range(len(chains)):
+        if first in used:
+            continue
+        contour = []
+        cur = first
+        while True:
+            used.add(cur)
+            segs = chains[cur]
+            contour.extend(segs)
+            exitPt = segs[-1][-1]
+            se = _perimeterPos(exitPt, x_min, x_max, yb, yt)
+            nxt, sn = None, None
+            best = None
+            for s, i in entries:
+                d = (s - se) % perim
+                if i != first and i in used:
+                    continue
+                if best is None or d < best:
+                    best, nxt, sn = d, i, s
+            if nxt is None:
+                break
+            pt = exitPt
+            between = sorted(
+                ((cs - se) % perim, cp) for cs, cp in corners if 0 < (cs - se) % perim < best
+            )
+            for _, cp in between:
+                if cp != pt:
+                    contour.append((pt, cp))
+                    pt = cp
+            entryPt = chains[nxt][0][0]
+            if entryPt != pt:
+                contour.append((pt, entryPt))
+            if nxt == first:
+                break
+            cur = nxt
+        contours.append(contour)
+    return contours
+
+
+def _insideAt(index, x, y):
+    winding = 0
+    for cx, d in crossingsAtY(index.edgesAtY(y), y):
+        if cx > x:
+            break
+        winding += d
+    return winding != 0
+
+
+def _disjointRowGroups(rows):
+    # Greedy interval partitioning of the rows; rows may touch. Each piece
+    # of the outline is assigned to one band, so overlapping bands cannot
+    # share a slice.
+    groups = []
+    for row in sorted(set(rows)):
+        for group in groups:
+            if group[-1][1] <= row[0]:
+                group.append(row)
+                break
+        else:
+            groups.append([row])
+    return groups
+
+
+def sliceOutline(outline, rows, x_min, x_max):
+    """Cut ``outline`` into the horizontal bands ``rows``.
+
+    ``rows`` are ascending ``(yBottom, yTop)`` pairs, as from ``barRows``.
+    Returns one list of closed contours (lists of segments) per band, with
+    band edges that sit exactly on ``yBottom``/``yTop``. Rows may overlap
+    (a negative gap); every set of disjoint rows is then cut on its own.
+    """
+    groups = _disjointRowGroups(rows)
+    if len(groups) > 1:
+        sliced = {}
+        for group in groups:
+            sliced.update(zip(group, sliceOutline(outline, group, x_min, x_max)))
+        return [sliced[row] for row in rows]
+
+    contours = outline.contours
+    if sum(_signedArea(c) for c in contours) < 0:
+        contours = [_reverseContour(c) for c in contours]
+
+    bands = _Bands(rows, x_min, x_max)
+    index = edgeIndexFor(outline)
+    yValues = sorted({v for row in rows for v in row})
+    xValues = [x_min, x_max]
+    chainsPerBand = [[] for _ in rows]
+    closedPerBand = [[] for _ in rows]
+
+    for contour in contours:
+        pieces = []
+        for seg in contour:
+            # A segment stays inside the hull of its points, so only the band
+            # edges within that y extent can cut it.
+            segYs = [p[1] for p in seg]
+            lo = bisect.bisect_left(yValues, min(segYs))
+            hi = bisect.bisect_right(yValues, max(segYs))
+            roots = _axisRoots(seg, 1, yValues[lo:hi]) + _axisRoots(seg, 0, xValues)
+            roots.sort()
+            cuts = []
+            for t, axis, v in roots:
+                if t <= EPS or t >= 1 - EPS:
+                    continue
+                x, y = _evalSeg(seg, t)
+                if cuts and t - cuts[-1][0] <= EPS:
+                    x, y = cuts.pop()[1]
+                if axis == 1:
+                    y = v
+                else:
+                    x = v
+                cuts.append((t, (x, y)))
+            pieces.extend(_splitAt(seg, cuts))
+
+        regions = [bands.regionOf(p) for p in pieces]
+        start = None
+        for k in range(len(pieces)):
+            if regions[k] != regions[k - 1]:
+                start = k
+                break
+        if start is None:
+            if regions and regions[0] is not None:
+                closedPerBand[regions[0]].append(pieces)
+            continue
+        pieces = pieces[start:] + pieces[:start]
+        regions = regions[start:] + regions[:start]
+        chain = []
+        for piece, region in zip(pieces, regions):
+            if chain and region != chain[0][1]:
+                if chain[0][1] is not None:
+                    chainsPerBand[chain[0][1]].append([p for p, _ in chain])
+                chain = []
+            chain.append((piece, region))
+        if chain and chain[0][1] is not None:
+            chainsPerBand[chain[0][1]].append([p for p, _ in chain])
+
+    out = []
+    for i, (yb, yt) in enumerate(rows):
+        result = list(closedPerBand[i])
+        if chainsPerBand[i]:
+            result.extend(_closeChains(chainsPerBand[i], x_min, x_max, yb, yt))
+        elif _insideAt(index, x_min + 1e-6, (yb + yt) * 0.5):
+            result.append([
+                ((x_min, yb), (x_max, yb)),
+                ((x_max, yb), (x_max, yt)),
+                ((x_max, yt), (x_min, yt)),
+                ((x_min, yt), (x_min, yb)),
+            ])
+        out.append(result)
+    return out
+
+
+MAX_CACHED_BANDS = 1024
+
+
+def cachedSliceOutline(outline, rows, x_min, x_max):
+    """``sliceOutline`` that remembers every band on the outline.
+
+    Bands are independent of each other, so only rows not sliced before
+    are cut.
+    """
+    memo = outline.derived.setdefault("bands", {})
+    keys = [(yb, yt, x_min, x_max) for yb, yt in rows]
+    missing = [(k[0], k[1]) for k in keys if k not in memo]
+    if missing:
+        if len(memo) + len(missing) > MAX_CACHED_BANDS:
+            memo.clear()
+        for row, contours in zip(missing, sliceOutline(outline, missing, x_min, x_max)):
+            memo[(row[0], row[1], x_min, x_max)] = contours
+    return [memo[k] for k in keys]
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Bar geometry for Bbbaaarrrsss, computed from plain outline data.
+
+import fnmatch
+import json
+import math
+import os
+import sys
+import time
+
+from serebrotype.bands import cachedSliceOutline
+from serebrotype.flatten import flatOutline
+from serebrotype.outline import Outline
+from serebrotype.scanline import cachedIntervalsAtYs
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MIN_BAR_LEN = 0.4
+SWEEP_DIGITS = 6
+
+
+def layerNameFor(n, gap, angleDeg=0.0, fitContour=False):
+    if not fitContour and abs(angleDeg) > 0.0001:
+        return f"Bars={n}, Gap={gap:g}, Angle={angleDeg:g}"
+    return f"Bars={n}, Gap={gap:g}"
+
+
+def barRows(yMin, yMax, n, gap):
+    """``(yBottom, yTop)`` of every bar between ``yMin`` and ``yMax``."""
+    if n < 1:
+        raise ValueError("Bars must be ≥ 1")
+    remainForBars = (yMax - yMin) - (n - 1) * gap
+    if remainForBars <= 0:
+        raise ValueError("Gap is too large for this height and number of bars.")
+    barH = remainForBars / n
+    rows = []
+    y0 = yMin
+    for i in range(n):
+        yTop = yMax if i == n - 1 else y0 + barH
+        rows.append((y0, yTop))
+        y0 += barH + gap
+    return rows
+
+
+def barQuads(outline, n, gap, angleDeg=0.0, x_min=0.0, x_max=None, minLen=MIN_BAR_LEN,
+             tolerance=None):
+    """Corner points of every bar, as 4-sequences of ``(x, y)``.
+
+    All bar midlines not seen before are intersected in one batch. Angled bars are
+    parallelograms shifted by ``tan(angle) * height`` at the top. With a
+    ``tolerance`` the midlines cross the outline flattened to that deviation.
+    """
+    if x_max is None:
+        x_max = outline.width
+    _, yMin, _, yMax = outline.bounds
+    tanA = math.tan(math.radians(angleDeg)) if angleDeg != 0 else 0.0
+    rows = barRows(yMin, yMax, n, gap)
+    spans = cachedIntervalsAtYs(flatOutline(outline, tolerance), [(b + t) * 0.5 for b, t in rows],
+                                x_min, x_max, minLen)
+    if np is not None:
+        return _barCornersNumpy(rows, spans, tanA).tolist()
+    quads = []
+    for (yBottom, yTop), rowSpans in zip(rows, spans):
+        dx = tanA * (yTop - yBottom)
+        for xx0, xx1 in rowSpans:
+            quads.append((
+                (xx0, yBottom),
+                (xx1, yBottom),
+                (xx1 + dx, yTop),
+                (xx0 + dx, yTop),
+            ))
+    return quads
+
+
+def _barCornersNumpy(rows, spans, tanA):
+    counts = [len(s) for s in spans]
+    flat = np.array([x for s in spans for x in s], dtype=float).reshape(-1, 2)
+    rowArr = np.repeat(np.array(rows, dtype=float).reshape(-1, 2), counts, axis=0)
+    yb, yt = rowArr[:, 0], rowArr[:, 1]
+    x0, x1 = flat[:, 0], flat[:, 1]
+    dx = tanA * (yt - yb)
+    corners = np.empty((flat.shape[0], 4, 2))
+    corners[:, 0, 0], corners[:, 0, 1] = x0, yb
+    corners[:, 1, 0], corners[:, 1, 1] = x1, yb
+    corners[:, 2, 0], corners[:, 2, 1] = x1 + dx, yt
+    corners[:, 3, 0], corners[:, 3, 1] = x0 + dx, yt
+    return corners
+
+
+def barContours(outline, n, gap, x_min=0.0, x_max=None, tolerance=None):
+    """The outline cut into ``n`` bands, as one flat list of closed contours.
+
+    With a ``tolerance`` the bands are cut from the flattened outline and
+    contain straight segments only.
+    """
+    if x_max is None:
+        x_max = outline.width
+    _, yMin, _, yMax = outline.bounds
+    rows = barRows(yMin, yMax, n, gap)
+    bands = cachedSliceOutline(flatOutline(outline, tolerance), rows, x_min, x_max)
+    return [c for band in bands for c in band]
+
+
+# ---------- sweeps ----------
+
+def parseSweepRange(text, cast=float):
+    """Values of a range like ``"5..21:2"``, ``"-10..10:5"`` or ``"5, 9, 13"``.
+
+    Parts are comma separated; ``a..b`` steps by 1 unless ``:step`` is given
+    and includes ``b`` when it lies on the step.
+    """
+    values = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ".." not in part:
+            values.append(cast(part))
+            continue
+        first, _, rest = part.partition("..")
+        last, _, step = rest.partition(":")
+        first, last, step = cast(first), cast(last), cast(step or 1)
+        if step <= 0:
+            raise ValueError("Sweep step must be > 0: %s" % part)
+        if last < first:
+            raise ValueError("Sweep range runs backwards: %s" % part)
+        # Each value is computed from `first` and rounded, so steps like
+        # 0.1 neither drift nor drop `last` (0.1 + 2 * 0.1 != 0.3).
+        count = int(math.floor(round((last - first) / step, SWEEP_DIGITS))) + 1
+        values.extend(cast(round(first + i * step, SWEEP_DIGITS)) for i in range(count))
+    if not values:
+        raise ValueError("Empty sweep range")
+    return list(dict.fromkeys(values))
+
+
+def sweepVariants(counts, gaps, angles=(0.0,), fitContour=False):
+    """Every ``(n, gap, angleDeg)`` combination; angles are ignored when fitting."""
+    if fitContour:
+        angles = (0.0,)
+    return [(n, gap, angle) for n in counts for gap in gaps for angle in angles]
+
+
+def barSweep(outline, variants, fitContour=False, x_min=0.0, x_max=None, tolerance=None):
+    """Bars for many ``(n, gap, angleDeg)`` variants of one outline.
+
+    The midlines (or bands with ``fitContour``) of all variants are
+    collected first and every distinct one is intersected once, so the
+    cost grows with distinct scanlines rather than variants; angles only
+    shear the quads. Returns ``(variant, shapes, error)`` per variant.
+    """
+    if x_max is None:
+        x_max = outline.width
+    _, yMin, _, yMax = outline.bounds
+    rowsFor = {}
+    errors = {}
+    for variant in variants:
+        n, gap, _ = variant
+        try:
+            rowsFor[variant] = barRows(yMin, yMax, n, gap)
+        except ValueError as e:
+            errors[variant] = str(e)
+    distinct = sorted({row for rows in rowsFor.values() for row in rows})
+    if fitContour:
+        # Overlapping bands of different variants are cut in separate
+        # passes inside sliceOutline.
+        cachedSliceOutline(flatOutline(outline, tolerance), distinct, x_min, x_max)
+    else:
+        midlines = sorted({(b + t) * 0.5 for b, t in distinct})
+        cachedIntervalsAtYs(flatOutline(outline, tolerance), midlines, x_min, x_max, MIN_BAR_LEN)
+
+    out = []
+    for variant in variants:
+        if variant in errors:
+            out.append((variant, None, errors[variant]))
+            continue
+        n, gap, angleDeg = variant
+        if fitContour:
+            shapes = barContours(outline, n, gap, x_min, x_max, tolerance=tolerance)
+        else:
+            shapes = barQuads(outline, n, gap, angleDeg, x_min, x_max, tolerance=tolerance)
+        out.append((variant, shapes, None))
+    return out
+
+
+def offsetShapes(shapes, dx, fitContour=False):
+    """Bar quads, or band contours with ``fitContour``, moved right by ``dx``."""
+    if fitContour:
+        return [[tuple((x + dx, y) for x, y in seg) for seg in contour] for contour in shapes]
+    return [[(x + dx, y) for x, y in quad] for quad in shapes]
+
+
+# ---------- batch ----------
+
+def matchesGlyphFilter(name, patterns):
+    """True if ``name`` matches any of the space separated glob ``patterns``."""
+    patterns = patterns.split() if isinstance(patterns, str) else list(patterns or [])
+    if not patterns:
+        return True
+    return any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+
+def selectLayers(font, patterns="", masterIds=None):
+    """Master layers of the glyphs matching ``patterns`` in ``font``."""
+    if masterIds is None:
+        masterIds = [m.id for m in font.masters]
+    out = []
+    for glyph in font.glyphs:
+        if not matchesGlyphFilter(glyph.name, patterns):
+            continue
+        for masterId in masterIds:
+            layer = glyph.layers[masterId]
+            if layer is not None:
+                out.append(layer)
+    return out
+
+
+def _barsJob(args):
+    key, contours, width, n, gap, angleDeg, fitContour, tolerance = args
+    outline = Outline(contours, width)
+    if outline.isEmpty():
+        return key, None, "No contours in the layer."
+    try:
+        if fitContour:
+            return key, barContours(outline, n, gap, tolerance=tolerance), None
+        return key, barQuads(outline, n, gap, angleDeg, tolerance=tolerance), None
+    except ValueError as e:
+        return key, None, str(e)
+
+
+def canUseProcessPool():
+    # Inside Glyphs sys.executable is the app itself, spawning it would start
+    # another copy of Glyphs instead of a worker.
+    exe = os.path.basename(sys.executable or "").lower()
+    return exe.startswith("python") or exe.startswith("pypy")
+
+
+def computeBarsBatch(jobs, n, gap, angleDeg=0.0, fitContour=False, workers=None,
+                     progress=None, shouldCancel=None, tolerance=None):
+    """Compute bars for many outlines.
+
+    ``jobs`` is an iterable of ``(key, contours, width)``. Returns a dict
+    mapping each key to ``(shapes, error)``, where shapes are bar quads, or
+    band contours with ``fitContour``. Returns None if ``shouldCancel()``
+    turned true before the batch was done. ``progress(done, total)`` is
+    called as results come in. ``tolerance`` is passed on to ``barQuads``
+    and ``barContours``.
+    """
+    tasks = [(key, contours, width, n, gap, angleDeg, fitContour, tolerance)
+             for key, contours, width in jobs]
+    total = len(tasks)
+    results = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def record(res):
+        key, quads, err = res
+        results[key] = (quads, err)
+        if progress is not None:
+            progress(len(results), total)
+
+    if workers <= 1 or total < 2 or not canUseProcessPool():
+        for task in tasks:
+            if shouldCancel is not None and shouldCancel():
+                return None
+            record(_barsJob(task))
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    chunk = max(1, min(64, total // (workers * 4)))
+    batches = [tasks[i:i + chunk] for i in range(0, total, chunk)]
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_barsChunk, b) for b in batches]
+        for fut in as_completed(futures):
+            if shouldCancel is not None and shouldCancel():
+                pool.shutdown(wait=False, cancel_futures=True)
+                return None
+            for res in fut.result():
+                record(res)
+    finally:
+        pool.shutdown(wait=True)
+    return results
+
+
+def _barsChunk(tasks):
+    return [_barsJob(t) for t in tasks]
+
+
+# ---------- headless entry point ----------
+
+def loadOutlines(path):
+    """Read ``{name: {"width": w, "contours": [...]}}`` from a JSON file."""
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    jobs = []
+    for name, entry in data.items():
+        contours = [
+            [tuple(tuple(pt) for pt in seg) for seg in contour]
+            for contour in entry["contours"]
+        ]
+        jobs.append((name, contours, float(entry.get("width", 0.0))))
+    return jobs
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compute Bbbaaarrrsss bars outside Glyphs.")
+    parser.add_argument("outlines", help="JSON file with outlines per glyph")
+    parser.add_argument("--bars", type=int, default=11)
+    parser.add_argument("--gap", type=float, default=20.0)
+    parser.add_argument("--angle", type=float, default=0.0)
+    parser.add_argument("--fit", action="store_true", help="fit bars to contour")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="flatten curves to this deviation first (default: exact curves)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    jobs = loadOutlines(args.outlines)
+    t0 = time.time()
+    results = computeBarsBatch(jobs, args.bars, args.gap, args.angle,
+                               fitContour=args.fit, workers=args.workers, tolerance=args.tolerance)
+    dt = time.time() - t0
+    failed = sum(1 for _, err in results.values() if err)
+    bars = sum(len(q) for q, err in results.values() if q)
+    print(f"{len(results)} outlines, {bars} bars, {failed} failed in {dt:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# Demo generation on compiled TTF/OTF files, for build servers without
+# Glyphs: the same keep-set, traps, .notdef mark and naming as
+# make_trial_font, applied with fontTools.
+#
+#     python -m serebrotype.binarydemo fonts/*.otf -o demo/ --trap --notdef-mode 1
+#     python -m serebrotype.binarydemo fonts/*.otf -o demo/ --profile Latin --profile Cyrillic
+
+import io
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    from fontTools.pens.recordingPen import DecomposingRecordingPen
+    from fontTools.pens.t2CharStringPen import T2CharStringPen
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    from fontTools.subset import Options, Subsetter
+    from fontTools.ttLib import TTFont
+except ImportError:
+    TTFont = None
+
+from serebrotype.demo import (
+    DEFAULT_PROFILE, DEMO_PROFILES, DEMO_UNICODES, LICENSE_TEXT, has_trap, load_profiles, profile_with_options,
+)
+from serebrotype.notdef import contour_points, scaled_notdef
+
+# Codepoints that get another glyph's drawing, as in TRAP_SWAPS and
+# TRAP_REPLACEMENTS: O/o look like Ø/ø, Ё/ё like Е/е, Й/й like И/и, Щ/щ like Ш/ш.
+TRAP_CODEPOINTS = [
+    (0x004F, 0x00D8), (0x006F, 0x00F8),
+    (0x0401, 0x0415), (0x0451, 0x0435),
+    (0x0419, 0x0418), (0x0439, 0x0438),
+    (0x0429, 0x0428), (0x0449, 0x0448),
+]
+
+DemoResult = namedtuple("DemoResult", "source path seconds error profile", defaults=(None,))
+
+
+def _require_fonttools():
+    if TTFont is None:
+        raise RuntimeError("fontTools is required for binary demo generation (pip install fonttools).")
+
+# OUTLINES
+def _draw_contours(pen, contours, reverse=False):
+    for contour in contours:
+        points = [(round(x), round(y)) for x, y in contour_points(contour)]
+        if reverse:
+            points.reverse()
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+
+def _is_cff(font):
+    return "CFF " in font
+
+def _charstrings(font):
+    return font["CFF "].cff.topDictIndex[0].CharStrings
+
+def _set_glyph(font, name, draw, width):
+    """Replaces the outline of `name` with whatever `draw(pen)` draws."""
+    if _is_cff(font):
+        charstrings = _charstrings(font)
+        private = charstrings[name].private
+        if width == getattr(private, "defaultWidthX", None):
+            pen = T2CharStringPen(None, None)
+        else:
+            pen = T2CharStringPen(width - getattr(private, "nominalWidthX", 0), None)
+        draw(pen)
+        top = font["CFF "].cff.topDictIndex[0]
+        charstrings[name] = pen.getCharString(private=private, globalSubrs=top.GlobalSubrs)
+        lsb = 0
+        bounds = charstrings[name].calcBounds(charstrings)
+        if bounds:
+            lsb = bounds[0]
+    else:
+        pen = TTGlyphPen(None)
+        draw(pen)
+        glyph = pen.glyph()
+        glyph.recalcBounds(font["glyf"])
+        font["glyf"][name] = glyph
+        lsb = getattr(glyph, "xMin", 0)
+    font["hmtx"][name] = (int(round(width)), int(round(lsb)))
+
+# TRAP
+def trap_codepoints(profile):
+    """The TRAP_CODEPOINTS pairs for a profile: those whose target it keeps, if it has a trap."""
+    if not has_trap(profile):
+        return []
+    return [(target, source) for target, source in TRAP_CODEPOINTS if target in profile.unicodes]
+
+def apply_trap(font, pairs=TRAP_CODEPOINTS):
+    cmap = font.getBestCmap()
+    glyph_set = font.getGlyphSet()
+    for target, source in pairs:
+        target_name, source_name = cmap.get(target), cmap.get(source)
+        if not target_name or not source_name or target_name == source_name:
+            continue
+        # Flatten the source so a composite Ø built on O cannot point at itself.
+        recording = DecomposingRecordingPen(glyph_set)
+        glyph_set[source_name].draw(recording)
+        _set_glyph(font, target_name, recording.replay, font["hmtx"][source_name][0])
+
+# .NOTDEF
+def insert_demo_notdef(font, mark="demo"):
+    upm = font["head"].unitsPerEm
+    os2 = font["OS/2"] if "OS/2" in font else None
+    cap_height = getattr(os2, "sCapHeight", 0) or upm * 0.7
+    width, contours = scaled_notdef(mark, cap_height)
+    # Templates use PostScript direction; TrueType wants it the other way round.
+    reverse = not _is_cff(font)
+    _set_glyph(font, font.getGlyphOrder()[0], lambda pen: _draw_contours(pen, contours, reverse), width)
+
+# NAMES
+def rename_font(font, selected_prefix):
+    """Adds the prefix to the family name and sets the license; returns the new PostScript name."""
+    name_table = font["name"]
+    family = name_table.getBestFamilyName() or "Untitled"
+    base_name = re.sub(r"\s*\(.*?\)", "", family).strip()
+    new_family = f"{base_name} ({selected_prefix})"
+    ps_base = base_name.replace(" ", "")
+    ps_new = ps_base + selected_prefix.replace(" ", "")
+
+    for record in name_table.names:
+        text = record.toUnicode()
+        if record.nameID in (1, 4, 16, 18, 21):
+            old = family if family in text else base_name
+            record.string = text.replace(old, new_family, 1)
+        elif record.nameID in (3, 6, 20):
+            record.string = text.replace(ps_base, ps_new, 1)
+
+    license_text = LICENSE_TEXT.format(selected_prefix)
+    name_table.removeNames(nameID=13)
+    name_table.setName(license_text, 13, 3, 1, 0x409)
+    if any(record.platformID == 1 for record in name_table.names):
+        name_table.setName(license_text, 13, 1, 0, 0)
+
+    ps_name = name_table.getDebugName(6) or ps_new
+    if _is_cff(font):
+        cff = font["CFF "].cff
+        cff.fontNames = [ps_name]
+        top = cff.topDictIndex[0]
+        for attr in ("FamilyName", "FullName"):
+            text = getattr(top, attr, None)
+            if text:
+                old = family if family in text else base_name
+                setattr(top, attr, text.replace(old, new_family, 1))
+    return ps_name
+
+# SUBSET
+def subset_to_demo(font, unicodes=DEMO_UNICODES):
+    options = Options()
+    options.name_IDs = ["*"]
+    options.name_languages = ["*"]
+    options.name_legacy = True
+    options.notdef_outline = True
+    options.glyph_names = True
+    options.layout_features = ["*"]
+    # No GSUB closure: a.sc or f_i reached only through features are left
+    # out, as the Glyphs pipeline removes them, and their rules go too.
+    options.layout_closure = False
+    subsetter = Subsetter(options=options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+
+# ONE FONT
+def _load_source(source_path):
+    font = TTFont(source_path)
+    if "fvar" in font or "CFF2" in font:
+        raise ValueError("Variable fonts are not supported: %s" % os.path.basename(source_path))
+    return font
+
+def _build_profile(font, source_path, dest_folder, profile):
+    pairs = trap_codepoints(profile)
+    if pairs:
+        apply_trap(font, pairs)
+    subset_to_demo(font, profile.unicodes)
+    if profile.notdef_mode == 1:
+        insert_demo_notdef(font)
+    ps_name = rename_font(font, profile.selected_prefix)
+
+    ext = os.path.splitext(source_path)[1].lower() or (".otf" if _is_cff(font) else ".ttf")
+    os.makedirs(dest_folder, exist_ok=True)
+    path = os.path.join(dest_folder, ps_name + ext)
+    font.save(path)
+    return path
+
+def make_demo_binary(source_path, dest_folder, selected_prefix="Demo", apply_trial_trap=False, notdef_mode=0,
+                     profile=None):
+    """Builds one demo; without a `profile` the default one with the given options."""
+    _require_fonttools()
+    if profile is None:
+        profile = profile_with_options(DEFAULT_PROFILE, apply_trial_trap, notdef_mode, selected_prefix)
+    return _build_profile(_load_source(source_path), source_path, dest_folder, profile)
+
+def make_profile_binaries(source_path, dest_folder, profiles):
+    """Builds the demo of every profile from one font; yields (profile, path).
+
+    The source is read and subset once to what the profiles need together
+    (their codepoints and trap sources); each profile then starts from an
+    in-memory copy of that much smaller font."""
+    _require_fonttools()
+    font = _load_source(source_path)
+    if len(profiles) == 1:
+        yield profiles[0], _build_profile(font, source_path, dest_folder, profiles[0])
+        return
+    needed = set()
+    for profile in profiles:
+        needed.update(profile.unicodes)
+        needed.update(source for _, source in trap_codepoints(profile))
+    subset_to_demo(font, needed)
+    shared = io.BytesIO()
+    font.save(shared)
+    data = shared.getvalue()
+    for profile in profiles:
+        yield profile, _build_profile(TTFont(io.BytesIO(data)), source_path, dest_folder, profile)
+
+def _timed_profiles(args):
+    source_path, dest_folder, profiles = args
+    results = []
+    t0 = time.perf_counter()
+    try:
+        for profile, path in make_profile_binaries(source_path, dest_folder, profiles):
+            t1 = time.perf_counter()
+            results.append(DemoResult(source_path, path, t1 - t0, None, profile.name))
+            t0 = t1
+    except Exception as e:
+        for profile in profiles[len(results):]:
+            results.append(DemoResult(source_path, None, time.perf_counter() - t0, e, profile.name))
+    return results
+
+# MANY FONTS
+def make_demo_binaries(source_paths, dest_folder, selected_prefix="Demo", apply_trial_trap=False,
+                       notdef_mode=0, workers=None, profiles=None):
+    """Builds demos for every font on a process pool and yields a DemoResult
+    per font and profile as fonts finish; only a few fonts per worker are in
+    flight. Without `profiles` the default profile with the given options
+    is built."""
+    _require_fonttools()
+    if not profiles:
+        profiles = [profile_with_options(DEFAULT_PROFILE, apply_trial_trap, notdef_mode, selected_prefix)]
+    jobs = ((path, dest_folder, list(profiles)) for path in source_paths)
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1:
+        for job in jobs:
+            yield from _timed_profiles(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(_timed_profiles, job))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in wait(pending).done:
+            yield from future.result()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build demo fonts from compiled TTF/OTF files.")
+    parser.add_argument("fonts", nargs="+", help="TTF/OTF files")
+    parser.add_argument("-o", "--output", default="demo", help="destination folder")
+    parser.add_argument("--prefix", default="Demo")
+    parser.add_argument("--trap", action="store_true", help="swap O/o→Ø/ø, Й/й→И/и, etc.")
+    parser.add_argument("--notdef-mode", type=int, choices=(0, 1), default=0,
+                        help="0 keeps .notdef, 1 draws the ‘Demo’ mark")
+    parser.add_argument("--profile", action="append", default=[],
+                        choices=[profile.name for profile in DEMO_PROFILES],
+                        help="built-in demo profile, may be repeated; uses the profile's own options")
+    parser.add_argument("--profiles", help="JSON file with demo profiles to build as well")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    by_name = {profile.name: profile for profile in DEMO_PROFILES}
+    profiles = [by_name[name] for name in args.profile]
+    if args.profiles:
+        profiles.extend(load_profiles(args.profiles))
+
+    t0 = time.time()
+    built = failed = 0
+    for result in make_demo_binaries(args.fonts, args.output, args.prefix, args.trap,
+                                     args.notdef_mode, args.workers, profiles):
+        if result.error is None:
+            built += 1
+            print(f"{result.path} ({result.seconds:.2f}s)")
+        else:
+            failed += 1
+            print(f"{result.source} [{result.profile}]: {result.error}", file=sys.stderr)
+    print(f"{built} of {built + failed} demos in {time.time() - t0:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,493 @@
+# -*- coding: utf-8 -*-
+# Demo font generation: the part of "Demo version generation" that works
+# on a GSFont and does not need the UI.
+
+import json
+import re
+from collections import namedtuple
+
+from serebrotype.democache import demo_glyph_key, demo_options_key, restore_glyph
+from serebrotype.features import prune_font_features
+from serebrotype.glyphsapi import Glyphs, GSFont, GSGlyph, GSComponent
+from serebrotype.notdef import scaled_notdef
+from serebrotype.shapebuffer import ShapeBuffer
+
+# FUNCTION
+def replace_with_component(font, source_name, target_name):
+    source_glyph = font.glyphs[source_name]
+    target_glyph = font.glyphs[target_name]
+
+    if source_glyph and target_glyph:
+        for master in font.masters:
+            target_layer = target_glyph.layers[master.id]
+            target_layer.shapes = []
+            component = GSComponent(source_name)
+            target_layer.shapes.append(component)
+            source_layer = source_glyph.layers[master.id]
+            target_layer.width = source_layer.width
+            target_layer.leftMetricsKey = None
+            target_layer.rightMetricsKey = None
+
+def swap_glyph_content(font, source_name, target_name):
+    source_glyph = font.glyphs[source_name]
+    target_glyph = font.glyphs[target_name]
+    
+    if not source_glyph or not target_glyph:
+        return
+
+    for master in font.masters:
+        source_layer = source_glyph.layers[master.id]
+        target_layer = target_glyph.layers[master.id]
+        source_layer.shapes = [shape.copy() for shape in target_layer.shapes]
+        source_layer.width = target_layer.width
+
+# .NOTDEF
+def notdef_paths(mark, cap_height):
+    width, contours = scaled_notdef(mark, cap_height)
+    shapes = ShapeBuffer()
+    for contour in contours:
+        shapes.addPolygon(contour)
+    return width, shapes.paths()
+
+def draw_notdef(layer, mark, cap_height):
+    # Template contours already have the right direction.
+    width, paths = notdef_paths(mark, cap_height)
+    layer.clear()
+    layer.width = width
+    layer.shapes = paths
+
+def create_empty_notdef(font):
+    notdef = GSGlyph(".notdef")
+    notdef.category = "Letter"
+    notdef.subCategory = "Other"
+    font.glyphs.append(notdef)
+
+    for master in font.masters:
+        draw_notdef(font.glyphs[".notdef"].layers[master.id], "empty", master.capHeight)
+
+def insert_predefined_notdef(font, mark="demo"):
+    if not font.glyphs[".notdef"]:
+        create_empty_notdef(font)
+
+    for master in font.masters:
+        draw_notdef(font.glyphs[".notdef"].layers[master.id], mark, master.capHeight)
+
+LICENSE_TEXT = "{} version for evaluation purposes only. Not for commercial use."
+
+# DEMO GLYPH SET
+def unicode_set(*ranges):
+    """Codepoints from ints, (first, last) pairs and "0041-005A" or "002E" strings."""
+    codes = set()
+    for item in ranges:
+        if isinstance(item, str):
+            first, _, last = item.partition("-")
+            item = (int(first, 16), int(last or first, 16))
+        if isinstance(item, int):
+            codes.add(item)
+        else:
+            codes.update(range(item[0], item[1] + 1))
+    return frozenset(codes)
+
+LATIN_UNICODES = unicode_set((0x0041, 0x005A), (0x0061, 0x007A))  # A-Z, a-z
+CYRILLIC_UNICODES = unicode_set((0x0410, 0x042F), (0x0430, 0x044F), 0x0401, 0x0451)  # А-Я, а-я, Ё, ё
+GREEK_UNICODES = unicode_set((0x0391, 0x03A1), (0x03A3, 0x03A9), (0x03B1, 0x03C9))  # Α-Ω, α-ω
+BASIC_UNICODES = unicode_set((0x0030, 0x0039), 0x002E, 0x002C, 0x002D)  # 0–9, period, comma, hyphen
+DEMO_UNICODES = LATIN_UNICODES | CYRILLIC_UNICODES | BASIC_UNICODES
+REQUIRED_GLYPHS = [".notdef"]
+TRAP_SWAPS = [("O", "Oslash"), ("o", "oslash")]
+TRAP_REPLACEMENTS = [
+    ("Ie-cy", "Io-cy"), ("ie-cy", "io-cy"),
+    ("Ii-cy", "Iishort-cy"), ("ii-cy", "iishort-cy"),
+    ("Sha-cy", "Shcha-cy"), ("sha-cy", "shcha-cy"),
+]
+
+# DEMO PROFILES
+# What one demo contains: its codepoints, glyphs kept whatever their
+# codepoints, trap rules (none means no trap), the .notdef mode and the
+# word added to the family name.
+DemoProfile = namedtuple(
+    "DemoProfile",
+    "name unicodes required_glyphs trap_swaps trap_replacements notdef_mode selected_prefix",
+    defaults=(tuple(REQUIRED_GLYPHS), (), (), 0, "Demo"),
+)
+
+DEFAULT_PROFILE = DemoProfile(
+    "Latin + Cyrillic", DEMO_UNICODES,
+    trap_swaps=tuple(TRAP_SWAPS), trap_replacements=tuple(TRAP_REPLACEMENTS),
+)
+DEMO_PROFILES = [
+    DEFAULT_PROFILE,
+    DemoProfile("Latin", LATIN_UNICODES | BASIC_UNICODES,
+                trap_swaps=tuple(TRAP_SWAPS), selected_prefix="Demo Latin"),
+    DemoProfile("Cyrillic", CYRILLIC_UNICODES | BASIC_UNICODES,
+                trap_replacements=tuple(TRAP_REPLACEMENTS), selected_prefix="Demo Cyrillic"),
+    DemoProfile("Latin + Greek", LATIN_UNICODES | GREEK_UNICODES | BASIC_UNICODES,
+                trap_swaps=tuple(TRAP_SWAPS), selected_prefix="Demo Greek"),
+]
+
+def has_trap(profile):
+    return bool(profile.trap_swaps or profile.trap_replacements)
+
+def profile_with_options(profile, apply_trial_trap=None, notdef_mode=None, selected_prefix=None):
+    """`profile` with the UI options applied; None leaves a field as it is."""
+    changes = {}
+    if apply_trial_trap is not None and not apply_trial_trap:
+        changes.update(trap_swaps=(), trap_replacements=())
+    if notdef_mode is not None:
+        changes["notdef_mode"] = int(notdef_mode)
+    if selected_prefix is not None:
+        changes["selected_prefix"] = selected_prefix
+    return profile._replace(**changes)
+
+def profile_from_dict(data):
+    return DemoProfile(
+        name=data["name"],
+        unicodes=unicode_set(*data.get("unicodes", ())),
+        required_glyphs=tuple(data.get("required_glyphs", REQUIRED_GLYPHS)),
+        trap_swaps=tuple(tuple(rule) for rule in data.get("trap_swaps", ())),
+        trap_replacements=tuple(tuple(rule) for rule in data.get("trap_replacements", ())),
+        notdef_mode=int(data.get("notdef_mode", 0)),
+        selected_prefix=data.get("selected_prefix", "Demo"),
+    )
+
+def load_profiles(path):
+    """Profiles from a JSON list of objects with DemoProfile's field names.
+
+    Unicodes are given as "0041-005A" / "002E" strings or numbers."""
+    with open(path, "r", encoding="utf-8") as fh:
+        return [profile_from_dict(item) for item in json.load(fh)]
+
+class GlyphIndex(object):
+    """Codepoint → glyph name and glyph name → referenced components, built in one pass."""
+
+    def __init__(self, font):
+        self.by_unicode = {}
+        self.components = {}
+        for glyph in font.glyphs:
+            for code in glyph.unicodes or ():
+                try:
+                    self.by_unicode.setdefault(int(code, 16), glyph.name)
+                except (TypeError, ValueError):
+                    pass
+            refs = set()
+            for layer in glyph.layers:
+                for component in layer.components:
+                    refs.add(component.componentName)
+            if refs:
+                self.components[glyph.name] = refs
+
+    def names_for_unicodes(self, codepoints):
+        by_unicode = self.by_unicode
+        return set(by_unicode[code] for code in codepoints if code in by_unicode)
+
+    def closure(self, names):
+        result = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in result:
+                continue
+            result.add(name)
+            pending.extend(self.components.get(name, ()))
+        return result
+
+def demo_glyph_names(font, index=None, profile=DEFAULT_PROFILE):
+    if index is None:
+        index = GlyphIndex(font)
+    glyphs_to_keep = index.names_for_unicodes(profile.unicodes)
+
+# ADD REQUIRED GLYPHS
+    glyphs_to_keep.update(profile.required_glyphs)
+    return glyphs_to_keep
+
+def decompose_if_referencing(font, name, referenced):
+    glyph = font.glyphs[name]
+    if glyph:
+        for layer in glyph.layers:
+            if any(component.componentName == referenced for component in layer.components):
+                layer.decomposeComponents()
+
+# BULK GLYPH REMOVAL
+def remove_glyphs(font, names):
+    names = set(names)
+    doomed = []
+    kept_names = []
+    for glyph in font.glyphs:
+        if glyph.name in names:
+            doomed.append(glyph)
+        else:
+            kept_names.append(glyph.name)
+    if not doomed:
+        return 0
+
+    # Keep outlines that point at removed glyphs before they go away.
+    for name in kept_names:
+        for layer in font.glyphs[name].layers:
+            for component in list(layer.components):
+                if component.componentName in names:
+                    component.decompose()
+
+    copy_kerning(font, font, kept_names)
+
+    if hasattr(font, "removeGlyphs_"):
+        font.removeGlyphs_(doomed)
+    else:
+        for glyph in doomed:
+            font.removeGlyph_(glyph)
+    return len(doomed)
+
+# SUBSET FONT
+FONT_ATTRIBUTES = [
+    "familyName", "upm", "versionMajor", "versionMinor", "date", "copyright",
+    "designer", "designerURL", "manufacturer", "manufacturerURL", "gridLength",
+    "disablesNiceNames", "disablesAutomaticAlignment", "keyboardIncrement", "note",
+]
+# Copied object by object; masters refer to metrics and stems by id.
+FONT_LISTS = ["properties", "axes", "metrics", "stems"]
+EXTRA_KERNINGS = ["kerningRTL", "kerningVertical"]
+
+def copy_font_attribute(font, subset, attr, convert=None):
+    """Copies one font attribute; one the Glyphs version cannot copy is
+    reported in the Macro panel instead of being dropped silently."""
+    if not hasattr(font, attr):
+        return
+    try:
+        value = getattr(font, attr)
+        setattr(subset, attr, convert(value) if convert else value)
+    except Exception as e:
+        print("✖ Demo: could not copy font %s: %s" % (attr, e))
+
+def copy_custom_parameters(font, subset):
+    for param in list(font.customParameters):
+        if hasattr(param, "name"):
+            subset.customParameters[param.name] = param.value
+        else:
+            subset.customParameters[param] = font.customParameters[param]
+
+def kerning_keys(font, glyph_names):
+    keys = set()
+    for name in glyph_names:
+        glyph = font.glyphs[name]
+        if glyph:
+            keys.add(getattr(glyph, "id", name))
+            if getattr(glyph, "leftKerningGroup", None):
+                keys.add("@MMK_R_" + glyph.leftKerningGroup)
+            if getattr(glyph, "rightKerningGroup", None):
+                keys.add("@MMK_L_" + glyph.rightKerningGroup)
+    return keys
+
+def filtered_kerning(kerning, keys):
+    kept = {}
+    for master_id, pairs in kerning.items():
+        kept_pairs = {}
+        for left, rights in pairs.items():
+            if left not in keys:
+                continue
+            row = {right: value for right, value in rights.items() if right in keys}
+            if row:
+                kept_pairs[left] = row
+        if kept_pairs:
+            kept[master_id] = kept_pairs
+    return kept
+
+def copy_kerning(font, subset, glyph_names):
+    keys = None
+    for attr in ["kerning"] + EXTRA_KERNINGS:
+        kerning = getattr(font, attr, None)
+        if not kerning:
+            continue
+        if keys is None:
+            keys = kerning_keys(font, glyph_names)
+        copy_font_attribute(font, subset, attr, lambda kerning: filtered_kerning(kerning, keys))
+
+def copy_user_data(font, subset):
+    user_data = getattr(font, "userData", None)
+    if not user_data:
+        return
+    try:
+        for key in list(user_data.keys()):
+            subset.userData[key] = user_data[key]
+    except Exception as e:
+        print("✖ Demo: could not copy font userData: %s" % e)
+
+def build_subset_font(font, glyph_names):
+    subset = GSFont()
+    for attr in FONT_ATTRIBUTES:
+        copy_font_attribute(font, subset, attr)
+    copy_custom_parameters(font, subset)
+    for attr in FONT_LISTS:
+        copy_font_attribute(font, subset, attr, lambda items: [item.copy() for item in items])
+    copy_user_data(font, subset)
+
+    # A new font may come with a default master; drop it after copying ours.
+    stale_masters = len(subset.masters)
+    for master in font.masters:
+        subset.masters.append(master.copy())
+    for _ in range(stale_masters):
+        del subset.masters[0]
+
+    for glyph in font.glyphs:
+        if glyph.name in glyph_names:
+            subset.glyphs.append(glyph.copy())
+
+    for instance in font.instances:
+        subset.instances.append(instance.copy())
+
+    subset.classes = [c.copy() for c in font.classes]
+    subset.features = [c.copy() for c in font.features]
+    subset.featurePrefixes = [c.copy() for c in font.featurePrefixes]
+    copy_kerning(font, subset, glyph_names)
+    return subset
+
+# MAIN FUNCTION
+def trap_partners(profile):
+    # Glyphs whose demo version takes content from another glyph.
+    partners = {}
+    for source_name, target_name in profile.trap_swaps:
+        partners.setdefault(source_name, []).append(target_name)
+    for source_name, target_name in profile.trap_replacements:
+        partners.setdefault(target_name, []).append(source_name)
+    return partners
+
+def apply_trap_rules(font, profile):
+    # O gets Oslash's shapes, so an Oslash built on O is flattened first.
+    for source_name, target_name in profile.trap_swaps:
+        decompose_if_referencing(font, target_name, source_name)
+        swap_glyph_content(font, source_name, target_name)
+    for source_name, target_name in profile.trap_replacements:
+        replace_with_component(font, source_name, target_name)
+
+class DemoSource(object):
+    """A source font analysed once for any number of demo profiles.
+
+    The glyph index and glyph hashes are shared. With several profiles the
+    glyphs any of them needs are copied once into a work font, where
+    helpers no profile keeps are decomposed and features are pruned; each
+    profile is then cut from that smaller font."""
+
+    def __init__(self, font, profiles):
+        self.font = font
+        self.index = GlyphIndex(font)
+        self.hashes = {}
+        self.keep = {}
+        needed = set()
+        for profile in profiles:
+            self.keep[profile] = demo_glyph_names(font, self.index, profile)
+            needed.update(self.keep[profile])
+            for names in trap_partners(profile).values():
+                needed.update(names)
+        if len(self.keep) > 1:
+            self.work = build_subset_font(font, self.index.closure(needed))
+            remove_glyphs(self.work, [glyph.name for glyph in self.work.glyphs if glyph.name not in needed])
+            prune_font_features(self.work)
+            self.work_index = GlyphIndex(self.work)
+        else:
+            self.work, self.work_index = font, self.index
+
+    def trial_font(self, profile, cache=None):
+        font, index = self.font, self.index
+
+# PREFIX WORD
+        trial_suffix_text = profile.selected_prefix
+
+# BUILD ALLOWED GLYPHS LIST
+        glyphs_to_keep = self.keep[profile]
+
+# REUSE UNCHANGED GLYPHS FROM THE CACHE
+        partners = trap_partners(profile)
+        keys, reused = {}, {}
+        if cache is not None:
+            options_key = demo_options_key(
+                trial_suffix_text, has_trap(profile), profile.notdef_mode, [m.id for m in font.masters],
+                profile.trap_swaps + profile.trap_replacements,
+            )
+            for name in glyphs_to_keep:
+                if name == ".notdef" or not font.glyphs[name]:
+                    continue
+                refs = index.components.get(name, ())
+                key = demo_glyph_key(
+                    font, name, options_key,
+                    kept_refs=[ref for ref in refs if ref in glyphs_to_keep],
+                    removed_refs=[ref for ref in refs if ref not in glyphs_to_keep],
+                    partners=partners.get(name, ()),
+                    hashes=self.hashes,
+                )
+                if key is None:
+                    continue
+                keys[name] = key
+                entry = cache.get(key)
+                if entry is not None:
+                    reused[name] = entry
+        dirty = glyphs_to_keep.difference(reused)
+
+# COPY ONLY WHAT THE DEMO NEEDS
+        work_names = set(dirty)
+        for name in dirty:
+            work_names.update(partners.get(name, ()))
+        trialFont = build_subset_font(self.work, self.work_index.closure(work_names).union(reused))
+        for name, entry in reused.items():
+            restore_glyph(trialFont.glyphs[name], entry)
+
+# RENAME FONT
+        base_name = re.sub(r'\s*\(.*?\)', '', font.familyName).strip()
+        trialFont.familyName = f"{base_name} ({trial_suffix_text})"
+
+# APP LICENSE PARAMETER
+        trialFont.customParameters["License"] = LICENSE_TEXT.format(trial_suffix_text)
+
+# INSERT .NOTDEF
+        if profile.notdef_mode == 0:
+            if not trialFont.glyphs['.notdef']:
+                create_empty_notdef(trialFont)
+        elif profile.notdef_mode == 1:
+            insert_predefined_notdef(trialFont)
+
+# TRIAL TRAP
+        apply_trap_rules(trialFont, profile)
+
+# REMOVE EVERYTHING NOT IN KEEP LIST
+        # Helpers such as dotlessi go here too; remove_glyphs decomposes the
+        # components of kept glyphs that point at them, and nothing else.
+        remove_glyphs(trialFont, [glyph.name for glyph in trialFont.glyphs if glyph.name not in glyphs_to_keep])
+
+# STORE REBUILT GLYPHS
+        for name in dirty:
+            if name in keys:
+                cache.put(keys[name], trialFont.glyphs[name])
+
+# PRUNE CLASSES AND FEATURES TO THE SURVIVING GLYPHS
+        prune_font_features(trialFont)
+        return trialFont
+
+def make_trial_font(selected_prefix="Demo", apply_trial_trap=False, notdef_mode=0, open_in_glyphs=True, font=None, cache=None, profile=None):
+    """Builds one demo font. Without a `profile` the default one is used with
+    the given prefix, trap and .notdef options; a `profile` is used as is."""
+    if font is None:
+        font = Glyphs.font
+    if not font:
+        Glyphs.showNotification("Demo version generation", "Error! Open the source file before running the script.")
+        return
+    if profile is None:
+        profile = profile_with_options(DEFAULT_PROFILE, apply_trial_trap, notdef_mode, selected_prefix)
+
+    trialFont = DemoSource(font, [profile]).trial_font(profile, cache)
+
+# OPEN NEW FILE
+    if open_in_glyphs:
+        Glyphs.fonts.append(trialFont)
+    
+    return trialFont
+
+def make_trial_fonts(profiles, open_in_glyphs=True, font=None, cache=None):
+    """Builds a demo font per profile from one analysis of the source; returns them in order."""
+    if font is None:
+        font = Glyphs.font
+    if not font:
+        Glyphs.showNotification("Demo version generation", "Error! Open the source file before running the script.")
+        return
+    source = DemoSource(font, profiles)
+    trialFonts = [source.trial_font(profile, cache) for profile in profiles]
+    if open_in_glyphs:
+        for trialFont in trialFonts:
+            Glyphs.fonts.append(trialFont)
+    return trialFonts
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# On-disk cache of finished demo glyphs. Entries are addressed by a hash of
+# the source glyph (and whatever else its demo result depends on) plus the
+# demo options, so a rebuild only runs the pipeline for glyphs that changed.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from serebrotype.glyphsapi import GSPath, GSNode, GSComponent, GSAnchor, GSGuide, GSHint
+from serebrotype.outlinecache import layerContentHash
+
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    root = os.environ.get("SEREBROTYPE_CACHE_DIR")
+    if not root:
+        mac_caches = os.path.expanduser("~/Library/Caches")
+        if os.path.isdir(mac_caches):
+            root = os.path.join(mac_caches, "SerebroType")
+        else:
+            root = os.path.join(os.path.expanduser("~"), ".cache", "serebrotype")
+    return os.path.join(root, "demo-glyphs")
+
+def demo_options_key(selected_prefix, apply_trial_trap, notdef_mode, master_ids, trap_rules=()):
+    return repr((CACHE_VERSION, selected_prefix, bool(apply_trial_trap), int(notdef_mode), list(master_ids),
+                 [list(rule) for rule in trap_rules]))
+
+def layer_hash(layer):
+    """layerContentHash (outlines, components recursively) plus a hash of
+    everything else layer_data stores, such as anchors and hints.
+
+    None when the layer holds data the cache cannot store."""
+    try:
+        data = json.dumps(layer_data(layer), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return layerContentHash(layer) + hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+def glyph_layer_hashes(font, name, memo=None):
+    """(layerId, layer_hash) of every layer of glyph `name`, memoized in `memo`."""
+    if memo is not None and name in memo:
+        return memo[name]
+    glyph = font.glyphs[name]
+    hashes = None if glyph is None else [(layer.layerId, layer_hash(layer)) for layer in glyph.layers]
+    if memo is not None:
+        memo[name] = hashes
+    return hashes
+
+def demo_glyph_key(font, name, options_key, kept_refs=(), removed_refs=(), partners=(), hashes=None):
+    """Hash of everything the demo version of glyph `name` is made from.
+
+    kept_refs/removed_refs are the glyphs its components point at, split by
+    whether they survive (removed ones get decomposed); partners are the
+    glyphs a trap rule takes content from. `hashes` is an optional memo for
+    glyph_layer_hashes, shared when keys are made for several demos.
+    Returns None when one of the layers cannot be cached."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(options_key.encode())
+    for glyph_name in [name] + sorted(partners):
+        h.update(("G %s;" % glyph_name).encode())
+        for layer_id, layer_hash in glyph_layer_hashes(font, glyph_name, hashes) or ():
+            if layer_hash is None:
+                return None
+            h.update(("L %s %s;" % (layer_id, layer_hash)).encode())
+    h.update(("K %s;" % " ".join(sorted(kept_refs))).encode())
+    h.update(("R %s;" % " ".join(sorted(removed_refs))).encode())
+    return h.hexdigest()
+
+# SERIALIZE LAYERS
+# Layers are stored as JSON. Values that have no JSON form raise TypeError,
+# which keeps the glyph out of the cache rather than storing it incomplete.
+COMPONENT_ATTRIBUTES = ["alignment", "anchor"]
+HINT_ATTRIBUTES = ["type", "name", "horizontal", "stem", "options"]
+HINT_NODES = ["originNode", "targetNode", "otherNode1", "otherNode2"]
+
+def _plain(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "keys"):
+        return {str(key): _plain(value[key]) for key in value.keys()}
+    if hasattr(value, "__iter__") and not isinstance(value, (bytes, bytearray)):
+        return [_plain(item) for item in value]
+    raise TypeError("cannot cache a %s" % type(value).__name__)
+
+def _point(point):
+    return [float(point.x), float(point.y)]
+
+def _node_index(layer, node):
+    if node is None:
+        return None
+    for i, shape in enumerate(layer.shapes):
+        for j, other in enumerate(getattr(shape, "nodes", None) or ()):
+            if other == node:
+                return [i, j]
+    raise TypeError("hint node is not on its layer")
+
+def _shape_data(shape):
+    nodes = getattr(shape, "nodes", None)
+    if nodes is not None:
+        node_data = []
+        for node in nodes:
+            item = [node.x, node.y, node.type, bool(getattr(node, "smooth", False))]
+            if getattr(node, "name", None):
+                item.append(node.name)
+            node_data.append(item)
+        return {"closed": bool(shape.closed), "nodes": node_data}
+    data = {"component": shape.componentName, "transform": list(shape.transform)}
+    for attr in COMPONENT_ATTRIBUTES:
+        if getattr(shape, attr, None) is not None:
+            data[attr] = _plain(getattr(shape, attr))
+    values = getattr(shape, "smartComponentValues", None)
+    if values:
+        data["smartComponentValues"] = _plain(values)
+    return data
+
+def _shape_from_data(data):
+    if "component" in data:
+        component = GSComponent(data["component"])
+        component.transform = tuple(data["transform"])
+        for attr in COMPONENT_ATTRIBUTES:
+            if attr in data:
+                setattr(component, attr, data[attr])
+        for key, value in data.get("smartComponentValues", {}).items():
+            component.smartComponentValues[key] = value
+        return component
+    path = GSPath()
+    path.closed = data["closed"]
+    for item in data["nodes"]:
+        x, y, node_type, smooth = item[:4]
+        node = GSNode((x, y), type=node_type)
+        if smooth:
+            node.smooth = True
+        if len(item) > 4:
+            node.name = item[4]
+        path.nodes.append(node)
+    return path
+
+def _anchors_data(layer):
+    return [[anchor.name] + _point(anchor.position) for anchor in getattr(layer, "anchors", None) or ()]
+
+def _hint_data(layer, hint):
+    data = {attr: _plain(getattr(hint, attr, None)) for attr in HINT_ATTRIBUTES}
+    for attr in HINT_NODES:
+        data[attr] = _node_index(layer, getattr(hint, attr, None))
+    scale = getattr(hint, "scale", None)
+    if scale is not None:
+        data["scale"] = _point(scale)
+    return data
+
+def _hint_from_data(layer, data):
+    hint = GSHint()
+    for attr in HINT_ATTRIBUTES:
+        if data.get(attr) is not None:
+            setattr(hint, attr, data[attr])
+    for attr in HINT_NODES:
+        index = data.get(attr)
+        if index is not None:
+            setattr(hint, attr, layer.shapes[index[0]].nodes[index[1]])
+    if "scale" in data:
+        hint.scale = tuple(data["scale"])
+    return hint
+
+def layer_data(layer):
+    data = {
+        "width": layer.width,
+        "leftMetricsKey": layer.leftMetricsKey,
+        "rightMetricsKey": layer.rightMetricsKey,
+        "shapes": [_shape_data(shape) for shape in layer.shapes],
+        "anchors": _anchors_data(layer),
+        "guides": [_point(guide.position) + [float(guide.angle), guide.name]
+                   for guide in getattr(layer, "guides", None) or ()],
+        "hints": [_hint_data(layer, hint) for hint in getattr(layer, "hints", None) or ()],
+        "userData": _plain(getattr(layer, "userData", None) or {}),
+    }
+    background = getattr(layer, "background", None)
+    if background is not None and (background.shapes or getattr(background, "anchors", None)):
+        data["background"] = {
+            "shapes": [_shape_data(shape) for shape in background.shapes],
+            "anchors": _anchors_data(background),
+        }
+    return data
+
+def _restore_user_data(layer, data):
+    user_data = layer.userData
+    for key in list(user_data.keys()):
+        if key not in data:
+            del user_data[key]
+    for key, value in data.items():
+        user_data[key] = value
+
+def restore_glyph(glyph, entry):
+    layers = entry["layers"]
+    for layer in glyph.layers:
+        data = layers.get(layer.layerId)
+        if data is None:
+            continue
+        layer.shapes = [_shape_from_data(shape) for shape in data["shapes"]]
+        layer.width = data["width"]
+        layer.leftMetricsKey = data["leftMetricsKey"]
+        layer.rightMetricsKey = data["rightMetricsKey"]
+        layer.anchors = [GSAnchor(name, (x, y)) for name, x, y in data["anchors"]]
+        guides = []
+        for x, y, angle, name in data["guides"]:
+            guide = GSGuide()
+            guide.position = (x, y)
+            guide.angle = angle
+            guide.name = name
+            guides.append(guide)
+        layer.guides = guides
+        layer.hints = [_hint_from_data(layer, hint) for hint in data["hints"]]
+        _restore_user_data(layer, data["userData"])
+        background = data.get("background")
+        if background is not None or layer.background.shapes:
+            background = background or {"shapes": [], "anchors": []}
+            layer.background.shapes = [_shape_from_data(shape) for shape in background["shapes"]]
+            layer.background.anchors = [GSAnchor(name, (x, y)) for name, x, y in background["anchors"]]
+
+# CACHE
+class DemoGlyphCache(object):
+    """Content-addressed store of demo glyph layers, one JSON file per key."""
+
+    def __init__(self, path=None):
+        self.path = path or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            entry = None
+        if entry is None or entry.get("version") != CACHE_VERSION:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, glyph):
+        """Stores the layers of `glyph`; returns False if they cannot be stored."""
+        try:
+            text = json.dumps({
+                "version": CACHE_VERSION,
+                "layers": {layer.layerId: layer_data(layer) for layer in glyph.layers},
+            }, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return False
+        folder = os.path.dirname(self._file(key))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(tmp, self._file(key))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return True
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Y-bucketed edge table over the monotone edges of an Outline.
+#
+# The y range of the outline is cut into equal buckets and every edge is
+# listed in each bucket its y extent touches, so a scanline only looks at
+# the edges of one bucket instead of the whole outline. The table depends
+# on the outline alone and serves any bar count, gap or band layout.
+
+MAX_BUCKETS = 4096
+EDGES_PER_BUCKET = 2
+
+
+class EdgeIndex(object):
+    """Edges of ``(yMin, yMax, direction, piece)`` tuples bucketed by y."""
+
+    def __init__(self, edges, bucketCount=None):
+        self.edges = edges
+        if not edges:
+            self.yMin, self.yMax, self.step = 0.0, 0.0, 1.0
+            self.buckets = []
+            return
+        self.yMin = min(e[0] for e in edges)
+        self.yMax = max(e[1] for e in edges)
+        if bucketCount is None:
+            bucketCount = min(MAX_BUCKETS, max(1, len(edges) // EDGES_PER_BUCKET))
+        self.step = (self.yMax - self.yMin) / bucketCount or 1.0
+        self.buckets = [[] for _ in range(bucketCount)]
+        for i, (e0, e1, _, _) in enumerate(edges):
+            for b in range(self._bucket(e0), self._bucket(e1) + 1):
+                self.buckets[b].append(i)
+
+    def __len__(self):
+        return len(self.edges)
+
+    def _bucket(self, y):
+        b = int((y - self.yMin) / self.step)
+        return min(max(b, 0), len(self.buckets) - 1)
+
+    def candidatesAtY(self, y):
+        """Indexes of the edges listed for ``y``; a superset of the crossings."""
+        if not self.buckets or not self.yMin <= y < self.yMax:
+            return ()
+        return self.buckets[self._bucket(y)]
+
+    def edgesAtY(self, y):
+        """Edges crossing the line at ``y``, on the half-open ``yMin <= y < yMax``."""
+        edges = self.edges
+        return [edges[i] for i in self.candidatesAtY(y) if edges[i][0] <= y < edges[i][1]]
+
+    def edgesInRange(self, y0, y1):
+        """Edges whose y extent overlaps ``[y0, y1]``, in outline order."""
+        if not self.buckets or y1 < self.yMin or y0 > self.yMax:
+            return []
+        found = set()
+        for b in range(self._bucket(y0), self._bucket(y1) + 1):
+            found.update(self.buckets[b])
+        edges = self.edges
+        return [edges[i] for i in sorted(found) if edges[i][0] <= y1 and y0 <= edges[i][1]]
+
+
+def edgeIndexFor(outline):
+    """The ``EdgeIndex`` of ``outline``, built on first use and kept with it."""
+    index = outline.derived.get("edgeIndex")
+    if index is None:
+        index = EdgeIndex(outline.edges)
+        outline.derived["edgeIndex"] = index
+    return index
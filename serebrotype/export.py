@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+# Instance export for "Export selected instanses", without the UI.
+from __future__ import annotations
+
+import hashlib, inspect, json, os, shutil, tempfile, threading, time, re
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+
+from serebrotype.glyphsapi import GSFont
+from serebrotype.interpolation import InterpolationCache, font_content_hash, instance_key
+
+# ---------- helpers ----------
+def sanitize_filename(name: str) -> str:
+    for bad in r'\/:*?"<>|':
+        name = name.replace(bad, "-")
+    return name.strip()
+
+def ensure_dir(path: str):
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+# ---------- Glyphs access ----------
+# Glyphs makes no promise that GSFont and GSInstance objects can be used
+# from several threads at once, and the TTF, OTF and .glyphs jobs of one
+# instance share one interpolated font. Every call that reads or changes a
+# Glyphs object (hashing, interpolatedFont, save, generate) holds this
+# lock, so that work runs one call at a time off the UI thread; the pools
+# below only overlap the file handling and bookkeeping around it.
+glyphs_lock = threading.RLock()
+
+# ---------- generate() calling convention ----------
+# Glyphs versions spell the generate() arguments differently. The signature
+# is probed once per instance class and reused, so an export is one call.
+GENERATE_ALIASES = dict(
+    format=("format", "Format"),
+    path=("fontPath", "FontPath", "path"),
+    autohint=("autoHint", "AutoHint"),
+    remove_overlap=("removeOverlap", "RemoveOverlap"),
+    production_names=("useProductionNames", "UseProductionNames"),
+)
+# Used when the signature cannot tell (e.g. generate(**kwargs)).
+DEFAULT_GENERATE_NAMES = dict(
+    format="format", path="FontPath", autohint="AutoHint",
+    remove_overlap="RemoveOverlap", production_names="UseProductionNames",
+)
+
+GenerateConvention = namedtuple("GenerateConvention", "pass_font names")
+
+_conventions = {}
+
+def probe_generate(generate) -> GenerateConvention:
+    try:
+        params = inspect.signature(generate).parameters
+    except (TypeError, ValueError):
+        return GenerateConvention(False, dict(DEFAULT_GENERATE_NAMES))
+    accepts_any = any(p.kind == p.VAR_KEYWORD for p in params.values())
+    positional = [p.name for p in params.values()
+                  if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    names = {}
+    for key, aliases in GENERATE_ALIASES.items():
+        found = [alias for alias in aliases if alias in params]
+        if found:
+            names[key] = found[0]
+        elif accepts_any:
+            names[key] = DEFAULT_GENERATE_NAMES[key]
+    pass_font = bool(positional) and positional[0].lower() == "font"
+    return GenerateConvention(pass_font, names)
+
+def generate_convention(instance) -> GenerateConvention:
+    cls = type(instance)
+    if cls not in _conventions:
+        _conventions[cls] = probe_generate(instance.generate)
+    return _conventions[cls]
+
+def generate_arguments(instance, font, fmt, path, flags):
+    """(args, kwargs) for instance.generate in the probed convention;
+    flags the signature does not know are left at their defaults."""
+    convention = generate_convention(instance)
+    values = dict(flags, format=fmt, path=path)
+    kw = {convention.names[key]: value for key, value in values.items() if key in convention.names}
+    return ((font,) if convention.pass_font else ()), kw
+
+def instance_stem(font, instance) -> str:
+    family_raw = font.familyName or "Untitled"
+    base_name = re.sub(r"\s*\(.*?\)", "", family_raw).strip()
+    style = instance.name or instance.styleName or "Regular"
+    return f"{base_name}-{style}".replace(" ", "")
+
+def export_instance(font, instance, dest_folder, fmt,
+                    remove_overlap=True, autohint=True, production_names=True,
+                    stem=None) -> str:
+    fmt = fmt.upper()
+    if fmt not in {"TTF", "OTF"}:
+        raise ValueError("Unsupported format: %s" % fmt)
+
+    stem = stem or instance_stem(font, instance)
+    ext = fmt.lower()
+
+    ensure_dir(dest_folder)
+    full_path = os.path.join(dest_folder, f"{stem}.{ext}")
+
+    # Glyphs writes into a private folder next to the destination, so the
+    # output is the only file there and can be moved into place atomically.
+    work_dir = tempfile.mkdtemp(prefix=".export-", dir=dest_folder)
+    try:
+        with glyphs_lock:
+            args, kw = generate_arguments(instance, font, fmt, os.path.join(work_dir, f"{stem}.{ext}"), dict(
+                autohint=bool(autohint),
+                remove_overlap=bool(remove_overlap),
+                production_names=bool(production_names),
+            ))
+            try:
+                instance.generate(*args, **kw)
+            except Exception as e:
+                raise RuntimeError(f"Export failed for {fmt}: {e}") from e
+
+        # Only files count: generate() treats a path it cannot use as a
+        # file name as a folder, and a folder must not be moved into place.
+        written = [fn for fn in os.listdir(work_dir)
+                   if fn.lower().endswith("." + ext) and os.path.isfile(os.path.join(work_dir, fn))]
+        if len(written) != 1:
+            raise RuntimeError(f"Export failed for {fmt}: expected one .{ext} file, got {len(written)}")
+        os.replace(os.path.join(work_dir, written[0]), full_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return full_path
+
+# ---------- parallel export ----------
+ExportResult = namedtuple("ExportResult", "instance path seconds error kind skipped", defaults=(None, False))
+
+def _timed_export(font, instance, dest_folder, fmt, stem, options):
+    t0 = time.perf_counter()
+    try:
+        with glyphs_lock:
+            stem = stem or instance_stem(font, instance)
+            interp = interpolate_instance(font, instance)
+            plain = binary_instance(interp, instance)
+        path = export_instance(interp, plain, dest_folder, fmt, stem=stem, **options)
+        return ExportResult(instance, path, time.perf_counter() - t0, None)
+    except Exception as e:
+        return ExportResult(instance, None, time.perf_counter() - t0, e)
+
+def export_instances(font, instances, dest_folder, fmt, stem_for=None, workers=None, **options):
+    """Exports every instance on a thread pool and yields an ExportResult
+    for each one as soon as it is done; failures are reported, not raised.
+
+    Each instance is interpolated once and its single-master font compiled,
+    as in export_session; the Glyphs calls take turns under glyphs_lock."""
+    instances = list(instances)
+    if not instances:
+        return
+    ensure_dir(dest_folder)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(instances)))
+    with glyphs_lock:
+        stems = [stem_for(instance) if stem_for else None for instance in instances]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_timed_export, font, instance, dest_folder, fmt, stem, options)
+            for instance, stem in zip(instances, stems)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+def interpolate_instance(font, instance):
+    interp = instance.interpolatedFont
+    if not isinstance(interp, GSFont):
+        raise RuntimeError("interpolatedFont failed")
+    fam = font.familyName or "Untitled"
+    sty = instance.name or instance.styleName or "Regular"
+    interp.familyName = fam
+    if interp.masters and len(interp.masters) == 1:
+        interp.masters[0].name = sty
+    return interp
+
+def source_file_name(font, instance) -> str:
+    fam = font.familyName or "Untitled"
+    sty = instance.name or instance.styleName or "Regular"
+    return f"{sanitize_filename(fam)}-{sanitize_filename(sty)}.glyphs"
+
+def save_source_glyphs(interp, font, instance, dest_folder) -> str:
+    with glyphs_lock:
+        path = os.path.join(dest_folder, source_file_name(font, instance))
+        interp.save(path)
+    return path
+
+def generate_source_glyphs(font, instance, dest_folder) -> str:
+    with glyphs_lock:
+        interp = interpolate_instance(font, instance)
+    return save_source_glyphs(interp, font, instance, dest_folder)
+
+# ---------- export session ----------
+# Instance parameters interpolatedFont has already applied to the glyphs,
+# features and classes; generate() must not apply them a second time.
+APPLIED_PARAMETERS = frozenset([
+    "Filter", "PreFilter", "Rename Glyphs", "Remove Glyphs", "Keep Glyphs", "Decompose Glyphs",
+    "Reencode Glyphs", "Import Font",
+    "Add Class", "Add Feature", "Add Prefix", "Replace Class", "Replace Feature", "Replace Prefix",
+    "Remove Classes", "Remove Features", "Remove Prefixes", "Rename Features", "Update Features",
+])
+
+def strip_applied_parameters(instance):
+    params = instance.customParameters
+    for name in [getattr(param, "name", param) for param in list(params)]:
+        if name in APPLIED_PARAMETERS and params[name] is not None:
+            del params[name]
+
+def binary_instance(interp, instance):
+    # interpolatedFont holds a single master and, in Glyphs, the instance
+    # it was made from. That instance compiles the master as is once the
+    # parameters already applied are gone. When the font has none, a copy
+    # of the real one goes on it, placed on the master: weight and width
+    # class, style linking, the other custom parameters and localized
+    # names all end up in OS/2 and name.
+    name = instance.name or instance.styleName or "Regular"
+    plain = next((candidate for candidate in interp.instances if candidate.name == name), None)
+    if plain is None:
+        plain = instance.copy()
+        plain.name = name
+        if interp.masters:
+            plain.axes = list(getattr(interp.masters[0], "axes", None) or ())
+        interp.instances.append(plain)
+    strip_applied_parameters(plain)
+    return plain
+
+def _interpolate_job(font, instance, cache, content_hash):
+    # The compile instance is made with the interpolation and cached with
+    # it, so jobs sharing a cached font never set it up twice.
+    def build():
+        interp = interpolate_instance(font, instance)
+        return interp, binary_instance(interp, instance)
+
+    with glyphs_lock:
+        key = instance_key(instance, content_hash)
+        return cache.get_or_build(key, build)
+
+def _timed_output(kind, instance, job):
+    t0 = time.perf_counter()
+    try:
+        return ExportResult(instance, job(), time.perf_counter() - t0, None, kind)
+    except Exception as e:
+        return ExportResult(instance, None, time.perf_counter() - t0, e, kind)
+
+# ---------- build manifest ----------
+# The destination keeps a record of what each output was built from, so an
+# export can skip files that are still current.
+MANIFEST_NAME = ".serebrotype-export.json"
+MANIFEST_VERSION = 1
+
+def load_manifest(dest_folder) -> dict:
+    try:
+        with open(os.path.join(dest_folder, MANIFEST_NAME), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("outputs", {})
+
+def save_manifest(dest_folder, outputs):
+    fd, tmp = tempfile.mkstemp(prefix=".manifest-", dir=dest_folder)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(dict(version=MANIFEST_VERSION, outputs=outputs), fh, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(dest_folder, MANIFEST_NAME))
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def output_file_name(font, instance, kind) -> str:
+    if kind == "glyphs":
+        return source_file_name(font, instance)
+    return f"{instance_stem(font, instance)}.{kind.lower()}"
+
+def output_key(instance, content_hash, kind, options) -> str:
+    flags = sorted(options.items()) if kind != "glyphs" else []
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((instance_key(instance, content_hash), kind, flags)).encode())
+    return h.hexdigest()
+
+# ---------- export session ----------
+def export_session(font, instances, dest_folder, formats=(), source=False,
+                   workers=None, max_pending=None, should_cancel=None, cache=None,
+                   force=False, **options):
+    """Pipelined export over a thread pool.
+
+    Outputs whose manifest entry still matches the font content (see
+    font_content_hash), the instance and the export flags are skipped
+    unless force is set. Each instance with stale outputs is interpolated
+    once; its .glyphs source and binaries are then written from that
+    interpolation. At most max_pending interpolated fonts are held at a
+    time, and none once the session ends. Passing
+    cache=shared_interpolation_cache keeps them across exports instead,
+    so a later export of an unchanged instance skips interpolation, at the
+    cost of holding up to that cache's max_entries fonts in memory. Calls
+    into Glyphs run one at a time under glyphs_lock.
+
+    Yields an ExportResult per output (kind is "glyphs" or the format) as
+    it finishes, skipped ones included. Once should_cancel() returns true
+    nothing new is started and the generator stops after the running
+    steps."""
+    kinds = (["glyphs"] if source else []) + [fmt.upper() for fmt in formats]
+    instances = list(instances)
+    if not kinds or not instances:
+        return
+    ensure_dir(dest_folder)
+    workers = max(1, workers or os.cpu_count() or 1)
+    max_pending = max(1, max_pending or workers)
+    if cache is None:
+        cache = InterpolationCache(max_entries=max_pending)
+    with glyphs_lock:
+        content_hash = font_content_hash(font)
+    manifest = load_manifest(dest_folder)
+    manifest_dirty = False
+
+    todo = iter(instances)
+    running = {}
+    outputs_left = {}
+    in_flight = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def fill():
+            # Starts instances with stale outputs up to max_pending and
+            # yields the current outputs it passes on the way.
+            nonlocal in_flight
+            while in_flight < max_pending:
+                instance = next(todo, None)
+                if instance is None:
+                    return
+                stale = {}
+                current = []
+                with glyphs_lock:
+                    for kind in kinds:
+                        name = output_file_name(font, instance, kind)
+                        key = output_key(instance, content_hash, kind, options)
+                        path = os.path.join(dest_folder, name)
+                        if force or manifest.get(name) != key or not os.path.exists(path):
+                            stale[kind] = (name, key)
+                        else:
+                            current.append(ExportResult(instance, path, 0.0, None, kind, True))
+                yield from current
+                if stale:
+                    job = pool.submit(_interpolate_job, font, instance, cache, content_hash)
+                    running[job] = (None, instance, stale)
+                    in_flight += 1
+
+        try:
+            yield from fill()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                cancelled = bool(should_cancel and should_cancel())
+                for future in done:
+                    kind, instance, info = running.pop(future)
+                    if kind is not None:
+                        result = future.result()
+                        if result.error is None:
+                            name, key = info
+                            manifest[name] = key
+                            manifest_dirty = True
+                        yield result
+                        outputs_left[id(instance)] -= 1
+                        if not outputs_left[id(instance)]:
+                            del outputs_left[id(instance)]
+                            in_flight -= 1
+                        continue
+
+                    try:
+                        interp, plain = future.result()
+                    except Exception as e:
+                        in_flight -= 1
+                        for kind in info:
+                            yield ExportResult(instance, None, 0.0, e, kind)
+                        continue
+                    if cancelled:
+                        in_flight -= 1
+                        continue
+                    outputs_left[id(instance)] = len(info)
+                    with glyphs_lock:
+                        stem = instance_stem(font, instance)
+                    for kind, entry in info.items():
+                        if kind == "glyphs":
+                            job = partial(save_source_glyphs, interp, font, instance, dest_folder)
+                        else:
+                            job = partial(export_instance, interp, plain, dest_folder, kind,
+                                          stem=stem, **options)
+                        running[pool.submit(_timed_output, kind, instance, job)] = (kind, instance, entry)
+
+                if cancelled:
+                    for future in list(running):
+                        if future.cancel():
+                            del running[future]
+                    continue
+                yield from fill()
+        finally:
+            if manifest_dirty:
+                save_manifest(dest_folder, manifest)
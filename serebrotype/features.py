@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+# Pruning of OpenType feature code to the glyphs that survive in a subset
+# font. Code is tokenized once and checked against a frozenset of glyph
+# names: rules that mention a missing glyph or an emptied class are
+# dropped, and so are lookups and features left without rules.
+
+import re
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>\#[^\n]*)
+  | (?P<string>"[^"]*")
+  | (?P<angle><[^>]*>)
+  | (?P<punct>[{}\[\];,=])
+  | (?P<word>[^\s{}\[\];,=<>"\#]+)
+""", re.X)
+
+RULE_KEYWORDS = frozenset([
+    "sub", "substitute", "rsub", "reversesub", "pos", "position",
+    "enum", "enumerate", "ignore",
+])
+SUB_KEYWORDS = frozenset(["sub", "substitute", "rsub", "reversesub"])
+# Words inside rules that are never glyph names. Anchors, value records and
+# contour points are single "<...>" tokens and need no entry here.
+RULE_WORDS = RULE_KEYWORDS | frozenset([
+    "by", "from", "lookup", "NULL", "anchor", "mark", "markClass", "base", "ligature",
+    "ligComponent", "cursive", "device", "contourpoint", "'",
+])
+FILTER_FLAGS = frozenset(["MarkAttachmentType", "UseMarkFilteringSet"])
+# GDEF statements that list glyphs after their keyword.
+GDEF_GLYPH_STATEMENTS = frozenset(["Attach", "LigatureCaretByPos", "LigatureCaretByIndex"])
+_NUMBER_RE = re.compile(r"-?\d+(\.\d+)?$")
+
+
+def tokenize(code):
+    return [(m.lastgroup, m.group()) for m in TOKEN_RE.finditer(code)]
+
+# PARSE
+# A parsed body is a list of items: ("stmt", tokens) for everything up to a
+# ";" and ("block", head, body, tail) for "head { body } tail;".
+def _parse(tokens, i=0, nested=False):
+    items = []
+    current = []
+    n = len(tokens)
+    while i < n:
+        kind, text = tokens[i]
+        if kind == "punct" and text == ";":
+            current.append(tokens[i])
+            items.append(("stmt", current))
+            current = []
+        elif kind == "punct" and text == "{":
+            head = current + [tokens[i]]
+            body, i = _parse(tokens, i + 1, nested=True)
+            tail = []
+            i += 1
+            while i < n:
+                tail.append(tokens[i])
+                if tokens[i] == ("punct", ";"):
+                    break
+                i += 1
+            items.append(("block", head, body, tail))
+            current = []
+        elif kind == "punct" and text == "}" and nested:
+            if current:
+                items.append(("stmt", current))
+            return items, i
+        else:
+            current.append(tokens[i])
+        i += 1
+    if current:
+        items.append(("stmt", current))
+    return items, i
+
+def _statements(items):
+    for item in items:
+        if item[0] == "stmt":
+            yield item[1]
+        else:
+            for tokens in _statements(item[2]):
+                yield tokens
+
+def _feature_reference(tokens):
+    """The tag of a "feature tag;" reference, as in aalt, else None."""
+    words = _words(tokens)
+    if len(words) == 3 and words[0] == "feature" and words[2] == ";":
+        return words[1]
+    return None
+
+def _refers_to_features(item):
+    return item[0] == "block" and any(_feature_reference(tokens) for tokens in _statements(item[2]))
+
+def _words(tokens):
+    return [text for kind, text in tokens if kind not in ("space", "comment")]
+
+def _text(tokens):
+    return "".join(text for _, text in tokens)
+
+# RANGES
+def _range_ends(first, last):
+    # "a.sc-c.sc" or "A01-A10": the names differ in one letter or one number.
+    if not first or not last:
+        return False
+    p = 0
+    while p < min(len(first), len(last)) and first[p] == last[p]:
+        p += 1
+    s = 0
+    while s < min(len(first), len(last)) - p and first[-1 - s] == last[-1 - s]:
+        s += 1
+    a, b = first[p:len(first) - s], last[p:len(last) - s]
+    if len(a) == len(b) == 1 and a.isalpha() and b.isalpha():
+        return True
+    return a.isdigit() and b.isdigit()
+
+def _is_range(word, state):
+    """True for an unspaced glyph range such as "a-z" that is not itself a glyph."""
+    if "-" not in word or state.has_glyph(word):
+        return False
+    return any(_range_ends(word[:i], word[i + 1:]) for i, c in enumerate(word) if c == "-")
+
+def _opaque(tokens, state):
+    """True for statements with glyph ranges or Glyphs "$[...]" predicates.
+
+    Their glyphs cannot be listed without the full font, so they are left
+    as they are."""
+    in_group = False
+    for kind, text in tokens:
+        if kind == "word" and text.startswith("$"):
+            return True
+        if kind == "punct" and text in "[]":
+            in_group = text == "["
+        elif in_group and kind == "word" and (text == "-" or _is_range(text, state)):
+            return True
+    return False
+
+# PRUNE
+class _State(object):
+    def __init__(self, glyphs, empty_classes=()):
+        self.glyphs = glyphs
+        self.empty_classes = set(empty_classes)
+        self.dropped_lookups = set()
+        self.live_mark_classes = set()
+        # Feature tags seen so far, by whether one of their blocks survived.
+        self.live_features = set()
+        self.dropped_features = set()
+        # Keep masks of classes and inline groups that substitutions map
+        # by position, keyed by "@name" or the tuple of group members.
+        self.masks = {}
+
+    def has_glyph(self, word):
+        if word.startswith("@"):
+            return word not in self.empty_classes
+        if word.startswith("\\"):
+            word = word[1:]
+        return word in self.glyphs
+
+    def _slots(self, tokens):
+        # Words of a statement with each "[...]" group as a tuple of members.
+        slots = []
+        group = None
+        for kind, text in tokens:
+            if kind in ("space", "comment"):
+                continue
+            if (kind, text) == ("punct", "["):
+                group = []
+            elif (kind, text) == ("punct", "]") and group is not None:
+                slots.append(tuple(group))
+                group = None
+            elif group is not None:
+                group.append(text)
+            else:
+                slots.append(text)
+        return slots
+
+    def pair_classes(self, codes):
+        """Links the classes and groups that "sub X by Y;" maps by position.
+
+        Each linked set shares one mask that keeps a position only if every
+        member has its glyph there, so both sides keep equal lengths."""
+        members = {}
+        pairs = []
+        for code in codes:
+            for tokens in _statements(_parse(tokenize(code))[0]):
+                if _opaque(tokens, self):
+                    continue
+                slots = self._slots(tokens)
+                if len(slots) == 4 and slots[1] == "=" and isinstance(slots[2], tuple) and slots[0].startswith("@"):
+                    members[slots[0]] = slots[2]
+                elif len(slots) == 5 and slots[0] in SUB_KEYWORDS and slots[2] == "by":
+                    pairs.append((slots[1], slots[3]))
+
+        parent = {}
+        def root(node):
+            while parent[node] != node:
+                node = parent[node]
+            return node
+        for a, b in pairs:
+            for node in (a, b):
+                if isinstance(node, tuple):
+                    members[node] = node
+            sides = [members.get(a), members.get(b)]
+            if None in sides or len(sides[0]) != len(sides[1]) or any(
+                    m.startswith("@") for side in sides for m in side):
+                continue
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            parent[root(a)] = root(b)
+
+        linked = {}
+        for node in parent:
+            linked.setdefault(root(node), []).append(node)
+        for nodes in linked.values():
+            size = len(members[nodes[0]])
+            mask = [all(self.has_glyph(members[node][i]) for node in nodes) for i in range(size)]
+            for node in nodes:
+                self.masks[node] = mask
+
+    def feature_pruned(self, tag, kept):
+        if kept:
+            self.live_features.add(tag)
+            self.dropped_features.discard(tag)
+        elif tag not in self.live_features:
+            self.dropped_features.add(tag)
+
+    def keep(self, members, mask=None):
+        if mask is None or len(mask) != len(members):
+            return [word for word in members if self.has_glyph(word)]
+        return [word for word, kept in zip(members, mask) if kept]
+
+def _prune_rule(tokens, state, mask=None):
+    """`mask` is the keep mask of the class a definition's group belongs to."""
+    if _opaque(tokens, state):
+        return tokens
+    out = []
+    groups = []
+    i = 0
+    n = len(tokens)
+    after_lookup = False
+    while i < n:
+        kind, text = tokens[i]
+        if kind == "punct" and text == "[":
+            j = i + 1
+            members = []
+            while j < n and tokens[j] != ("punct", "]"):
+                if tokens[j][0] == "word":
+                    members.append(tokens[j][1])
+                j += 1
+            groups.append((len(out), members))
+            out.append(None)  # filled in below
+            i = j + 1
+            continue
+        if kind == "word":
+            word = text[:-1] if text.endswith("'") and len(text) > 1 else text
+            if after_lookup:
+                if word in state.dropped_lookups:
+                    return None
+                after_lookup = False
+            elif word == "lookup":
+                after_lookup = True
+            elif word not in RULE_WORDS and not _NUMBER_RE.match(word) and not state.has_glyph(word):
+                return None
+        out.append(tokens[i])
+        i += 1
+
+    for index, members in groups:
+        kept = state.keep(members, mask if mask is not None else state.masks.get(tuple(members)))
+        if not kept:
+            return None
+        out[index] = ("word", "[" + " ".join(kept) + "]")
+    return out
+
+def _prune_lookupflag(tokens, state):
+    # A filter class that lost its glyphs is no longer defined, so the flag
+    # naming it goes too.
+    out = []
+    for kind, text in tokens:
+        if kind == "word" and text.startswith("@") and not state.has_glyph(text):
+            while out and out[-1][0] == "space":
+                out.pop()
+            if out and out[-1][1] in FILTER_FLAGS:
+                out.pop()
+            continue
+        out.append((kind, text))
+    if _words(out) == ["lookupflag", ";"]:
+        lead = tokens[0][1] if tokens[0][0] == "space" else ""
+        return [("space", lead), ("word", "lookupflag"), ("space", " "), ("word", "0"), ("punct", ";")]
+    return out
+
+def _prune_stmt(tokens, state):
+    """Returns (tokens or None, is_rule)."""
+    words = _words(tokens)
+    if not words:
+        return tokens, False
+    first = words[0]
+    if first.startswith("@") and len(words) > 1 and words[1] == "=":
+        pruned = _prune_rule(tokens, state, state.masks.get(first))
+        if pruned is None:
+            state.empty_classes.add(first)
+        return pruned, False
+    if first == "markClass":
+        # Several markClass statements can feed one class; it is empty
+        # only if none of them survives.
+        name = words[-2]
+        state.empty_classes.discard(name)
+        pruned = _prune_rule(tokens, state)
+        if pruned is not None:
+            state.live_mark_classes.add(name)
+        elif name not in state.live_mark_classes:
+            state.empty_classes.add(name)
+        return pruned, False
+    if first in RULE_KEYWORDS:
+        pruned = _prune_rule(tokens, state)
+        return pruned, pruned is not None
+    if first == "lookupflag":
+        return _prune_lookupflag(tokens, state), False
+    if first == "lookup" and len(words) == 3:
+        if words[1] in state.dropped_lookups:
+            return None, False
+        return tokens, True
+    if _feature_reference(tokens):
+        # A feature this code does not define is assumed to survive.
+        if words[1] in state.dropped_features:
+            return None, False
+        return tokens, True
+    return tokens, False
+
+def _prune_groups(tokens, state):
+    # GlyphClassDef: each class is pruned on its own; an emptied one is
+    # left out, which the syntax allows.
+    if _opaque(tokens, state):
+        return tokens
+    out = []
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        if (kind, text) == ("punct", "["):
+            j = i + 1
+            while j < len(tokens) and tokens[j] != ("punct", "]"):
+                j += 1
+            kept = state.keep([word for kind, word in tokens[i + 1:j] if kind == "word"])
+            if kept:
+                out.append(("word", "[" + " ".join(kept) + "]"))
+            i = j + 1
+            continue
+        if not (kind == "word" and text.startswith("@") and not state.has_glyph(text)):
+            out.append((kind, text))
+        i += 1
+    return out
+
+def _prune_gdef(items, state):
+    out = []
+    for item in items:
+        words = _words(item[1]) if item[0] == "stmt" else []
+        if words and words[0] == "GlyphClassDef":
+            item = ("stmt", _prune_groups(item[1], state))
+        elif words and words[0] in GDEF_GLYPH_STATEMENTS:
+            k = next(i for i, (kind, text) in enumerate(item[1]) if kind == "word")
+            rest = _prune_rule(item[1][k + 1:], state)
+            if rest is None:
+                continue
+            item = ("stmt", item[1][:k + 1] + rest)
+        out.append(item)
+    return out
+
+def _prune_item(item, state):
+    """Returns (item or None, has_rules)."""
+    if item[0] == "stmt":
+        tokens, is_rule = _prune_stmt(item[1], state)
+        return (None if tokens is None else ("stmt", tokens)), is_rule
+    _, head, body, tail = item
+    words = _words(head)
+    if words[:2] == ["table", "GDEF"]:
+        return ("block", head, _prune_gdef(body, state), tail), False
+    body, body_rules = _prune_items(body, state)
+    if words and words[0] == "feature" and len(words) > 1:
+        state.feature_pruned(words[1], body_rules)
+    if words and words[0] in ("lookup", "feature") and not body_rules:
+        if words[0] == "lookup" and len(words) > 1:
+            state.dropped_lookups.add(words[1])
+        return None, False
+    return ("block", head, body, tail), body_rules
+
+def _prune_items(items, state):
+    # Blocks that refer to features (aalt) go last, once the features they
+    # name are known to survive or not.
+    pruned = [None] * len(items)
+    has_rules = False
+    for i in sorted(range(len(items)), key=lambda i: _refers_to_features(items[i])):
+        pruned[i], is_rule = _prune_item(items[i], state)
+        has_rules = has_rules or is_rule
+    return [item for item in pruned if item is not None], has_rules
+
+def _render(items):
+    parts = []
+    for item in items:
+        if item[0] == "stmt":
+            parts.append(_text(item[1]))
+        else:
+            _, head, body, tail = item
+            parts.append(_text(head))
+            parts.append(_render(body))
+            parts.append("}")
+            parts.append(_text(tail))
+    return "".join(parts)
+
+def prune_code(code, glyphs, state=None):
+    """Prunes one piece of feature code; returns (code, has_rules)."""
+    if state is None:
+        state = _State(glyphs)
+        state.pair_classes([code])
+    items, _ = _parse(tokenize(code))
+    items, has_rules = _prune_items(items, state)
+    # A statement owns the whitespace before it, so dropping it leaves no gap.
+    code = _render(items)
+    return (code if code.strip() else ""), has_rules
+
+# GLYPHS FONT
+def prune_font_features(font, glyphs=None):
+    """Prunes classes, prefixes and features of a GSFont in place.
+
+    Classes are pruned first because prefixes and features refer to them,
+    prefixes before features because they may define lookups."""
+    if glyphs is None:
+        glyphs = frozenset(glyph.name for glyph in font.glyphs)
+    state = _State(glyphs)
+    state.pair_classes(
+        ["@%s = [%s];" % (gs_class.name, gs_class.code or "") for gs_class in font.classes]
+        + [prefix.code or "" for prefix in font.featurePrefixes]
+        + [feature.code or "" for feature in font.features]
+    )
+
+    classes = []
+    for gs_class in font.classes:
+        code = gs_class.code or ""
+        if _opaque([("punct", "[")] + tokenize(code), state):
+            classes.append(gs_class)
+            continue
+        names = state.keep(code.split(), state.masks.get("@" + gs_class.name))
+        if names:
+            gs_class.code = " ".join(names)
+            classes.append(gs_class)
+        else:
+            state.empty_classes.add("@" + gs_class.name)
+    font.classes = classes
+
+    prefixes = []
+    for prefix in font.featurePrefixes:
+        code, _ = prune_code(prefix.code or "", glyphs, state)
+        if code:
+            prefix.code = code
+            prefixes.append(prefix)
+    font.featurePrefixes = prefixes
+
+    # As in code, features that refer to other features (aalt) go last.
+    kept = {}
+    for feature in sorted(font.features, key=lambda f: any(
+            _feature_reference(tokens) for tokens in _statements(_parse(tokenize(f.code or ""))[0]))):
+        code, has_rules = prune_code(feature.code or "", glyphs, state)
+        state.feature_pruned(feature.name, has_rules)
+        if has_rules:
+            feature.code = code
+            kept[id(feature)] = feature
+    font.features = [feature for feature in font.features if id(feature) in kept]
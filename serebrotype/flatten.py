@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Error-bounded flattening of outlines into polylines.
+#
+# Cubics are split at their x and y extrema, so the polyline keeps the
+# exact bounds, and each piece is sampled at the number of steps Wang's
+# formula gives for the tolerance. Polylines are flat ``array("d")``
+# x, y runs, one per closed contour, cached on the outline per tolerance.
+
+import math
+from array import array
+
+from serebrotype.outline import Outline, _cubicExtrema, splitCubic
+
+DEFAULT_TOLERANCE = 0.05
+MAX_STEPS = 1024
+
+
+def _cubicSteps(piece, tolerance):
+    # Wang's formula: uniform steps keeping the chord within tolerance.
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = piece
+    m = max(
+        math.hypot(x0 - 2 * x1 + x2, y0 - 2 * y1 + y2),
+        math.hypot(x1 - 2 * x2 + x3, y1 - 2 * y2 + y3),
+    )
+    return min(MAX_STEPS, max(1, int(math.ceil(math.sqrt(0.75 * m / tolerance)))))
+
+
+def flattenSegment(seg, tolerance, out):
+    """Append the polyline points of ``seg`` after its start point to ``out``."""
+    if len(seg) == 2:
+        out.extend(seg[1])
+        return
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+    ts = sorted(set(_cubicExtrema(x0, x1, x2, x3) + _cubicExtrema(y0, y1, y2, y3)))
+    rest, last = seg, 0.0
+    pieces = []
+    for t in ts:
+        head, rest = splitCubic(rest, (t - last) / (1.0 - last))
+        pieces.append(head)
+        last = t
+    pieces.append(rest)
+    for piece in pieces:
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = piece
+        steps = _cubicSteps(piece, tolerance)
+        for i in range(1, steps):
+            t = i / steps
+            mt = 1.0 - t
+            a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+            out.append(a * ax + b * bx + c * cx + d * dx)
+            out.append(a * ay + b * by + c * cy + d * dy)
+        out.append(dx)
+        out.append(dy)
+
+
+def flattenContours(contours, tolerance=DEFAULT_TOLERANCE):
+    """Closed polylines of ``contours`` as flat ``array("d")`` x, y runs.
+
+    The closing point is implied, it is not repeated at the end.
+    """
+    if tolerance <= 0:
+        raise ValueError("Flattening tolerance must be > 0")
+    polylines = []
+    for contour in contours:
+        out = array("d", contour[0][0])
+        for seg in contour:
+            flattenSegment(seg, tolerance, out)
+        del out[-2:]
+        if len(out) >= 6:
+            polylines.append(out)
+    return tuple(polylines)
+
+
+def polylineContours(polylines):
+    """Line-segment contours of flat polylines, as ``Outline`` takes them."""
+    contours = []
+    for flat in polylines:
+        pts = list(zip(flat[0::2], flat[1::2]))
+        contours.append([(p, q) for p, q in zip(pts, pts[1:] + pts[:1]) if p != q])
+    return contours
+
+
+def flatPolylines(outline, tolerance=DEFAULT_TOLERANCE):
+    """``flattenContours`` of ``outline``, computed once per tolerance."""
+    key = ("polylines", tolerance)
+    polylines = outline.derived.get(key)
+    if polylines is None:
+        polylines = flattenContours(outline.contours, tolerance)
+        outline.derived[key] = polylines
+    return polylines
+
+
+def flatOutline(outline, tolerance=DEFAULT_TOLERANCE):
+    """``outline`` with its curves flattened to ``tolerance``, cached on it.
+
+    A tolerance of None or 0 returns ``outline`` itself. The flat outline
+    has its own edge index and span memo.
+    """
+    if not tolerance:
+        return outline
+    key = ("flat", tolerance)
+    flat = outline.derived.get(key)
+    if flat is None:
+        flat = Outline(polylineContours(flatPolylines(outline, tolerance)), outline.width)
+        outline.derived[key] = flat
+    return flat
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# The GlyphsApp names used by the core modules.
+# Inside Glyphs these are the real classes; anywhere else they come from
+# the in-memory stand-in, so the core logic can run headless.
+
+try:
+    from GlyphsApp import (
+        Glyphs, GSFont, GSGlyph, GSLayer, GSPath, GSNode, GSComponent, GSInstance,
+        GSAnchor, GSGuide, GSHint, LINE, CURVE, OFFCURVE, Message,
+    )
+    HEADLESS = False
+except ImportError:
+    from serebrotype.standin import (
+        Glyphs, GSFont, GSGlyph, GSLayer, GSPath, GSNode, GSComponent, GSInstance,
+        GSAnchor, GSGuide, GSHint, LINE, CURVE, OFFCURVE, Message,
+    )
+    HEADLESS = True
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Cache of interpolated instance fonts, keyed by the instance's axis
+# coordinates and parameters plus a hash of the font content, so one
+# interpolation serves every output format, and with the shared cache
+# later exports too.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from serebrotype.outlinecache import layerContentHash
+
+
+# What interpolatedFont reads besides outlines (layerContentHash). The
+# interpolated font is also saved as the .glyphs source, so data that only
+# ends up there, such as userData and notes, counts too.
+FONT_ATTRIBUTES = [
+    "familyName", "upm", "versionMajor", "versionMinor", "date", "copyright",
+    "designer", "designerURL", "manufacturer", "manufacturerURL", "gridLength",
+    "disablesNiceNames", "disablesAutomaticAlignment", "note",
+    "properties", "axes", "metrics", "stems", "classes", "features", "featurePrefixes",
+    "customParameters", "userData",
+]
+MASTER_ATTRIBUTES = [
+    "id", "name", "axes", "ascender", "capHeight", "xHeight", "descender", "italicAngle",
+    "alignmentZones", "metrics", "stems", "properties", "customParameters", "userData",
+]
+GLYPH_ATTRIBUTES = [
+    "name", "export", "unicodes", "category", "subCategory", "script", "productionName",
+    "leftKerningGroup", "rightKerningGroup", "topKerningGroup", "bottomKerningGroup",
+    "leftMetricsKey", "rightMetricsKey", "widthMetricsKey", "color", "note", "tags", "userData",
+]
+LAYER_ATTRIBUTES = [
+    "layerId", "associatedMasterId", "name", "attributes", "vertWidth",
+    "leftMetricsKey", "rightMetricsKey", "widthMetricsKey", "anchors", "hints", "userData",
+]
+COMPONENT_ATTRIBUTES = ["alignment", "anchor", "smartComponentValues"]
+KERNING_ATTRIBUTES = ["kerning", "kerningRTL", "kerningVertical"]
+# Fields read from the objects the lists above hold: classes and features,
+# info properties and their localized values, custom parameters, axes,
+# metrics and metric values, anchors and hints.
+OBJECT_FIELDS = [
+    "name", "key", "code", "automatic", "active", "disabled", "value", "values", "languageTag",
+    "axisTag", "axisId", "hidden", "type", "id", "filter", "horizontal", "position", "overshoot",
+    "stem", "options", "originNode", "targetNode", "otherNode1", "otherNode2",
+]
+
+def _plain(value):
+    """`value` as nested tuples of numbers and strings, so its repr is stable."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "x") and hasattr(value, "y"):
+        return (float(value.x), float(value.y))
+    if hasattr(value, "keys"):
+        return tuple(sorted(((str(key), _plain(value[key])) for key in value.keys()), key=lambda item: item[0]))
+    if hasattr(value, "__iter__") and not isinstance(value, (bytes, bytearray)):
+        return tuple(_plain(item) for item in value)
+    fields = tuple((attr, _plain(getattr(value, attr))) for attr in OBJECT_FIELDS if hasattr(value, attr))
+    return fields if fields else str(value)
+
+def _fields(obj, attrs):
+    return tuple((attr, _plain(getattr(obj, attr, None))) for attr in attrs)
+
+def font_content_hash(font):
+    """Hash of everything interpolatedFont reads: font info, classes and
+    features, custom parameters, masters, every glyph layer and kerning."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(("F %r;" % (_fields(font, FONT_ATTRIBUTES),)).encode())
+    for master in font.masters:
+        h.update(("M %r;" % (_fields(master, MASTER_ATTRIBUTES),)).encode())
+    for glyph in font.glyphs:
+        h.update(("G %r;" % (_fields(glyph, GLYPH_ATTRIBUTES),)).encode())
+        for layer in glyph.layers:
+            h.update(layerContentHash(layer).encode())
+            components = [_fields(shape, COMPONENT_ATTRIBUTES) for shape in layer.shapes
+                          if getattr(shape, "nodes", None) is None]
+            h.update(("L %r %r;" % (_fields(layer, LAYER_ATTRIBUTES), components)).encode())
+    h.update(("K %r;" % (_fields(font, KERNING_ATTRIBUTES),)).encode())
+    return h.hexdigest()
+
+INSTANCE_ATTRIBUTES = [
+    "name", "styleName", "weightClass", "widthClass", "isBold", "isItalic", "linkStyle",
+    "customParameters", "properties", "userData",
+]
+
+def instance_key(instance, content_hash):
+    """Key of one instance of a font with `content_hash`: its axis
+    coordinates and everything it sets on the interpolated font."""
+    axes = getattr(instance, "axes", None)
+    if not axes:
+        axes = [getattr(instance, attr, None) for attr in ("weightValue", "widthValue", "customValue")]
+    return (content_hash, _plain(axes), _fields(instance, INSTANCE_ATTRIBUTES))
+
+
+class InterpolationCache(object):
+    """LRU cache of interpolated fonts, bounded by entries and total glyphs.
+
+    An entry is an (interpolated font, instance to compile it with) pair."""
+
+    def __init__(self, max_entries=16, max_glyphs=200000):
+        self.max_entries = max_entries
+        self.max_glyphs = max_glyphs
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._glyphs = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_or_build(self, key, build):
+        """The entry for `key`, made with build() and stored on a miss.
+
+        Builds run one at a time, so two callers never build one key twice."""
+        with self._build_lock:
+            entry = self.get(key)
+            if entry is None:
+                entry = build()
+                self.put(key, entry)
+            return entry
+
+    def put(self, key, entry):
+        size = len(entry[0].glyphs)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._glyphs -= old[1]
+            if size > self.max_glyphs:
+                return
+            self._entries[key] = (entry, size)
+            self._glyphs += size
+            while len(self._entries) > self.max_entries or self._glyphs > self.max_glyphs:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._glyphs -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._glyphs = 0
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, entries=len(self._entries), glyphs=self._glyphs)
+
+
+# Opt-in: export_session uses a cache of its own unless given this one.
+shared_interpolation_cache = InterpolationCache()
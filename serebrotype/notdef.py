@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# .notdef outlines as templates: polygons stored once as flat coordinate
+# tuples with PostScript direction (filled contours counter-clockwise),
+# scaled per cap height from a memo.
+
+from functools import lru_cache
+
+NOTDEF_HEIGHT = 700
+NOTDEF_WIDTH = 612
+
+# DEFAULT MARKS (drawn at cap height 700)
+NOTDEF_SHAPES = (
+    ((50, 0), (562, 0), (562, 700), (50, 700)),
+    ((100, 604), (275, 350), (100, 95)),
+    ((306, 305), (481, 50), (131, 50)),
+    ((481, 649), (306, 394), (131, 649)),
+    ((512, 604), (512, 95), (337, 350)),
+)
+DEMO_MARK_SHAPES = (
+    ((50, 0), (562, 0), (562, 700), (50, 700)),
+    ((83, 450), (162, 450), (186, 403), (186, 298), (162, 251), (83, 251)),
+    ((143, 291), (143, 410), (126, 410), (126, 291)),
+    ((203, 450), (279, 450), (279, 411), (246, 411), (246, 372), (279, 372),
+     (279, 333), (246, 333), (246, 290), (279, 290), (279, 251), (203, 251)),
+    ((296, 450), (329, 450), (353, 403), (377, 450), (410, 450), (410, 251),
+     (368, 251), (368, 345), (337, 345), (337, 251), (296, 251)),
+    ((427, 290), (427, 411), (446, 450), (510, 450), (530, 411), (530, 290),
+     (510, 251), (446, 251)),
+    ((487, 291), (487, 410), (470, 410), (470, 291))
+)
+
+_templates = {}
+
+
+def _signed_area(points):
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])) / 2.0
+
+def _inside(point, polygon):
+    x, y = point
+    inside = False
+    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+def oriented_polygons(polygons):
+    # Nesting depth decides the direction: even depth is filled, odd is a counter.
+    polygons = [tuple(polygon) for polygon in polygons]
+    result = []
+    for i, polygon in enumerate(polygons):
+        depth = sum(1 for j, other in enumerate(polygons) if j != i and _inside(polygon[0], other))
+        if (_signed_area(polygon) > 0) != (depth % 2 == 0):
+            polygon = polygon[::-1]
+        result.append(polygon)
+    return result
+
+def register_notdef_mark(name, polygons, width=NOTDEF_WIDTH, height=NOTDEF_HEIGHT):
+    """Adds a mark drawn with closed straight-line polygons at the given cap height."""
+    contours = tuple(
+        tuple(float(v) for point in polygon for v in point)
+        for polygon in oriented_polygons(polygons)
+    )
+    _templates[name] = (float(width), float(height), contours)
+    scaled_notdef.cache_clear()
+
+def notdef_marks():
+    return sorted(_templates)
+
+@lru_cache(maxsize=256)
+def scaled_notdef(name, cap_height):
+    """(advance width, contours as flat x, y tuples) of a mark scaled to cap_height.
+
+    The result is shared between callers through the memo, so it is all tuples.
+    """
+    try:
+        width, height, contours = _templates[name]
+    except KeyError:
+        raise ValueError("Unknown .notdef mark: %s" % name)
+    scale = cap_height / height
+    return int(width * scale), tuple(tuple(v * scale for v in contour) for contour in contours)
+
+def contour_points(contour):
+    return zip(contour[0::2], contour[1::2])
+
+
+register_notdef_mark("empty", NOTDEF_SHAPES)
+register_notdef_mark("demo", DEMO_MARK_SHAPES)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# Plain-Python outlines read from Glyphs layers.
+# Layers, paths and nodes are only accessed by duck typing.
+
+LINE = "line"
+CURVE = "curve"
+QCURVE = "qcurve"
+OFFCURVE = "offcurve"
+
+
+def _nodePoint(node):
+    return (float(node.x), float(node.y))
+
+
+def contourFromNodes(nodes):
+    """Turn the nodes of a closed path into a list of segments.
+
+    A segment is a tuple of points: 2 points for a line, 4 for a cubic.
+    Quadratic runs are converted to cubics.
+    """
+    nodes = list(nodes)
+    if not nodes:
+        return []
+    start = None
+    for i, node in enumerate(nodes):
+        if node.type != OFFCURVE:
+            start = i
+            break
+    if start is None:
+        return []
+    # Glyphs stores closed paths with the start point last.
+    nodes = nodes[start + 1:] + nodes[:start + 1]
+    segments = []
+    prev = _nodePoint(nodes[-1])
+    offs = []
+    for node in nodes:
+        pt = _nodePoint(node)
+        if node.type == OFFCURVE:
+            offs.append(pt)
+            continue
+        if node.type == CURVE and len(offs) == 2:
+            segments.append((prev, offs[0], offs[1], pt))
+        elif offs:
+            segments.extend(_quadsToCubics(prev, offs, pt))
+        elif pt != prev:
+            segments.append((prev, pt))
+        offs = []
+        prev = pt
+    return segments
+
+
+def _quadsToCubics(p0, offs, p3):
+    out = []
+    for i, c in enumerate(offs):
+        if i < len(offs) - 1:
+            n = offs[i + 1]
+            end = ((c[0] + n[0]) * 0.5, (c[1] + n[1]) * 0.5)
+        else:
+            end = p3
+        out.append((
+            p0,
+            (p0[0] + (c[0] - p0[0]) * 2.0 / 3.0, p0[1] + (c[1] - p0[1]) * 2.0 / 3.0),
+            (end[0] + (c[0] - end[0]) * 2.0 / 3.0, end[1] + (c[1] - end[1]) * 2.0 / 3.0),
+            end,
+        ))
+        p0 = end
+    return out
+
+
+def contoursFromPaths(paths):
+    contours = []
+    for p in paths:
+        if not getattr(p, "closed", True):
+            continue
+        nodes = getattr(p, "nodes", None)
+        if nodes is None:
+            continue
+        segs = contourFromNodes(nodes)
+        if segs:
+            contours.append(segs)
+    return contours
+
+
+def _cubicExtrema(y0, y1, y2, y3):
+    a = -y0 + 3 * y1 - 3 * y2 + y3
+    b = 2 * (3 * y0 - 6 * y1 + 3 * y2)
+    c = -3 * y0 + 3 * y1
+    a *= 3
+    ts = []
+    if abs(a) < 1e-12:
+        if abs(b) > 1e-12:
+            ts.append(-c / b)
+    else:
+        disc = b * b - 4 * a * c
+        if disc >= 0:
+            r = disc ** 0.5
+            ts.append((-b - r) / (2 * a))
+            ts.append((-b + r) / (2 * a))
+    return sorted(t for t in ts if 1e-9 < t < 1 - 1e-9)
+
+
+def splitCubic(seg, t):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+    ax, ay = x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+    bx, by = x1 + (x2 - x1) * t, y1 + (y2 - y1) * t
+    cx, cy = x2 + (x3 - x2) * t, y2 + (y3 - y2) * t
+    dx, dy = ax + (bx - ax) * t, ay + (by - ay) * t
+    ex, ey = bx + (cx - bx) * t, by + (cy - by) * t
+    fx, fy = dx + (ex - dx) * t, dy + (ey - dy) * t
+    return (
+        ((x0, y0), (ax, ay), (dx, dy), (fx, fy)),
+        ((fx, fy), (ex, ey), (cx, cy), (x3, y3)),
+    )
+
+
+def monotoneEdges(contours):
+    """Split every segment into pieces that are monotonic in y.
+
+    Returns a list of ``(yMin, yMax, direction, points)`` tuples. Horizontal
+    pieces are dropped, they never cross a scanline.
+    """
+    edges = []
+    for contour in contours:
+        for seg in contour:
+            if len(seg) == 2:
+                pieces = [seg]
+            else:
+                pieces = []
+                rest, last = seg, 0.0
+                for t in _cubicExtrema(seg[0][1], seg[1][1], seg[2][1], seg[3][1]):
+                    head, rest = splitCubic(rest, (t - last) / (1.0 - last))
+                    pieces.append(head)
+                    last = t
+                pieces.append(rest)
+            for piece in pieces:
+                ys, ye = piece[0][1], piece[-1][1]
+                if ys == ye:
+                    continue
+                if ys < ye:
+                    edges.append((ys, ye, 1, piece))
+                else:
+                    edges.append((ye, ys, -1, piece))
+    return edges
+
+
+class Outline(object):
+    """Overlap-free outline of one layer, as plain Python data."""
+
+    def __init__(self, contours, width=0.0):
+        self.contours = contours
+        self.width = width
+        self.edges = monotoneEdges(contours)
+        self.bounds = _bounds(contours, self.edges)
+        # Lazily built data derived from the edges (arrays, indexes).
+        self.derived = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["derived"] = {}
+        return state
+
+    def isEmpty(self):
+        return not self.edges
+
+
+def _bounds(contours, edges):
+    if not edges:
+        return None
+    xs = []
+    for contour in contours:
+        for seg in contour:
+            xs.append(seg[0][0])
+            xs.append(seg[-1][0])
+    for _, _, _, piece in edges:
+        if len(piece) == 4:
+            xs.extend(_cubicXRange(piece))
+    yMin = min(e[0] for e in edges)
+    yMax = max(e[1] for e in edges)
+    return (min(xs), yMin, max(xs), yMax)
+
+
+def _cubicXRange(seg):
+    xs = [seg[0][0], seg[3][0]]
+    for t in _cubicExtrema(seg[0][0], seg[1][0], seg[2][0], seg[3][0]):
+        mt = 1.0 - t
+        xs.append(mt ** 3 * seg[0][0] + 3 * mt * mt * t * seg[1][0]
+                  + 3 * mt * t * t * seg[2][0] + t ** 3 * seg[3][0])
+    return xs
+
+
+def outlineFromLayer(layer):
+    """Decompose and remove overlap on a copy of ``layer``, return an Outline.
+
+    Returns None when the layer has no closed contours.
+    """
+    src = layer.copyDecomposedLayer()
+    if not src or not src.shapes or len(src.shapes) == 0:
+        return None
+    try:
+        src.removeOverlap()
+    except Exception:
+        pass
+    outline = Outline(contoursFromPaths(src.paths), width=float(layer.width))
+    if outline.isEmpty():
+        return None
+    return outline
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Cache of decomposed, overlap-free outlines keyed by layer content.
+
+import hashlib
+from collections import OrderedDict
+
+from serebrotype.outline import outlineFromLayer
+
+MAX_COMPONENT_DEPTH = 8
+
+
+def _feedLayer(h, layer, depth):
+    h.update(repr(float(layer.width)).encode())
+    for shape in layer.shapes:
+        nodes = getattr(shape, "nodes", None)
+        if nodes is not None:
+            h.update(b"P1" if getattr(shape, "closed", True) else b"P0")
+            for node in nodes:
+                h.update(("%s %r %r;" % (node.type, float(node.x), float(node.y))).encode())
+            continue
+        name = getattr(shape, "componentName", None)
+        h.update(("C %s %r;" % (name, tuple(getattr(shape, "transform", ()) or ()))).encode())
+        base = getattr(shape, "componentLayer", None)
+        if base is not None and depth < MAX_COMPONENT_DEPTH:
+            h.update(b"[")
+            _feedLayer(h, base, depth + 1)
+            h.update(b"]")
+
+
+def layerContentHash(layer):
+    """Hash of a layer's paths, components (recursively) and width."""
+    h = hashlib.blake2b(digest_size=16)
+    _feedLayer(h, layer, 0)
+    return h.hexdigest()
+
+
+def approxOutlineSize(outline):
+    # Rough CPython cost of the point tuples held by contours and edges.
+    points = sum(len(seg) for contour in outline.contours for seg in contour)
+    points += sum(len(edge[3]) for edge in outline.edges)
+    return 200 + points * 80
+
+
+class OutlineCache(object):
+    """LRU cache of ``Outline`` objects with an entry and a memory ceiling."""
+
+    def __init__(self, maxEntries=4096, maxBytes=64 * 1024 * 1024):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, outline):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        size = approxOutlineSize(outline)
+        if size > self.maxBytes:
+            return
+        self._entries[key] = (outline, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.maxEntries or self._bytes > self.maxBytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = self.misses = 0
+
+    def outlineForLayer(self, layer):
+        """Cached ``outlineFromLayer(layer)``, None for layers without contours."""
+        key = layerContentHash(layer)
+        if key in self._entries:
+            return self.get(key)
+        self.misses += 1
+        outline = outlineFromLayer(layer)
+        if outline is not None:
+            self.put(key, outline)
+        return outline
+
+
+sharedOutlineCache = OutlineCache()
+
+
+def cachedOutlineFromLayer(layer, cache=None):
+    if cache is None:
+        cache = sharedOutlineCache
+    return cache.outlineForLayer(layer)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# Analytic scanline intersection of an Outline with horizontal lines.
+
+from serebrotype.edgeindex import edgeIndexFor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _edgeX(piece, y):
+    if len(piece) == 2:
+        (x0, y0), (x1, y1) = piece
+        return x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+    return _cubicXAtY(piece, y)
+
+
+def _cubicXAtY(piece, y):
+    # The piece is monotonic in y, so one root lives in [0, 1].
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = piece
+    ay = -y0 + 3 * y1 - 3 * y2 + y3
+    by = 3 * y0 - 6 * y1 + 3 * y2
+    cy = -3 * y0 + 3 * y1
+    rising = y3 > y0
+    lo, hi = 0.0, 1.0
+    t = (y - y0) / (y3 - y0)
+    for _ in range(50):
+        f = ((ay * t + by) * t + cy) * t + y0 - y
+        if abs(f) < 1e-9:
+            break
+        if (f < 0) == rising:
+            lo = t
+        else:
+            hi = t
+        d = (3 * ay * t + 2 * by) * t + cy
+        nt = t - f / d if d != 0 else -1.0
+        if not lo < nt < hi:
+            nt = (lo + hi) * 0.5
+        if hi - lo < 1e-12:
+            break
+        t = nt
+    mt = 1.0 - t
+    return mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x3
+
+
+def crossingsAtY(edges, y):
+    """Sorted ``(x, direction)`` crossings of the edges with the line at ``y``.
+
+    Edges count on the half-open range ``yMin <= y < yMax`` so shared
+    endpoints are not counted twice.
+    """
+    out = [(_edgeX(piece, y), d) for (e0, e1, d, piece) in edges if e0 <= y < e1]
+    out.sort()
+    return out
+
+
+def finishSpans(spans, x_min, x_max, minLen=0.0):
+    """Merge touching spans, clip them to ``[x_min, x_max]`` and drop short ones."""
+    merged = []
+    for x0, x1 in spans:
+        if merged and x0 - merged[-1][1] <= 1e-9:
+            x0 = merged.pop()[0]
+        merged.append((x0, x1))
+    out = []
+    for x0, x1 in merged:
+        x0, x1 = max(x0, x_min), min(x1, x_max)
+        if x1 - x0 >= minLen and x1 > x0:
+            out.append((x0, x1))
+    return out
+
+
+def intervalsFromCrossings(crossings, x_min, x_max, minLen=0.0):
+    """Apply the nonzero winding rule to sorted crossings.
+
+    Returns ``(x0, x1)`` spans clipped to ``[x_min, x_max]``.
+    """
+    spans = []
+    winding = 0
+    start = None
+    for x, d in crossings:
+        before = winding
+        winding += d
+        if before == 0 and winding != 0:
+            start = x
+        elif before != 0 and winding == 0:
+            spans.append((start, x))
+    return finishSpans(spans, x_min, x_max, minLen)
+
+
+def intervalsAtY(outline, y, x_min, x_max, minLen=0.4):
+    """Exact filled spans of ``outline`` along the horizontal line at ``y``.
+
+    Only the edges in the outline's ``EdgeIndex`` bucket for ``y`` are tested.
+    """
+    edges = edgeIndexFor(outline).edgesAtY(y)
+    return intervalsFromCrossings(crossingsAtY(edges, y), x_min, x_max, minLen)
+
+
+def intervalsAtYs(outline, ys, x_min, x_max, minLen=0.4):
+    """Filled spans for several scanlines at once, one list per ``y``.
+
+    Uses NumPy when it is installed, otherwise falls back to one
+    ``intervalsAtY`` call per line.
+    """
+    ys = list(ys)
+    if np is None or not ys:
+        return [intervalsAtY(outline, y, x_min, x_max, minLen) for y in ys]
+    return _intervalsAtYsNumpy(outline, ys, x_min, x_max, minLen)
+
+
+MAX_CACHED_SPANS = 4096
+
+
+def cachedIntervalsAtYs(outline, ys, x_min, x_max, minLen=0.4):
+    """``intervalsAtYs`` that remembers spans per scanline on the outline.
+
+    Only lines not seen before for this outline are intersected, so editing
+    bar parameters recomputes just the bars whose midline moved.
+    """
+    memo = outline.derived.setdefault("spans", {})
+    keys = [(y, x_min, x_max, minLen) for y in ys]
+    missing = [k[0] for k in keys if k not in memo]
+    if missing:
+        if len(memo) + len(missing) > MAX_CACHED_SPANS:
+            memo.clear()
+        for y, spans in zip(missing, intervalsAtYs(outline, missing, x_min, x_max, minLen)):
+            memo[(y, x_min, x_max, minLen)] = spans
+    return [memo[k] for k in keys]
+
+
+# ---------- NumPy path ----------
+
+def edgeArrays(outline):
+    """Edges of ``outline`` as NumPy arrays in ``outline.edges`` order, built once.
+
+    Returns ``(meta, points, isCubic)``: ``yMin, yMax, direction`` rows,
+    8 coordinates per edge (lines use the first 4) and a cubic mask.
+    """
+    arrays = outline.derived.get("edgeArrays")
+    if arrays is None:
+        edges = outline.edges
+        meta = np.array([[e[0], e[1], e[2]] for e in edges], dtype=float).reshape(-1, 3)
+        pts = np.zeros((len(edges), 8))
+        for i, e in enumerate(edges):
+            flat = [c for pt in e[3] for c in pt]
+            pts[i, :len(flat)] = flat
+        isCubic = np.array([len(e[3]) == 4 for e in edges], dtype=bool)
+        arrays = (meta, pts, isCubic)
+        outline.derived["edgeArrays"] = arrays
+    return arrays
+
+
+def _lineXs(p, y):
+    return p[:, 0] + (p[:, 2] - p[:, 0]) * (y - p[:, 1]) / (p[:, 3] - p[:, 1])
+
+
+def _cubicXs(p, y):
+    y0, y1, y2, y3 = p[:, 1], p[:, 3], p[:, 5], p[:, 7]
+    ay = -y0 + 3 * y1 - 3 * y2 + y3
+    by = 3 * y0 - 6 * y1 + 3 * y2
+    cy = -3 * y0 + 3 * y1
+    rising = y3 > y0
+    lo = np.zeros_like(y)
+    hi = np.ones_like(y)
+    for _ in range(48):
+        t = (lo + hi) * 0.5
+        f = ((ay * t + by) * t + cy) * t + y0 - y
+        up = (f < 0) == rising
+        lo = np.where(up, t, lo)
+        hi = np.where(up, hi, t)
+    t = (lo + hi) * 0.5
+    mt = 1.0 - t
+    return (mt * mt * mt * p[:, 0] + 3 * mt * mt * t * p[:, 2]
+            + 3 * mt * t * t * p[:, 4] + t * t * t * p[:, 6])
+
+
+def _crossingsNumpy(outline, ys):
+    # Candidate (row, edge) pairs come from the edge index, so the arrays
+    # grow with the edges near each line rather than with the outline.
+    meta, pts, isCubic = edgeArrays(outline)
+    index = edgeIndexFor(outline)
+    candidates = [index.candidatesAtY(y) for y in ys]
+    counts = [len(c) for c in candidates]
+    cols = np.fromiter((i for c in candidates for i in c), dtype=np.intp, count=sum(counts))
+    rows = np.repeat(np.arange(len(ys)), counts)
+    y = np.asarray(ys, dtype=float)[rows]
+    hit = (meta[cols, 0] <= y) & (y < meta[cols, 1])
+    rows, cols, y = rows[hit], cols[hit], y[hit]
+    xs = np.empty(cols.size)
+    curved = isCubic[cols]
+    xs[~curved] = _lineXs(pts[cols[~curved]], y[~curved])
+    if curved.any():
+        xs[curved] = _cubicXs(pts[cols[curved]], y[curved])
+    return rows, xs, meta[cols, 2].astype(int)
+
+
+def _intervalsAtYsNumpy(outline, ys, x_min, x_max, minLen):
+    rows, xs, ds = _crossingsNumpy(outline, ys)
+    out = [[] for _ in ys]
+    if rows.size == 0:
+        return out
+
+    order = np.lexsort((ds, xs, rows))
+    rows, xs, ds = rows[order], xs[order], ds[order]
+
+    # Winding per row: cumulative sum minus what was accumulated before the row.
+    cs = np.cumsum(ds)
+    first = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    counts = np.diff(np.r_[first, rows.size])
+    after = cs - np.repeat(cs[first] - ds[first], counts)
+    before = after - ds
+    events = np.flatnonzero(((before == 0) & (after != 0)) | ((before != 0) & (after == 0)))
+
+    spans = [[] for _ in ys]
+    start = None
+    startRow = -1
+    for i in events.tolist():
+        row = int(rows[i])
+        if before[i] == 0:
+            start, startRow = float(xs[i]), row
+        elif start is not None and startRow == row:
+            spans[row].append((start, float(xs[i])))
+            start = None
+    for row, rowSpans in enumerate(spans):
+        out[row] = finishSpans(rowSpans, x_min, x_max, minLen)
+    return out
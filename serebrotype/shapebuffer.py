@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Compact intermediate form for generated geometry (bars, band slices,
+# .notdef marks). Closed contours are collected in flat arrays and turned
+# into Glyphs paths in one pass, so a layer gets a single shapes
+# assignment instead of one append per rectangle.
+
+from array import array
+
+from serebrotype.glyphsapi import GSPath, GSNode, LINE, CURVE, OFFCURVE
+
+NODE_TYPES = (LINE, OFFCURVE, CURVE)
+_LINE, _OFFCURVE, _CURVE = 0, 1, 2
+
+MERGE_EPS = 1e-6
+
+
+class ShapeBuffer(object):
+    """Closed contours as flat ``x, y`` coordinates, node types and contour ends."""
+
+    __slots__ = ("coords", "types", "ends")
+
+    def __init__(self):
+        self.coords = array("d")
+        self.types = array("b")
+        self.ends = array("l")
+
+    def __len__(self):
+        return len(self.ends)
+
+    def pointCount(self):
+        return len(self.types)
+
+    def addPolygon(self, flat):
+        """Add a straight-line contour given as a flat ``x, y`` sequence."""
+        self.coords.extend(flat)
+        self.types.extend([_LINE] * (len(flat) // 2))
+        self.ends.append(len(self.types))
+
+    def addQuads(self, quads, merge=True):
+        """Add bar quads, ``((x0, yb), (x1, yb), (x1', yt), (x0', yt))`` each.
+
+        With ``merge``, runs of quads in one row that touch (same bottom, top
+        and shear) are joined into one quad first.
+        """
+        pending = None
+        for quad in quads:
+            (ax, ay), (bx, by), (cx, cy), (dx, dy) = quad
+            if pending is not None:
+                px0, py0, px1, py1, pcx, pcy, pdx, pdy = pending
+                if (merge and ay == py0 and dy == pdy and by == py1 and cy == pcy
+                        and abs((dx - ax) - (pdx - px0)) <= MERGE_EPS
+                        and -MERGE_EPS <= ax - px1 <= MERGE_EPS):
+                    pending = (px0, py0, bx, by, cx, cy, pdx, pdy)
+                    continue
+                self.addPolygon(pending)
+            pending = (ax, ay, bx, by, cx, cy, dx, dy)
+        if pending is not None:
+            self.addPolygon(pending)
+
+    def addContour(self, segments):
+        """Add a closed contour of line ``(p0, p1)`` and cubic ``(p0, c1, c2, p3)`` segments."""
+        coords, types = self.coords, self.types
+        for seg in segments:
+            if len(seg) == 4:
+                coords.extend(seg[1])
+                coords.extend(seg[2])
+                coords.extend(seg[3])
+                types.extend((_OFFCURVE, _OFFCURVE, _CURVE))
+            else:
+                coords.extend(seg[1])
+                types.append(_LINE)
+        self.ends.append(len(types))
+
+    def addContours(self, contours):
+        for contour in contours:
+            self.addContour(contour)
+
+    def contours(self):
+        """``[(x, y, nodeType), ...]`` per contour."""
+        coords, types = self.coords, self.types
+        start = 0
+        for end in self.ends:
+            yield [(coords[2 * i], coords[2 * i + 1], NODE_TYPES[types[i]]) for i in range(start, end)]
+            start = end
+
+    def paths(self):
+        """One closed ``GSPath`` per contour, each given all of its nodes at once."""
+        paths = []
+        for points in self.contours():
+            path = GSPath()
+            path.nodes = [GSNode((x, y), nodeType) for x, y, nodeType in points]
+            path.closed = True
+            paths.append(path)
+        return paths
@@ -0,0 +1,680 @@
+# -*- coding: utf-8 -*-
+# In-memory stand-in for the parts of the GlyphsApp API the scripts use.
+#
+# It lets the core modules run (and be timed) outside of Glyphs. Geometry
+# operations that need the app's boolean engine (removeOverlap,
+# correctPathDirection) are no-ops here.
+
+import copy as _copy
+import os
+import uuid
+from collections import namedtuple
+
+LINE = "line"
+CURVE = "curve"
+QCURVE = "qcurve"
+OFFCURVE = "offcurve"
+GSLINE = LINE
+
+Point = namedtuple("Point", "x y")
+
+
+class GSNode(object):
+    def __init__(self, pt=(0, 0), type=LINE):
+        self.position = Point(float(pt[0]), float(pt[1]))
+        self.type = type
+
+    @property
+    def x(self):
+        return self.position.x
+
+    @x.setter
+    def x(self, value):
+        self.position = Point(float(value), self.position.y)
+
+    @property
+    def y(self):
+        return self.position.y
+
+    @y.setter
+    def y(self, value):
+        self.position = Point(self.position.x, float(value))
+
+    def copy(self):
+        return GSNode(self.position, self.type)
+
+
+class GSPath(object):
+    def __init__(self):
+        self.nodes = []
+        self.closed = True
+        self.parent = None
+
+    def copy(self):
+        p = GSPath()
+        p.nodes = [n.copy() for n in self.nodes]
+        p.closed = self.closed
+        return p
+
+    def transformed(self, m):
+        a, b, c, d, tx, ty = m
+        p = GSPath()
+        p.closed = self.closed
+        p.nodes = [GSNode((a * n.x + c * n.y + tx, b * n.x + d * n.y + ty), n.type) for n in self.nodes]
+        return p
+
+
+class GSComponent(object):
+    def __init__(self, name, offset=(0, 0)):
+        self.componentName = name
+        self.transform = (1.0, 0.0, 0.0, 1.0, float(offset[0]), float(offset[1]))
+        self.alignment = 0
+        self.anchor = None
+        self.smartComponentValues = {}
+        self.parent = None
+
+    def copy(self):
+        c = GSComponent(self.componentName)
+        c.transform = self.transform
+        c.alignment = self.alignment
+        c.anchor = self.anchor
+        c.smartComponentValues = dict(self.smartComponentValues)
+        return c
+
+    def decompose(self):
+        layer = self.parent
+        base = self.componentLayer
+        index = list(layer.shapes).index(self)
+        paths = [p.transformed(self.transform) for p in base._decomposedPaths()] if base is not None else []
+        shapes = list(layer.shapes)
+        layer.shapes = shapes[:index] + paths + shapes[index + 1:]
+
+    @property
+    def componentLayer(self):
+        layer = self.parent
+        font = layer.parent.parent if layer is not None and layer.parent is not None else None
+        if font is None:
+            return None
+        glyph = font.glyphs[self.componentName]
+        if glyph is None:
+            return None
+        return glyph.layers[layer.associatedMasterId]
+
+
+class _Positioned(object):
+    """``position`` as a Point, whatever pair it is given, like NSPoint."""
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, pt):
+        self._position = Point(float(pt[0]), float(pt[1]))
+
+
+class GSAnchor(_Positioned):
+    def __init__(self, name=None, pt=(0, 0)):
+        self.name = name
+        self.position = pt
+
+    def copy(self):
+        return GSAnchor(self.name, self.position)
+
+
+class GSGuide(_Positioned):
+    def __init__(self):
+        self.position = (0.0, 0.0)
+        self.angle = 0.0
+        self.name = None
+
+    def copy(self):
+        return _copy.copy(self)
+
+
+class GSHint(object):
+    def __init__(self):
+        self.type = None
+        self.name = None
+        self.horizontal = False
+        self.stem = -2
+        self.options = 0
+        self.originNode = None
+        self.targetNode = None
+        self.otherNode1 = None
+        self.otherNode2 = None
+
+    def copy(self):
+        return _copy.copy(self)
+
+
+class _ShapeView(object):
+    """``layer.paths`` / ``layer.components``: a filtered view on shapes."""
+
+    def __init__(self, layer, cls):
+        self._layer = layer
+        self._cls = cls
+
+    def _items(self):
+        return [s for s in self._layer.shapes if isinstance(s, self._cls)]
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __len__(self):
+        return len(self._items())
+
+    def __getitem__(self, i):
+        return self._items()[i]
+
+    def __bool__(self):
+        return any(isinstance(s, self._cls) for s in self._layer.shapes)
+
+    def append(self, shape):
+        self._layer.shapes.append(shape)
+
+    def remove(self, shape):
+        self._layer.shapes.remove(shape)
+
+
+class _Shapes(list):
+    def __init__(self, layer, items=()):
+        list.__init__(self)
+        self._layer = layer
+        for item in items:
+            self.append(item)
+
+    def append(self, shape):
+        shape.parent = self._layer
+        list.append(self, shape)
+
+
+class GSLayer(object):
+    def __init__(self):
+        self.name = None
+        self.layerId = None
+        self.associatedMasterId = None
+        self.parent = None
+        self.width = 600.0
+        self.LSB = 0.0
+        self.RSB = 0.0
+        self.leftMetricsKey = None
+        self.rightMetricsKey = None
+        self.anchors = []
+        self.guides = []
+        self.hints = []
+        self.userData = {}
+        self._background = None
+        self._shapes = _Shapes(self)
+
+    @property
+    def shapes(self):
+        return self._shapes
+
+    @shapes.setter
+    def shapes(self, items):
+        self._shapes = _Shapes(self, items)
+
+    @property
+    def background(self):
+        if self._background is None:
+            self._background = GSLayer()
+        return self._background
+
+    @property
+    def paths(self):
+        return _ShapeView(self, GSPath)
+
+    @property
+    def components(self):
+        return _ShapeView(self, GSComponent)
+
+    def clear(self):
+        self.shapes = []
+
+    def copy(self):
+        new = GSLayer()
+        new.name = self.name
+        new.layerId = self.layerId
+        new.associatedMasterId = self.associatedMasterId
+        new.parent = self.parent
+        new.width, new.LSB, new.RSB = self.width, self.LSB, self.RSB
+        new.leftMetricsKey, new.rightMetricsKey = self.leftMetricsKey, self.rightMetricsKey
+        new.shapes = [s.copy() for s in self.shapes]
+        new.anchors = [a.copy() for a in self.anchors]
+        new.guides = [g.copy() for g in self.guides]
+        new.hints = [h.copy() for h in self.hints]
+        # Hints follow the copied nodes, as they do in Glyphs.
+        nodes = {}
+        for old, shape in zip(self.shapes, new.shapes):
+            for a, b in zip(getattr(old, "nodes", ()), getattr(shape, "nodes", ())):
+                nodes[id(a)] = b
+        for hint in new.hints:
+            for attr in ("originNode", "targetNode", "otherNode1", "otherNode2"):
+                node = getattr(hint, attr)
+                if node is not None:
+                    setattr(hint, attr, nodes.get(id(node), node))
+        new.userData = dict(self.userData)
+        if self._background is not None:
+            new._background = self._background.copy()
+        return new
+
+    def _decomposedPaths(self, depth=0):
+        out = []
+        for shape in self.shapes:
+            if isinstance(shape, GSPath):
+                out.append(shape.copy())
+                continue
+            base = shape.componentLayer
+            if base is None or depth > 8:
+                continue
+            out.extend(p.transformed(shape.transform) for p in base._decomposedPaths(depth + 1))
+        return out
+
+    def decomposeComponents(self):
+        self.shapes = self._decomposedPaths()
+
+    def copyDecomposedLayer(self):
+        new = self.copy()
+        new.shapes = self._decomposedPaths()
+        return new
+
+    def removeOverlap(self):
+        pass
+
+    def correctPathDirection(self):
+        pass
+
+
+class _Layers(object):
+    def __init__(self, glyph):
+        self._glyph = glyph
+        self._list = []
+
+    def __iter__(self):
+        return iter(list(self._list))
+
+    def __len__(self):
+        return len(self._list)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._list[key]
+        for layer in self._list:
+            if layer.layerId == key:
+                return layer
+        return None
+
+    def append(self, layer):
+        layer.parent = self._glyph
+        if layer.layerId is None:
+            layer.layerId = "layer-%d-%d" % (id(self._glyph), len(self._list))
+        self._list.append(layer)
+
+
+class GSGlyph(object):
+    def __init__(self, name=None):
+        self.name = name
+        self.unicode = None
+        self.category = None
+        self.subCategory = None
+        self.export = True
+        self.id = uuid.uuid4().hex
+        self.leftKerningGroup = None
+        self.rightKerningGroup = None
+        self.parent = None
+        self.layers = _Layers(self)
+
+    @property
+    def unicodes(self):
+        return [self.unicode] if self.unicode else []
+
+    def copy(self):
+        g = GSGlyph(self.name)
+        g.unicode, g.category, g.subCategory, g.export = self.unicode, self.category, self.subCategory, self.export
+        g.id, g.leftKerningGroup, g.rightKerningGroup = self.id, self.leftKerningGroup, self.rightKerningGroup
+        for layer in self.layers:
+            g.layers.append(layer.copy())
+        return g
+
+
+class _Glyphs(object):
+    def __init__(self, font):
+        self._font = font
+        self._list = []
+        self._byName = {}
+
+    def __iter__(self):
+        return iter(list(self._list))
+
+    def __len__(self):
+        return len(self._list)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._list[key]
+        return self._byName.get(key)
+
+    def append(self, glyph):
+        glyph.parent = self._font
+        for master in self._font.masters:
+            if glyph.layers[master.id] is None:
+                layer = GSLayer()
+                layer.layerId = layer.associatedMasterId = master.id
+                glyph.layers.append(layer)
+        self._list.append(glyph)
+        self._byName[glyph.name] = glyph
+
+    def remove(self, glyph):
+        self._list.remove(glyph)
+        if self._byName.get(glyph.name) is glyph:
+            del self._byName[glyph.name]
+
+    def removeMany(self, glyphs):
+        gone = set(id(g) for g in glyphs)
+        self._list = [g for g in self._list if id(g) not in gone]
+        self._byName = dict((g.name, g) for g in self._list)
+
+
+class GSFontMaster(object):
+    def __init__(self, name="Regular", id=None, capHeight=700):
+        self.name = name
+        self.id = id or name
+        self.capHeight = capHeight
+        self.axes = []
+        self.customParameters = {}
+
+    def copy(self):
+        new = _copy.copy(self)
+        new.axes = list(self.axes)
+        new.customParameters = dict(self.customParameters)
+        return new
+
+
+class GSClass(object):
+    def __init__(self, name="", code=""):
+        self.name = name
+        self.code = code
+        self.automatic = False
+
+    def copy(self):
+        return _copy.copy(self)
+
+
+GSFeature = GSClass
+GSFeaturePrefix = GSClass
+
+
+class GSMetric(object):
+    def __init__(self, type=None, name=None, id=None):
+        self.type = type
+        self.name = name
+        self.id = id or name or type
+
+    def copy(self):
+        return _copy.copy(self)
+
+
+class GSFontInfoProperty(object):
+    def __init__(self, key=None, value=None, languageTag=None):
+        self.key = key
+        self.value = value
+        self.languageTag = languageTag
+
+    def copy(self):
+        return _copy.copy(self)
+
+
+class GSInstance(object):
+    def __init__(self, name="Regular"):
+        self.name = name
+        self.styleName = name
+        self.active = True
+        self.axes = []
+        self.weightClass = 400
+        self.widthClass = 5
+        self.isBold = False
+        self.isItalic = False
+        self.linkStyle = None
+        self.customParameters = {}
+        self.properties = []
+        self.font = None
+
+    def copy(self):
+        new = _copy.copy(self)
+        new.axes = list(self.axes)
+        new.customParameters = dict(self.customParameters)
+        new.properties = [p.copy() for p in self.properties]
+        return new
+
+    @property
+    def interpolatedFont(self):
+        font = self.font.copy()
+        master = font.masters[0]
+        master.name = self.name
+        font.masters = [master]
+        for glyph in font.glyphs:
+            keep = glyph.layers[master.id]
+            glyph.layers = _Layers(glyph)
+            if keep is not None:
+                glyph.layers.append(keep)
+        # Glyphs leaves the instance itself on the interpolated font.
+        font.instances = _Instances(font)
+        font.instances.append(self.copy())
+        return font
+
+    def generate(self, *args, **kwargs):
+        # Accepts the spellings used across Glyphs versions: format/Format,
+        # fontPath/FontPath/path, with an optional leading font.
+        font = args[0] if args and isinstance(args[0], GSFont) else self.font
+        fmt = kwargs.get("format", kwargs.get("Format", "OTF"))
+        path = kwargs.get("fontPath", kwargs.get("FontPath", kwargs.get("path")))
+        if not isinstance(fmt, str) or fmt.upper() not in ("OTF", "TTF"):
+            raise ValueError("Unsupported format: %r" % (fmt,))
+        if not path:
+            raise ValueError("No font path")
+        if os.path.isdir(path):
+            stem = "%s-%s" % (font.familyName or "Untitled", self.name)
+            path = os.path.join(path, "%s.%s" % (stem.replace(" ", ""), fmt.lower()))
+        with open(path, "wb") as fh:
+            fh.write(("%s %s %d glyphs\n" % (fmt, self.name, len(font.glyphs))).encode())
+        return True
+
+
+class _Instances(list):
+    def __init__(self, font):
+        list.__init__(self)
+        self._font = font
+
+    def append(self, instance):
+        instance.font = self._font
+        list.append(self, instance)
+
+
+class GSFont(object):
+    def __init__(self):
+        self.familyName = "Untitled"
+        self.masters = []
+        self.instances = _Instances(self)
+        self.glyphs = _Glyphs(self)
+        self.classes = []
+        self.features = []
+        self.featurePrefixes = []
+        self.customParameters = {}
+        self.kerning = {}
+        self.kerningRTL = {}
+        self.kerningVertical = {}
+        self.metrics = []
+        self.stems = []
+        self.userData = {}
+        self.note = ""
+        self.filepath = None
+
+    def copy(self):
+        f = GSFont()
+        f.familyName = self.familyName
+        f.masters = [m.copy() for m in self.masters]
+        for inst in self.instances:
+            f.instances.append(inst.copy())
+        for glyph in self.glyphs:
+            f.glyphs.append(glyph.copy())
+        f.classes = [c.copy() for c in self.classes]
+        f.features = [c.copy() for c in self.features]
+        f.featurePrefixes = [c.copy() for c in self.featurePrefixes]
+        f.customParameters = dict(self.customParameters)
+        for attr in ("kerning", "kerningRTL", "kerningVertical"):
+            kerning = getattr(self, attr)
+            setattr(f, attr, {m: {l: dict(r) for l, r in pairs.items()} for m, pairs in kerning.items()})
+        f.metrics = [m.copy() for m in self.metrics]
+        f.stems = [s.copy() for s in self.stems]
+        f.userData = dict(self.userData)
+        f.note = self.note
+        return f
+
+    def removeGlyph_(self, glyph):
+        self.glyphs.remove(glyph)
+
+    def removeGlyphs_(self, glyphs):
+        self.glyphs.removeMany(glyphs)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("{\nfamilyName = \"%s\";\nglyphs = %d;\n}\n" % (self.familyName, len(self.glyphs)))
+        self.filepath = path
+
+    def disableUpdateInterface(self):
+        pass
+
+    def enableUpdateInterface(self):
+        pass
+
+
+class _GlyphsApplication(object):
+    def __init__(self):
+        self.fonts = []
+        self.notifications = []
+
+    @property
+    def font(self):
+        return self.fonts[0] if self.fonts else None
+
+    def showNotification(self, title, message):
+        self.notifications.append((title, message))
+
+    def showMacroWindow(self):
+        pass
+
+    def redraw(self):
+        pass
+
+
+Glyphs = _GlyphsApplication()
+
+
+def Message(message, title="Alert", OKButton=None):
+    Glyphs.notifications.append((title, message))
+
+
+# ---------- synthetic fonts ----------
+
+_CYRILLIC_NAMES = {
+    0x415: "Ie-cy", 0x435: "ie-cy", 0x418: "Ii-cy", 0x438: "ii-cy",
+    0x419: "Iishort-cy", 0x439: "iishort-cy", 0x428: "Sha-cy", 0x448: "sha-cy",
+    0x429: "Shcha-cy", 0x449: "shcha-cy",
+}
+
+BASIC_GLYPHS = (
+    [(chr(c), "%04X" % c) for c in range(0x41, 0x5B)]
+    + [(chr(c), "%04X" % c) for c in range(0x61, 0x7B)]
+    + [("zero one two three four five six seven eight nine".split()[i], "%04X" % (0x30 + i)) for i in range(10)]
+    + [("period", "002E"), ("comma", "002C"), ("hyphen", "002D")]
+    + [(_CYRILLIC_NAMES.get(c, "uni%04X" % c), "%04X" % c) for c in range(0x410, 0x450)]
+)
+
+HELPER_GLYPHS = [
+    ("Oslash", "00D8"), ("oslash", "00F8"), ("dotlessi", "0131"),
+    ("Io-cy", "0401"), ("io-cy", "0451"),
+    ("dotaccentcomb", "0307"), ("brevecomb-cy", None), ("brevecomb-cy.case", None),
+    ("dieresiscomb", "0308"), ("dieresiscomb.case", None),
+]
+
+
+def _rectPath(x0, y0, x1, y1):
+    p = GSPath()
+    p.nodes = [GSNode(pt, LINE) for pt in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))]
+    return p
+
+
+def _ringPaths(cx, cy, r, inner):
+    k = 0.5523
+    out = []
+    for radius, ccw in ((r, True), (inner, False)):
+        pts = [(cx + radius, cy), (cx, cy + radius), (cx - radius, cy), (cx, cy - radius)]
+        nodes = []
+        for i in range(4):
+            a, b = pts[i], pts[(i + 1) % 4]
+            da = (-(a[1] - cy), a[0] - cx)
+            db = (-(b[1] - cy), b[0] - cx)
+            nodes.append(GSNode((a[0] + k * da[0], a[1] + k * da[1]), OFFCURVE))
+            nodes.append(GSNode((b[0] - k * db[0], b[1] - k * db[1]), OFFCURVE))
+            nodes.append(GSNode(b, CURVE))
+        if not ccw:
+            nodes = [GSNode((2 * cx - n.x, n.y), n.type) for n in nodes]
+        p = GSPath()
+        p.nodes = nodes
+        out.append(p)
+    return out
+
+
+def syntheticFont(glyphCount=1000, masterCount=2, instanceCount=4, familyName="Synthetic"):
+    """A font with the demo's basic set, its helper glyphs and filler glyphs.
+
+    Even glyphs get a ring made of cubics, odd ones two rectangles; a few
+    glyphs are built from components, as in real families.
+    """
+    font = GSFont()
+    font.familyName = familyName
+    for m in range(masterCount):
+        font.masters.append(GSFontMaster("Master%d" % m, "m%02d" % m, capHeight=700 + 20 * m))
+    for i in range(instanceCount):
+        inst = GSInstance("Style%d" % i)
+        inst.font = font
+        font.instances.append(inst)
+
+    names = list(BASIC_GLYPHS) + list(HELPER_GLYPHS)
+    i = 0
+    while len(names) < glyphCount:
+        names.append(("glyph%05d" % i, "%04X" % (0xE000 + i) if i < 0x1900 else None))
+        i += 1
+    names = names[:max(glyphCount, 0)]
+
+    components = {
+        "Oslash": ("O", None), "oslash": ("o", None), "i": ("dotlessi", "dotaccentcomb"),
+        "Io-cy": ("Ie-cy", "dieresiscomb.case"), "io-cy": ("ie-cy", "dieresiscomb"),
+        "Iishort-cy": ("Ii-cy", "brevecomb-cy.case"), "iishort-cy": ("ii-cy", "brevecomb-cy"),
+    }
+    present = {n for n, _ in names}
+    for idx, (name, uni) in enumerate(names):
+        glyph = GSGlyph(name)
+        glyph.unicode = uni
+        font.glyphs.append(glyph)
+        for m, master in enumerate(font.masters):
+            layer = glyph.layers[master.id]
+            layer.width = 600 + 10 * m
+            comps = components.get(name)
+            if comps and all(c is None or c in present for c in comps):
+                for c in comps:
+                    if c:
+                        layer.shapes.append(GSComponent(c))
+            elif idx % 2 == 0:
+                for p in _ringPaths(300, 350, 260 + 5 * m, 150):
+                    layer.shapes.append(p)
+            else:
+                layer.shapes.append(_rectPath(60, 0, 140 + 5 * m, 700))
+                layer.shapes.append(_rectPath(60, 300, 540, 380))
+
+    font.classes.append(GSClass("Uppercase", " ".join(chr(c) for c in range(0x41, 0x5B))))
+    font.classes.append(GSClass("Fillers", " ".join(n for n, _ in names[-50:])))
+    font.features.append(GSFeature("liga", "sub f i by fi;"))
+    font.featurePrefixes.append(GSFeaturePrefix("languagesystems", "languagesystem DFLT dflt;"))
+    return font
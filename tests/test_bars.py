@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# Bars against references that do not share their code: the sampled
+# intervals of the original script (a containsPoint probe every 0.4 units)
+# and band areas from clipping a finely flattened outline.
+
+import math
+
+import pytest
+
+from serebrotype import bars, scanline
+from serebrotype.bands import sliceOutline
+from serebrotype.bars import barContours, barQuads, barRows, barSweep, parseSweepRange, sweepVariants
+from serebrotype.outline import outlineFromLayer
+from serebrotype.scanline import intervalsAtYs
+from serebrotype.standin import syntheticFont
+
+SAMPLE_STEP = 0.4
+CURVE_STEPS = 64
+
+_font = syntheticFont(40)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(scanline, "np", None)
+        monkeypatch.setattr(bars, "np", None)
+    return request.param
+
+
+def glyphOutlines(ringsOnly=False):
+    """Fresh outlines of the stand-in glyphs; odd glyphs overlap, rings do not."""
+    seen = set()
+    for master in _font.masters:
+        for idx, glyph in enumerate(_font.glyphs):
+            if ringsOnly and idx % 2:
+                continue
+            outline = outlineFromLayer(glyph.layers[master.id])
+            if outline is not None and repr(outline.contours) not in seen:
+                seen.add(repr(outline.contours))
+                yield glyph.name, outline
+
+
+def polygons(contours):
+    polys = []
+    for contour in contours:
+        points = []
+        for seg in contour:
+            if len(seg) == 2:
+                points.append(seg[0])
+                continue
+            (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+            for i in range(CURVE_STEPS):
+                t = i / CURVE_STEPS
+                mt = 1.0 - t
+                a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+                points.append((a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3))
+        polys.append(points)
+    return polys
+
+
+def crossings(polys, y):
+    """``(x, direction)`` of every polygon edge crossing the line at ``y``."""
+    out = []
+    for points in polys:
+        for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+            if y0 <= y < y1 or y1 <= y < y0:
+                out.append((x0 + (x1 - x0) * (y - y0) / (y1 - y0), 1 if y1 > y0 else -1))
+    return out
+
+
+def intervalsBySampling(polys, y, x_min, x_max, step=SAMPLE_STEP, minLen=0.4):
+    # The original script's sampler; containsPoint counts the nonzero
+    # winding of the crossings right of the probe.
+    line = crossings(polys, y)
+
+    def contains(x):
+        return sum(d for xc, d in line if xc > x) != 0
+
+    res = []
+    x = x_min
+    inside_prev = contains(x)
+    start = None
+    while x <= x_max:
+        inside = contains(x)
+        if inside and not inside_prev:
+            start = x
+        elif not inside and inside_prev and start is not None:
+            if x - start >= minLen:
+                res.append((start, x))
+            start = None
+        inside_prev = inside
+        x += step
+    if inside_prev and start is not None and x_max - start >= minLen:
+        res.append((start, x_max))
+    return res
+
+
+def clippedArea(polys, yBottom, yTop, x_min, x_max):
+    """Area of the polygons inside the band rectangle (Sutherland-Hodgman)."""
+    edges = [
+        lambda p: p[1] >= yBottom, lambda p: p[1] <= yTop,
+        lambda p: p[0] >= x_min, lambda p: p[0] <= x_max,
+    ]
+    limits = [(1, yBottom), (1, yTop), (0, x_min), (0, x_max)]
+    total = 0.0
+    for points in polys:
+        for inside, (axis, value) in zip(edges, limits):
+            out = []
+            for p, q in zip(points, points[1:] + points[:1]):
+                if inside(q):
+                    if not inside(p):
+                        out.append(_cut(p, q, axis, value))
+                    out.append(q)
+                elif inside(p):
+                    out.append(_cut(p, q, axis, value))
+            points = out
+            if not points:
+                break
+        total += signedArea(points)
+    return abs(total)
+
+
+def _cut(p, q, axis, value):
+    t = (value - p[axis]) / (q[axis] - p[axis])
+    return (p[0] + (q[0] - p[0]) * t, p[1] + (q[1] - p[1]) * t)
+
+
+def signedArea(points):
+    return 0.5 * sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]))
+
+
+@pytest.mark.parametrize("n", [5, 11, 23])
+def test_scanline_matches_sampling(backend, n):
+    for name, outline in glyphOutlines():
+        polys = polygons(outline.contours)
+        _, yMin, _, yMax = outline.bounds
+        ys = [(b + t) * 0.5 for b, t in barRows(yMin, yMax, n, 10.0)]
+        for y, spans in zip(ys, intervalsAtYs(outline, ys, 0.0, outline.width)):
+            sampled = intervalsBySampling(polys, y, 0.0, outline.width)
+            assert len(spans) == len(sampled), (name, y)
+            for (x0, x1), (s0, s1) in zip(spans, sampled):
+                # A sample lands up to one step past the exact crossing.
+                assert -0.01 <= s0 - x0 <= SAMPLE_STEP + 0.01, (name, y)
+                assert -0.01 <= s1 - x1 <= SAMPLE_STEP + 0.01, (name, y)
+
+
+@pytest.mark.parametrize("angleDeg", [0.0, 12.0])
+def test_bar_quads_match_sampled_bars(backend, angleDeg):
+    n, gap = 11, 20.0
+    tanA = math.tan(math.radians(angleDeg))
+    for name, outline in glyphOutlines():
+        polys = polygons(outline.contours)
+        _, yMin, _, yMax = outline.bounds
+        expected = []
+        for yBottom, yTop in barRows(yMin, yMax, n, gap):
+            dx = tanA * (yTop - yBottom)
+            for x0, x1 in intervalsBySampling(polys, (yBottom + yTop) * 0.5, 0.0, outline.width):
+                expected.append([(x0, yBottom), (x1, yBottom), (x1 + dx, yTop), (x0 + dx, yTop)])
+        quads = barQuads(outline, n, gap, angleDeg)
+        assert len(quads) == len(expected), name
+        for quad, ref in zip(quads, expected):
+            for (x, y), (rx, ry) in zip(quad, ref):
+                assert y == pytest.approx(ry)
+                assert -0.01 <= rx - x <= SAMPLE_STEP + 0.01, name
+
+
+@pytest.mark.parametrize("gap", [-25.0, 0.0, 20.0])
+def test_bar_contours_match_clipped_area(gap):
+    n = 9
+    for name, outline in glyphOutlines(ringsOnly=True):
+        polys = polygons(outline.contours)
+        _, yMin, _, yMax = outline.bounds
+        expected = sum(clippedArea(polys, b, t, 0.0, outline.width) for b, t in barRows(yMin, yMax, n, gap))
+        area = abs(sum(signedArea(points) for points in polygons(barContours(outline, n, gap))))
+        assert area == pytest.approx(expected, rel=1e-3), name
+
+
+@pytest.mark.parametrize("gap", [-40.0, -10.0, 0.0, 15.0])
+def test_band_areas_match_reference_clip(gap):
+    n = 7
+    for name, outline in glyphOutlines(ringsOnly=True):
+        polys = polygons(outline.contours)
+        _, yMin, _, yMax = outline.bounds
+        rows = barRows(yMin, yMax, n, gap)
+        for (yb, yt), band in zip(rows, sliceOutline(outline, rows, 0.0, outline.width)):
+            area = abs(sum(signedArea(points) for points in polygons(band)))
+            assert area == pytest.approx(clippedArea(polys, yb, yt, 0.0, outline.width), rel=1e-3), (name, yb)
+
+
+@pytest.mark.parametrize("text, cast, expected", [
+    ("5..21:4", int, [5, 9, 13, 17, 21]),
+    ("5..20:4", int, [5, 9, 13, 17]),
+    ("-10..10:5", float, [-10.0, -5.0, 0.0, 5.0, 10.0]),
+    ("0.1..0.3:0.1", float, [0.1, 0.2, 0.3]),
+    ("0.1..0.7:0.1", float, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7]),
+    ("5, 9; 5, 2..3", int, [5, 9, 2, 3]),
+])
+def test_parse_sweep_range(text, cast, expected):
+    assert parseSweepRange(text, cast) == expected
+
+
+@pytest.mark.parametrize("text", ["", " , ", "3..1", "1..3:0", "1..3:-1"])
+def test_parse_sweep_range_rejects(text):
+    with pytest.raises(ValueError):
+        parseSweepRange(text)
+
+
+@pytest.mark.parametrize("fitContour", [False, True])
+def test_sweep_matches_each_variant_alone(fitContour):
+    variants = sweepVariants([1, 4, 9], [-20.0, 0.0, 12.5, 5000.0], [0.0, 10.0], fitContour)
+    assert len(variants) == (12 if fitContour else 24)
+    # Fresh outlines for the sweep, so it cannot reuse the reference's caches.
+    for (name, outline), (_, swept) in zip(glyphOutlines(), glyphOutlines()):
+        for (n, gap, angleDeg), shapes, error in barSweep(swept, variants, fitContour):
+            if n > 1 and gap == 5000.0:
+                assert shapes is None and error == "Gap is too large for this height and number of bars.", name
+                continue
+            assert error is None, (name, n, gap, angleDeg)
+            if not fitContour:
+                assert shapes == barQuads(outline, n, gap, angleDeg), (name, n, gap, angleDeg)
+                continue
+            # Curves split at the y values of every variant differ in the last bit.
+            expected = barContours(outline, n, gap)
+            assert [[len(seg) for seg in c] for c in shapes] == [[len(seg) for seg in c] for c in expected]
+            flat = [v for c in shapes for seg in c for p in seg for v in p]
+            assert flat == pytest.approx([v for c in expected for seg in c for p in seg for v in p]), (name, n, gap)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Binary demos of small TTF and CFF fonts built with fontBuilder: the same
+# keep-set as the Glyphs pipeline, the trap swap, the .notdef mark, and the
+# renamed, licensed names.
+
+import os
+
+import pytest
+
+pytest.importorskip("fontTools")
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.recordingPen import DecomposingRecordingPen, RecordingPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from serebrotype.binarydemo import make_demo_binary
+from serebrotype.demo import DEMO_UNICODES, LICENSE_TEXT
+from serebrotype.notdef import scaled_notdef
+
+CAP_HEIGHT = 700
+# name: (codepoint, left, right) of the glyph's box
+GLYPHS = {
+    ".notdef": (None, 50, 450),
+    "A": (0x41, 10, 500),
+    "O": (0x4F, 40, 560),
+    "Oslash": (0xD8, 20, 580),
+    "a": (0x61, 30, 420),
+    "f": (0x66, 30, 300),
+    "i": (0x69, 60, 200),
+    "o": (0x6F, 40, 460),
+    "oslash": (0xF8, 20, 480),
+    "a.sc": (None, 30, 460),
+    "f_i": (None, 30, 520),
+    "uniE000": (0xE000, 50, 550),
+}
+FEATURES = """
+languagesystem DFLT dflt;
+feature smcp { sub a by a.sc; } smcp;
+feature liga { sub f i by f_i; } liga;
+"""
+
+
+def draw_box(pen, left, right):
+    pen.moveTo((left, 0))
+    pen.lineTo((left, CAP_HEIGHT))
+    pen.lineTo((right, CAP_HEIGHT))
+    pen.lineTo((right, 0))
+    pen.closePath()
+
+
+def build_font(path, cff):
+    order = list(GLYPHS)
+    fb = FontBuilder(1000, isTTF=not cff)
+    fb.setupGlyphOrder(order)
+    fb.setupCharacterMap({code: name for name, (code, _, _) in GLYPHS.items() if code})
+    metrics = {name: (right + 40, left) for name, (_, left, right) in GLYPHS.items()}
+    if cff:
+        charstrings = {}
+        for name, (_, left, right) in GLYPHS.items():
+            pen = T2CharStringPen(metrics[name][0], None)
+            draw_box(pen, left, right)
+            charstrings[name] = pen.getCharString()
+        fb.setupCFF("ProbeSans-Regular", {"FullName": "Probe Sans Regular", "FamilyName": "Probe Sans"},
+                    charstrings, {})
+    else:
+        glyphs = {}
+        for name, (_, left, right) in GLYPHS.items():
+            pen = TTGlyphPen(None)
+            draw_box(pen, left, right)
+            glyphs[name] = pen.glyph()
+        fb.setupGlyf(glyphs)
+    fb.setupHorizontalMetrics(metrics)
+    fb.setupHorizontalHeader(ascent=800, descent=-200)
+    fb.setupNameTable(dict(familyName="Probe Sans", styleName="Regular", fullName="Probe Sans Regular",
+                           psName="ProbeSans-Regular", uniqueFontIdentifier="ProbeSans-Regular"))
+    fb.setupOS2(sCapHeight=CAP_HEIGHT)
+    fb.setupPost()
+    fb.addOpenTypeFeatures(FEATURES)
+    fb.save(path)
+    return path
+
+
+def outline(font, name):
+    pen = DecomposingRecordingPen(font.getGlyphSet())
+    font.getGlyphSet()[name].draw(pen)
+    return pen.value
+
+
+@pytest.fixture(params=["ttf", "otf"])
+def demo(request, tmp_path):
+    source = build_font(str(tmp_path / ("ProbeSans-Regular." + request.param)), request.param == "otf")
+    path = make_demo_binary(source, str(tmp_path / "demo"), apply_trial_trap=True, notdef_mode=1)
+    return TTFont(source), TTFont(path), path
+
+
+def test_keeps_the_glyph_pipelines_unicode_set(demo):
+    source, font, _ = demo
+    # Ø/ø only lend their drawings to O/o; a.sc and f_i have no codepoint.
+    kept = [name for name, (code, _, _) in GLYPHS.items() if name == ".notdef" or code in DEMO_UNICODES]
+    assert kept == [".notdef", "A", "O", "a", "f", "i", "o"]
+    assert font.getGlyphOrder() == kept
+    assert font.getBestCmap() == {code: name for code, name in source.getBestCmap().items() if code in DEMO_UNICODES}
+    gsub = font["GSUB"].table
+    assert not gsub.LookupList or not gsub.LookupList.LookupCount
+
+
+def test_trap_draws_the_swapped_glyphs(demo):
+    source, font, _ = demo
+    assert outline(font, "O") == outline(source, "Oslash")
+    assert outline(font, "o") == outline(source, "oslash")
+    assert font["hmtx"]["O"][0] == source["hmtx"]["Oslash"][0]
+    assert outline(font, "A") == outline(source, "A")
+
+
+def test_notdef_carries_the_demo_mark(demo):
+    _, font, _ = demo
+    width, contours = scaled_notdef("demo", CAP_HEIGHT)
+    pen = RecordingPen()
+    font.getGlyphSet()[".notdef"].draw(pen)
+    assert [op for op, _ in pen.value].count("closePath") == len(contours)
+    assert font["hmtx"][".notdef"][0] == width
+
+
+def test_names_and_license(demo):
+    _, font, path = demo
+    name = font["name"]
+    assert name.getDebugName(1) == "Probe Sans (Demo)"
+    assert name.getDebugName(4) == "Probe Sans (Demo) Regular"
+    assert name.getDebugName(6) == "ProbeSansDemo-Regular"
+    assert name.getDebugName(13) == LICENSE_TEXT.format("Demo")
+    assert os.path.basename(path) == "ProbeSansDemo-Regular" + os.path.splitext(path)[1]
+    if "CFF " in font:
+        cff = font["CFF "].cff
+        assert cff.fontNames == ["ProbeSansDemo-Regular"]
+        assert cff.topDictIndex[0].FamilyName == "Probe Sans (Demo)"
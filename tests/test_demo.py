@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# Demo fonts built on the stand-in: font-level data must survive the
+# subset copy, the glyph index must find what a scan of every glyph finds,
+# glyph removal must leave kerning and components consistent, and glyphs
+# from the demo cache must match rebuilt ones.
+
+import pytest
+
+from serebrotype.demo import (
+    DEMO_PROFILES, DemoProfile, GlyphIndex, build_subset_font, demo_glyph_names, make_trial_font, remove_glyphs,
+)
+from serebrotype.democache import (
+    DemoGlyphCache, demo_glyph_key, demo_options_key, layer_data, restore_glyph,
+)
+from serebrotype.standin import (
+    GSAnchor, GSComponent, GSFont, GSGlyph, GSGuide, GSHint, GSLayer, GSMetric, syntheticFont,
+)
+
+
+def test_subset_font_keeps_font_level_data():
+    font = syntheticFont(60)
+    master_id = font.masters[0].id
+    font.note = "Spacing notes"
+    font.userData["com.example.proof"] = {"size": 72}
+    font.metrics = [GSMetric("ascender", id="m-asc"), GSMetric("xHeight", id="m-xh")]
+    font.stems = [GSMetric(name="Stem", id="s-1")]
+    a, b, dropped = (font.glyphs[name].id for name in ("A", "B", "seven"))
+    font.kerningRTL = {master_id: {a: {b: -30, dropped: 10}}}
+    font.kerningVertical = {master_id: {dropped: {a: 5}}}
+
+    subset = build_subset_font(font, {"A", "B", "O"})
+    assert subset.note == "Spacing notes"
+    assert subset.userData["com.example.proof"] == {"size": 72}
+    assert [metric.id for metric in subset.metrics] == ["m-asc", "m-xh"]
+    assert subset.metrics[0] is not font.metrics[0]
+    assert [stem.id for stem in subset.stems] == ["s-1"]
+    assert subset.kerningRTL == {master_id: {a: {b: -30}}}
+    assert subset.kerningVertical == {}
+
+
+
+
+def scanned_names(font, codepoints):
+    return {glyph.name for glyph in font.glyphs if glyph.unicode and int(glyph.unicode, 16) in codepoints}
+
+
+def scanned_closure(font, names):
+    result = set(names)
+    while True:
+        refs = {component.componentName for name in result if font.glyphs[name]
+                for layer in font.glyphs[name].layers for component in layer.components}
+        if refs <= result:
+            return result
+        result |= refs
+
+
+@pytest.mark.parametrize("profile", DEMO_PROFILES, ids=lambda profile: profile.name)
+def test_glyph_index_matches_a_scan_of_every_glyph(profile):
+    font = syntheticFont(300)
+    index = GlyphIndex(font)
+    names = scanned_names(font, profile.unicodes)
+    assert index.names_for_unicodes(profile.unicodes) == names
+    assert demo_glyph_names(font, index, profile) == names | {".notdef"}
+    assert index.closure(names) == scanned_closure(font, names)
+
+
+def test_glyph_index_edge_cases():
+    font = syntheticFont(300)
+    font.glyphs["glyph00000"].unicode = "0041"   # after A in glyph order
+    font.glyphs["glyph00001"].unicode = "nope"
+    # A component only the second master uses, and a cycle.
+    font.glyphs["B"].layers[1].shapes.append(GSComponent("glyph00002"))
+    font.glyphs["glyph00002"].layers[0].shapes = [GSComponent("B")]
+    index = GlyphIndex(font)
+    assert index.names_for_unicodes([0x41, 0x42, 0x10FFFF]) == {"A", "B"}
+    assert index.components["B"] == {"glyph00002"}
+    assert index.closure(["B"]) == {"B", "glyph00002"}
+    assert index.closure(["Io-cy", "missing"]) == {"Io-cy", "Ie-cy", "dieresiscomb.case", "missing"}
+    assert index.closure([]) == set()
+    assert demo_glyph_names(font, index, DemoProfile("A only", {0x41}, required_glyphs=("zero",))) == {"A", "zero"}
+
+
+def outline_nodes(layer):
+    return [[(node.x, node.y, node.type) for node in path.nodes] for path in layer._decomposedPaths()]
+
+
+def kerned_font():
+    """Stand-in font with kerning on glyphs and groups, some of which only removed glyphs use."""
+    font = syntheticFont(300)
+    glyphs = font.glyphs
+    glyphs["O"].rightKerningGroup = glyphs["Oslash"].rightKerningGroup = "O"
+    glyphs["A"].leftKerningGroup = "A"
+    glyphs["seven"].rightKerningGroup = "seven"
+    a, o, oslash, seven = (glyphs[name].id for name in ("A", "O", "Oslash", "seven"))
+    for attr in ("kerning", "kerningRTL"):
+        setattr(font, attr, {master.id: {
+            a: {o: -10, oslash: -20, "@MMK_R_A": 4},
+            o: {a: -12},
+            "@MMK_L_O": {"@MMK_R_A": -5, seven: 3},
+            "@MMK_L_seven": {"@MMK_R_A": 7},
+        } for master in font.masters})
+    return font
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_remove_glyphs_fixes_kerning_and_groups(monkeypatch, bulk):
+    if not bulk:
+        monkeypatch.delattr(GSFont, "removeGlyphs_")
+    font = kerned_font()
+    a = font.glyphs["A"].id
+    assert remove_glyphs(font, ["O", "seven", "no-such-glyph"]) == 2
+    assert font.glyphs["O"] is None and font.glyphs["seven"] is None
+    # The O group lives on through Oslash; the seven group had no one else.
+    expected = {a: {font.glyphs["Oslash"].id: -20, "@MMK_R_A": 4}, "@MMK_L_O": {"@MMK_R_A": -5}}
+    for attr in ("kerning", "kerningRTL"):
+        assert getattr(font, attr) == {master.id: expected for master in font.masters}
+
+
+def test_removing_nothing_keeps_kerning():
+    font = kerned_font()
+    before = {master: {left: dict(row) for left, row in pairs.items()} for master, pairs in font.kerning.items()}
+    assert remove_glyphs(font, ["no-such-glyph"]) == 0
+    assert font.kerning == before and len(font.glyphs) == 300
+
+
+def test_remove_glyphs_decomposes_only_removed_components():
+    font = syntheticFont(300)
+    # Oslash -> O, and a kept glyph two components away from a removed one.
+    for layer in font.glyphs["B"].layers:
+        layer.shapes = [GSComponent("Oslash", (50, 0)), GSComponent("A")]
+    before = {name: [outline_nodes(layer) for layer in font.glyphs[name].layers] for name in ("B", "i", "Io-cy")}
+
+    remove_glyphs(font, ["O", "Oslash", "dotaccentcomb"])
+    for name, outlines in before.items():
+        assert [outline_nodes(layer) for layer in font.glyphs[name].layers] == outlines, name
+    for layer in font.glyphs["B"].layers:
+        assert [shape.componentName for shape in layer.components] == ["A"]
+    for layer in font.glyphs["i"].layers:
+        assert [shape.componentName for shape in layer.components] == ["dotlessi"]
+    for layer in font.glyphs["Io-cy"].layers:
+        assert [shape.componentName for shape in layer.components] == ["Ie-cy", "dieresiscomb.case"]
+
+
+def decorated_font():
+    """Stand-in font whose A and Io-cy carry anchors, hints, guides and other layer data."""
+    font = syntheticFont(300)
+    for layer in font.glyphs["A"].layers:
+        layer.anchors = [GSAnchor("top", (300, 700)), GSAnchor("bottom", (300, 0))]
+        hint = GSHint()
+        hint.type, hint.horizontal = "Stem", True
+        hint.originNode = layer.shapes[0].nodes[0]
+        hint.targetNode = layer.shapes[0].nodes[1]
+        layer.hints = [hint]
+        guide = GSGuide()
+        guide.position, guide.angle, guide.name = (0, 350), 90.0, "middle"
+        layer.guides = [guide]
+        layer.userData["com.example.note"] = ["keep", 1]
+        layer.background.shapes = [shape.copy() for shape in layer.shapes]
+        layer.background.anchors = [GSAnchor("top", (310, 700))]
+    for layer in font.glyphs["Io-cy"].layers:
+        layer.anchors = [GSAnchor("top", (300, 720))]
+        layer.shapes[0].alignment = -1
+        layer.shapes[0].smartComponentValues["Width"] = 40
+    return font
+
+
+def test_cached_glyph_keeps_layer_data(tmp_path):
+    font = decorated_font()
+    cache = DemoGlyphCache(str(tmp_path))
+    options = dict(notdef_mode=1, open_in_glyphs=False, font=font, cache=cache)
+    built = make_trial_font(**options)
+    cache.hits = cache.misses = 0
+    reused = make_trial_font(**options)
+    assert cache.misses == 0 and cache.hits > 0
+    for name in ("A", "Io-cy"):
+        for built_layer, reused_layer in zip(built.glyphs[name].layers, reused.glyphs[name].layers):
+            assert layer_data(reused_layer) == layer_data(built_layer)
+    assert [a.name for a in reused.glyphs["A"].layers[0].anchors] == ["top", "bottom"]
+
+
+def test_restore_fills_a_bare_glyph(tmp_path):
+    font = decorated_font()
+    cache = DemoGlyphCache(str(tmp_path))
+    source = font.glyphs["A"]
+    assert cache.put("k" * 40, source)
+
+    bare = GSGlyph("A")
+    for layer in source.layers:
+        empty = GSLayer()
+        empty.layerId = layer.layerId
+        bare.layers.append(empty)
+    restore_glyph(bare, cache.get("k" * 40))
+    for layer, restored in zip(source.layers, bare.layers):
+        assert layer_data(restored) == layer_data(layer)
+        assert restored.hints[0].originNode is restored.shapes[0].nodes[0]
+
+
+def test_anchor_edit_changes_the_cache_key():
+    font = decorated_font()
+    options_key = demo_options_key("Demo", False, 0, [m.id for m in font.masters])
+    before = demo_glyph_key(font, "A", options_key)
+    font.glyphs["A"].layers[0].anchors[0].position = (305, 700)
+    assert demo_glyph_key(font, "A", options_key) != before
+
+
+def test_uncacheable_layer_data_is_not_stored(tmp_path):
+    font = decorated_font()
+    font.glyphs["A"].layers[0].userData["com.example.blob"] = object()
+    options_key = demo_options_key("Demo", False, 0, [m.id for m in font.masters])
+    assert demo_glyph_key(font, "A", options_key) is None
+    assert not DemoGlyphCache(str(tmp_path)).put("k" * 40, font.glyphs["A"])
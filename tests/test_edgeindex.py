@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# The edge index against a scan over every edge: scanlines through the
+# index must see exactly the spans of the full scan, also on bucket
+# boundaries and on vertices.
+
+import pytest
+
+from serebrotype import scanline
+from serebrotype.edgeindex import EdgeIndex
+from serebrotype.outline import Outline, outlineFromLayer
+from serebrotype.scanline import crossingsAtY, intervalsAtY, intervalsAtYs, intervalsFromCrossings
+from serebrotype.standin import syntheticFont
+
+X_MIN, X_MAX = -1000.0, 2000.0
+# Drops the zero width spans where a scanline touches a curve's y extreme.
+MIN_LEN = 1e-6
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(scanline, "np", None)
+    return request.param
+
+
+def staircase():
+    """Steps of height 10 so vertices fall on the bucket boundaries of 10, 20, 40 or 80 buckets."""
+    points = [(0.0, 0.0), (800.0, 0.0)]
+    for i in range(1, 81):
+        points += [(800.0 - 10 * (i - 1), 10.0 * i), (800.0 - 10 * i, 10.0 * i)]
+    points.append((0.0, 800.0))
+    square = [(300.0, 100.0), (300.0, 300.0), (500.0, 300.0), (500.0, 100.0)]
+    curve = [((100.0, 400.0), (100.0, 600.0), (300.0, 600.0), (300.0, 400.0)), ((300.0, 400.0), (100.0, 400.0))]
+    return Outline([polygon(points), polygon(square), curve], 800.0)
+
+
+def polygon(points):
+    return [(p, q) for p, q in zip(points, points[1:] + points[:1])]
+
+
+def outlines():
+    yield "staircase", staircase()
+    font = syntheticFont(12)
+    for glyph in font.glyphs:
+        for layer in glyph.layers:
+            outline = outlineFromLayer(layer)
+            if outline is not None:
+                yield glyph.name, outline
+
+
+def scanlines(index):
+    """Every bucket boundary and vertex, and just beside them."""
+    ys = {index.yMin + b * index.step for b in range(len(index.buckets) + 1)}
+    ys.update(y for e in index.edges for y in (e[0], e[1]))
+    ys.update(point[1] for e in index.edges for point in e[3])
+    return sorted(ys | {y + d for y in ys for d in (-1e-7, 1e-7)})
+
+
+def bruteForce(outline, y):
+    return intervalsFromCrossings(crossingsAtY(outline.edges, y), X_MIN, X_MAX, MIN_LEN)
+
+
+@pytest.mark.parametrize("bucketCount", [None, 1, 7, 10, 40, 80, 500])
+def test_index_spans_match_a_scan_over_all_edges(backend, bucketCount):
+    for name, outline in outlines():
+        index = EdgeIndex(outline.edges, bucketCount)
+        outline.derived["edgeIndex"] = index
+        ys = scanlines(index)
+        expected = [bruteForce(outline, y) for y in ys]
+        assert any(expected), name
+        # NumPy bisects cubic roots where Python stops at |f| < 1e-9; next to
+        # a curve's y extreme that moves x by up to about 1e-5.
+        for y, spans, found in zip(ys, expected, intervalsAtYs(outline, ys, X_MIN, X_MAX, MIN_LEN)):
+            assert len(found) == len(spans), (name, y)
+            assert found == [pytest.approx(span, abs=1e-4) for span in spans], (name, y)
+            assert intervalsAtY(outline, y, X_MIN, X_MAX, MIN_LEN) == spans, (name, y)
+
+
+@pytest.mark.parametrize("bucketCount", [None, 1, 10, 80])
+def test_edges_match_a_scan_over_all_edges(bucketCount):
+    outline = staircase()
+    edges = outline.edges
+    index = EdgeIndex(edges, bucketCount)
+    ys = scanlines(index)
+    for y in ys:
+        assert index.edgesAtY(y) == [e for e in edges if e[0] <= y < e[1]], y
+    for y0, y1 in zip(ys, ys[7:]):
+        assert index.edgesInRange(y0, y1) == [e for e in edges if e[0] <= y1 and y0 <= e[1]], (y0, y1)
+    assert index.edgesAtY(index.yMax) == [] and index.edgesInRange(-50.0, -1.0) == []
+
+
+def test_empty_index():
+    index = EdgeIndex([])
+    assert len(index) == 0 and index.edgesAtY(0.0) == [] and index.edgesInRange(-1.0, 1.0) == []
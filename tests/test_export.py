@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+# Export on the stand-in: generate() must be called in the convention its
+# signature asks for, binaries must be built from the real instance's
+# settings, and the manifest must notice every edit interpolation reads.
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from serebrotype import export
+from serebrotype.export import (
+    DEFAULT_GENERATE_NAMES, binary_instance, export_instance, export_instances, export_session,
+    generate_arguments, probe_generate,
+)
+from serebrotype.interpolation import InterpolationCache, font_content_hash, shared_interpolation_cache
+from serebrotype.standin import (
+    GSAnchor, GSClass, GSFeature, GSFont, GSFontInfoProperty, GSInstance, _Instances, syntheticFont,
+)
+
+
+
+class LowerCase(object):
+    def generate(self, format="OTF", fontPath=None, autoHint=True, removeOverlap=True, useProductionNames=True):
+        pass
+
+class UpperCase(object):
+    def generate(self, Format="OTF", FontPath=None, AutoHint=True, RemoveOverlap=True, UseProductionNames=True):
+        pass
+
+class FontFirst(object):
+    def generate(self, font, format="OTF", path=None):
+        pass
+
+class KeywordsOnly(object):
+    def generate(self, **kwargs):
+        pass
+
+class SomeKeywords(object):
+    def generate(self, Font, format, fontPath, **kwargs):
+        pass
+
+class Opaque(object):
+    # What inspect makes of a callable it cannot read, such as some bridged methods.
+    __signature__ = "unreadable"
+
+    def __call__(self, *args, **kwargs):
+        pass
+
+LOWER_NAMES = dict(format="format", path="fontPath", autohint="autoHint",
+                   remove_overlap="removeOverlap", production_names="useProductionNames")
+
+
+@pytest.mark.parametrize("generate, pass_font, names", [
+    (LowerCase().generate, False, LOWER_NAMES),
+    (UpperCase().generate, False, dict(format="Format", path="FontPath", autohint="AutoHint",
+                                       remove_overlap="RemoveOverlap", production_names="UseProductionNames")),
+    (FontFirst().generate, True, dict(format="format", path="path")),
+    (KeywordsOnly().generate, False, DEFAULT_GENERATE_NAMES),
+    (SomeKeywords().generate, True, dict(DEFAULT_GENERATE_NAMES, path="fontPath")),
+    (Opaque(), False, DEFAULT_GENERATE_NAMES),
+    (GSInstance("Regular").generate, False, DEFAULT_GENERATE_NAMES),
+], ids=["lower", "upper", "font-first", "kwargs", "some-kwargs", "opaque", "stand-in"])
+def test_probe_generate(generate, pass_font, names):
+    convention = probe_generate(generate)
+    assert convention.pass_font is pass_font
+    assert convention.names == names
+
+
+def test_generate_arguments_follow_the_probed_convention(monkeypatch):
+    monkeypatch.setattr(export, "_conventions", {})
+    flags = dict(autohint=False, remove_overlap=True, production_names=False)
+    font = GSFont()
+    # Flags the signature has no name for are left at generate()'s defaults.
+    assert generate_arguments(FontFirst(), font, "TTF", "/tmp/a.ttf", flags) == (
+        (font,), {"format": "TTF", "path": "/tmp/a.ttf"})
+    assert generate_arguments(LowerCase(), font, "OTF", "/tmp/a.otf", flags) == ((), {
+        "format": "OTF", "fontPath": "/tmp/a.otf", "autoHint": False, "removeOverlap": True,
+        "useProductionNames": False})
+    assert sorted(cls.__name__ for cls in export._conventions) == ["FontFirst", "LowerCase"]
+
+    probes = []
+    monkeypatch.setattr(export, "probe_generate", lambda generate: probes.append(generate) or probe_generate(generate))
+    generate_arguments(FontFirst(), font, "OTF", "/tmp/b.otf", flags)
+    assert probes == []
+
+
+def styled_instance(font):
+    instance = font.instances[1]
+    instance.weightClass, instance.widthClass = 700, 3
+    instance.isBold, instance.isItalic, instance.linkStyle = True, True, "Style0"
+    instance.customParameters["panose"] = [2, 11, 8, 3]
+    instance.customParameters["Rename Glyphs"] = ["a=b"]
+    instance.properties = [GSFontInfoProperty("styleNames", "Gras", "FRA")]
+    return instance
+
+
+def test_binary_instance_is_the_interpolated_fonts_own():
+    font = syntheticFont(60)
+    instance = styled_instance(font)
+    interp = instance.interpolatedFont
+    plain = binary_instance(interp, instance)
+    assert list(interp.instances) == [plain] and plain is not instance
+    # Glyph renames are done by interpolatedFont; generate() must not swap back.
+    assert plain.customParameters == {"panose": [2, 11, 8, 3]}
+    assert instance.customParameters["Rename Glyphs"] == ["a=b"]
+
+
+def test_binary_instance_copies_instance_settings():
+    font = syntheticFont(60)
+    instance = styled_instance(font)
+    instance.axes = [120.0]
+    interp = instance.interpolatedFont
+    interp.masters[0].axes = [80.0]
+    interp.instances = _Instances(interp)
+
+    plain = binary_instance(interp, instance)
+    assert plain is not instance and plain.font is interp
+    assert plain.axes == [80.0]
+    assert (plain.weightClass, plain.widthClass) == (700, 3)
+    assert (plain.isBold, plain.isItalic, plain.linkStyle) == (True, True, "Style0")
+    assert plain.customParameters == {"panose": [2, 11, 8, 3]}
+    assert [(p.key, p.value, p.languageTag) for p in plain.properties] == [("styleNames", "Gras", "FRA")]
+    assert binary_instance(interp, instance) is plain
+    assert instance.font is font and instance.axes == [120.0]
+
+
+def test_glyphs_calls_never_overlap(tmp_path, monkeypatch):
+    active, overlaps = [0], []
+
+    def tracked(method):
+        def call(*args, **kwargs):
+            active[0] += 1
+            overlaps.append(active[0])
+            time.sleep(0.002)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                active[0] -= 1
+        return call
+
+    monkeypatch.setattr(GSInstance, "generate", tracked(GSInstance.generate))
+    monkeypatch.setattr(GSInstance, "interpolatedFont", property(tracked(GSInstance.interpolatedFont.fget)))
+    monkeypatch.setattr(GSFont, "save", tracked(GSFont.save))
+    font = syntheticFont(60, instanceCount=6)
+    cache = InterpolationCache()
+    results = list(export_session(font, font.instances, str(tmp_path), formats=["TTF", "OTF"],
+                                  source=True, workers=4, cache=cache))
+    assert len(results) == 18 and not [r for r in results if r.error]
+    assert max(overlaps) == 1
+    assert cache.stats()["misses"] == 6
+
+
+def test_cache_builds_each_key_once():
+    cache = InterpolationCache()
+    font = syntheticFont(20)
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.01)
+        return font, None
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        entries = list(pool.map(lambda _: cache.get_or_build("k", build), range(4)))
+    assert len(builds) == 1 and all(entry[0] is font for entry in entries)
+
+
+def edited_font():
+    """Stand-in font with the data edits below touch."""
+    font = syntheticFont(60)
+    font.versionMajor, font.versionMinor = 1, 0
+    font.classes = [GSClass("LC", "a b")]
+    font.features = [GSFeature("smcp", "sub @LC by @SC;")]
+    font.glyphs["A"].layers[0].anchors = [GSAnchor("top", (300, 700))]
+    return font
+
+
+def edit_feature(font):
+    font.features[0].code = "sub a by a.sc;"
+
+def edit_class(font):
+    font.classes[0].code = "a"
+
+def edit_version(font):
+    font.versionMinor = 2
+
+def edit_font_parameter(font):
+    font.customParameters["vendorID"] = "SRBT"
+
+def edit_master_parameter(font):
+    font.masters[0].customParameters["underlinePosition"] = -120
+
+def edit_master_metric(font):
+    font.masters[0].capHeight = 710
+
+def edit_unicode(font):
+    font.glyphs["B"].unicode = "E000"
+
+def edit_kerning_group(font):
+    font.glyphs["B"].leftKerningGroup = "H"
+
+def edit_anchor(font):
+    font.glyphs["A"].layers[0].anchors[0].position = (310, 700)
+
+def edit_name(font):
+    font.properties = [GSFontInfoProperty("familyNames", "Sérébro", "FRA")]
+
+
+@pytest.mark.parametrize("edit", [
+    edit_feature, edit_class, edit_version, edit_font_parameter, edit_master_parameter,
+    edit_master_metric, edit_unicode, edit_kerning_group, edit_anchor, edit_name,
+])
+def test_content_hash_sees_every_edit(edit):
+    font = edited_font()
+    before = font_content_hash(font)
+    assert font_content_hash(font) == before
+    edit(font)
+    assert font_content_hash(font) != before
+
+
+def edit_instance(font):
+    font.instances[0].weightClass = 700
+
+
+@pytest.mark.parametrize("edit", [edit_feature, edit_version, edit_name, edit_master_parameter, edit_instance])
+def test_manifest_entry_is_stale_after_an_edit(tmp_path, edit):
+    font = edited_font()
+    options = dict(formats=["TTF"], source=True, cache=InterpolationCache())
+
+    def skipped():
+        results = list(export_session(font, font.instances[:1], str(tmp_path), **options))
+        assert results and all(result.error is None for result in results)
+        return [result.skipped for result in results]
+
+    assert skipped() == [False, False]
+    assert skipped() == [True, True]
+    edit(font)
+    assert skipped() == [False, False]
+
+
+def test_session_keeps_no_interpolations_unless_asked(tmp_path):
+    font = syntheticFont(60)
+    shared_interpolation_cache.clear()
+    results = list(export_session(font, font.instances, str(tmp_path), formats=["TTF"], max_pending=2))
+    assert len(results) == 4 and len(shared_interpolation_cache) == 0
+
+    list(export_session(font, font.instances, str(tmp_path / "again"), formats=["TTF"],
+                        cache=shared_interpolation_cache))
+    assert len(shared_interpolation_cache) == 4
+    shared_interpolation_cache.clear()
+
+
+def test_export_instances_reports_each_instance(tmp_path, monkeypatch):
+    generate = GSInstance.generate
+    interpolations = []
+
+    def failing_generate(self, *args, **kwargs):
+        if self.name == "Style1":
+            raise IOError("disk full")
+        return generate(self, *args, **kwargs)
+
+    def interpolated(self):
+        interpolations.append(self.name)
+        return interpolated_font(self)
+
+    interpolated_font = GSInstance.interpolatedFont.fget
+    monkeypatch.setattr(GSInstance, "generate", failing_generate)
+    monkeypatch.setattr(GSInstance, "interpolatedFont", property(interpolated))
+    font = syntheticFont(60)
+    results = {r.instance.name: r for r in export_instances(font, font.instances, str(tmp_path), "TTF",
+                                                            stem_for=lambda i: "Demo-" + i.name, workers=3)}
+    assert sorted(results) == ["Style0", "Style1", "Style2", "Style3"]
+    assert sorted(interpolations) == sorted(results)
+    failed = results.pop("Style1")
+    assert failed.path is None and "disk full" in str(failed.error) and failed.seconds >= 0
+    for name, result in results.items():
+        assert result.error is None and result.path == str(tmp_path / ("Demo-%s.ttf" % name))
+        with open(result.path, "rb") as fh:
+            assert fh.read().startswith(("TTF %s " % name).encode())
+    assert sorted(os.listdir(str(tmp_path))) == ["Demo-Style0.ttf", "Demo-Style2.ttf", "Demo-Style3.ttf"]
+
+
+def write_outputs(*names):
+    """A generate() that writes `names` into the folder of the path it is given."""
+    def generate(self, *args, **kwargs):
+        folder = os.path.dirname(kwargs.get("fontPath", kwargs.get("FontPath", kwargs.get("path"))))
+        for name in names:
+            if name.endswith("/"):
+                os.makedirs(os.path.join(folder, name))
+            else:
+                with open(os.path.join(folder, name), "w") as fh:
+                    fh.write(name)
+    return generate
+
+
+def test_export_moves_the_one_written_file(tmp_path, monkeypatch):
+    font = syntheticFont(20)
+    monkeypatch.setattr(GSInstance, "generate", write_outputs("Other.ttf.log", "Whatever.ttf"))
+    path = export_instance(font, font.instances[0], str(tmp_path), "TTF", stem="Synthetic-Style0")
+    assert path == str(tmp_path / "Synthetic-Style0.ttf")
+    with open(path) as fh:
+        assert fh.read() == "Whatever.ttf"
+    assert os.listdir(str(tmp_path)) == ["Synthetic-Style0.ttf"]
+
+
+@pytest.mark.parametrize("names, count", [
+    ((), 0),
+    (("One.ttf", "Two.ttf"), 2),
+    (("Folder.ttf/",), 0),
+])
+def test_export_rejects_anything_but_one_file(tmp_path, monkeypatch, names, count):
+    font = syntheticFont(20)
+    monkeypatch.setattr(GSInstance, "generate", write_outputs(*names))
+    with pytest.raises(RuntimeError, match="expected one .ttf file, got %d" % count):
+        export_instance(font, font.instances[0], str(tmp_path), "TTF")
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_failed_generate_leaves_no_work_folder(tmp_path, monkeypatch):
+    def generate(self, *args, **kwargs):
+        write_outputs("Half.ttf")(self, *args, **kwargs)
+        raise IOError("compiler crashed")
+
+    font = syntheticFont(20)
+    monkeypatch.setattr(GSInstance, "generate", generate)
+    with pytest.raises(RuntimeError, match="compiler crashed"):
+        export_instance(font, font.instances[0], str(tmp_path), "TTF")
+    assert os.listdir(str(tmp_path)) == []
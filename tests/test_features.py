@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Feature pruning against a fixed glyph set: what survives must be the
+# same code minus missing glyphs, and must still compile.
+
+import pytest
+
+from serebrotype.features import prune_code, prune_font_features
+from serebrotype.standin import GSClass, GSFeature, GSFont, GSGlyph
+
+GLYPHS = frozenset("""
+    .notdef a b c e A B C a.sc c.sc acutecomb lam_meem_jeem f i f_i
+""".split())
+
+
+def pruned(code):
+    return prune_code(code, GLYPHS)[0]
+
+
+def test_mark_class_keeps_surviving_marks():
+    code = ("markClass [acutecomb gravecomb] <anchor 0 500> @TOP;\n"
+            "feature mark { pos base [a e] <anchor 250 450> mark @TOP; } mark;")
+    assert pruned(code) == (
+        "markClass [acutecomb] <anchor 0 500> @TOP;\n"
+        "feature mark { pos base [a e] <anchor 250 450> mark @TOP; } mark;")
+
+
+def test_emptied_mark_class_drops_its_rules_and_filter_flag():
+    code = ("markClass gravecomb <anchor 0 500> @TOP;\n"
+            "feature mark { lookupflag UseMarkFilteringSet @TOP; pos base a <anchor 250 450> mark @TOP; "
+            "sub a by b; } mark;")
+    assert pruned(code) == "\nfeature mark { lookupflag 0; sub a by b; } mark;"
+
+
+def test_ligature_attachment_is_kept():
+    code = ("markClass acutecomb <anchor 0 500> @TOP;\n"
+            "feature mark { pos ligature lam_meem_jeem <anchor 625 1800> mark @TOP "
+            "ligComponent <anchor 376 1800> mark @TOP; } mark;")
+    assert pruned(code) == code
+
+
+@pytest.mark.parametrize("rule", [
+    "sub [a-c] by [A-C];",
+    "sub [a - c] by [A - C];",
+    'sub $[name endswith ".sc"] by a;',
+])
+def test_ranges_and_predicates_are_left_alone(rule):
+    code = "feature smcp { %s } smcp;" % rule
+    assert pruned(code) == code
+
+
+def test_hyphenated_glyph_name_is_not_a_range():
+    assert pruned("feature smcp { sub [a a-cy] by [A A]; } smcp;") == "feature smcp { sub [a] by [A]; } smcp;"
+
+
+def test_paired_classes_are_pruned_together():
+    code = ("@LC = [a b c];\n@SC = [a.sc b.sc c.sc];\n@LC2 = [a b e];\n@SC2 = [a.sc b.sc e.sc];\n"
+            "feature smcp { sub @LC by @SC; sub @LC2 by @SC2; sub [a b c] by [A B.missing C]; } smcp;")
+    assert pruned(code) == (
+        "@LC = [a c];\n@SC = [a.sc c.sc];\n@LC2 = [a];\n@SC2 = [a.sc];\n"
+        "feature smcp { sub @LC by @SC; sub @LC2 by @SC2; sub [a c] by [A C]; } smcp;")
+
+
+def test_font_classes_are_paired_with_feature_code():
+    font = GSFont()
+    for name in sorted(GLYPHS):
+        font.glyphs.append(GSGlyph(name))
+    font.classes = [GSClass("LC", "a b c"), GSClass("SC", "a.sc b.sc c.sc"), GSClass("Range", "a-c")]
+    font.features = [GSFeature("smcp", "sub @LC by @SC;")]
+    prune_font_features(font)
+    assert [(c.name, c.code) for c in font.classes] == [("LC", "a c"), ("SC", "a.sc c.sc"), ("Range", "a-c")]
+
+
+def test_aalt_keeps_references_to_surviving_features():
+    code = ("feature aalt { feature smcp; feature liga; } aalt;\n"
+            "feature smcp { sub a by a.sc; } smcp;\n"
+            "feature liga { sub f f by f_f; } liga;")
+    assert pruned(code) == (
+        "feature aalt { feature smcp; } aalt;\n"
+        "feature smcp { sub a by a.sc; } smcp;")
+
+
+def test_aalt_of_dropped_features_is_dropped():
+    code = "feature aalt { feature liga; } aalt;\nfeature liga { sub f f by f_f; } liga;"
+    assert prune_code(code, GLYPHS) == ("", False)
+
+
+def test_font_aalt_follows_the_other_features():
+    font = GSFont()
+    for name in sorted(GLYPHS):
+        font.glyphs.append(GSGlyph(name))
+    font.features = [
+        GSFeature("aalt", "feature smcp;\nfeature liga;"),
+        GSFeature("smcp", "sub a by a.sc;"),
+        GSFeature("liga", "sub f f by f_f;"),
+    ]
+    prune_font_features(font)
+    assert [(f.name, f.code) for f in font.features] == [("aalt", "feature smcp;"), ("smcp", "sub a by a.sc;")]
+
+
+def test_gdef_table_is_pruned():
+    code = ("table GDEF {\n"
+            "    GlyphClassDef [a b gravecomb], [f_i f_f], [acutecomb gravecomb], [grave];\n"
+            "    LigatureCaretByPos f_i 300;\n"
+            "    LigatureCaretByPos f_f 300;\n"
+            "} GDEF;")
+    assert pruned(code) == (
+        "table GDEF {\n"
+        "    GlyphClassDef [a b], [f_i], [acutecomb], ;\n"
+        "    LigatureCaretByPos f_i 300;\n"
+        "} GDEF;")
+
+
+def test_pruned_code_compiles():
+    pytest.importorskip("fontTools")
+    from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+    from fontTools.ttLib import TTFont
+
+    code = """
+languagesystem DFLT dflt;
+@LC = [a b c];
+@SC = [a.sc b.sc c.sc];
+markClass [acutecomb gravecomb] <anchor 0 500> @TOP;
+markClass [gravecomb] <anchor 0 500> @GONE;
+feature aalt { feature smcp; feature liga; feature dlig; } aalt;
+feature smcp { sub @LC by @SC; } smcp;
+feature dlig { sub f f by f_f; } dlig;
+table GDEF {
+    GlyphClassDef [a b c], [f_i f_f], [acutecomb gravecomb], ;
+    LigatureCaretByPos f_f 300;
+} GDEF;
+feature liga { sub f i by f_i; sub f f by f_f; } liga;
+feature mark {
+    lookup m1 { lookupflag UseMarkFilteringSet @GONE; pos base [a e] <anchor 250 450> mark @GONE; } m1;
+    pos base [a e] <anchor 250 450> mark @TOP;
+    pos ligature lam_meem_jeem <anchor 625 1800> mark @TOP ligComponent <anchor 376 1800> mark @TOP;
+} mark;
+"""
+    code, has_rules = prune_code(code, GLYPHS)
+    assert has_rules and "@GONE" not in code and "dlig" not in code and "f_f" not in code
+
+    font = TTFont()
+    font.setGlyphOrder(sorted(GLYPHS))
+    addOpenTypeFeaturesFromString(font, code)
+    assert "GSUB" in font and "GPOS" in font
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Flattening against dense samples of the exact cubics: every polyline
+# stays within the tolerance, keeps the exact extremes, and is made once
+# per outline and tolerance.
+
+import math
+
+import pytest
+
+from serebrotype.flatten import _cubicSteps, flatOutline, flatPolylines, flattenContours, flattenSegment
+from serebrotype.outline import Outline
+
+CUBICS = [
+    ((0.0, 0.0), (100.0, 200.0), (300.0, -100.0), (400.0, 100.0)),
+    ((0.0, 0.0), (0.0, 276.0), (224.0, 500.0), (500.0, 500.0)),
+    ((10.0, 10.0), (600.0, 40.0), (-200.0, 60.0), (390.0, 90.0)),
+    ((0.0, 0.0), (30.0, 0.5), (60.0, -0.5), (90.0, 0.0)),
+]
+SAMPLES = 4000
+
+
+def point(seg, t):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = seg
+    mt = 1.0 - t
+    a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+    return a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3
+
+
+def samples(seg):
+    return [point(seg, i / SAMPLES) for i in range(SAMPLES + 1)]
+
+
+def polyline(seg, tolerance):
+    out = list(seg[0])
+    flattenSegment(seg, tolerance, out)
+    return list(zip(out[0::2], out[1::2]))
+
+
+def distance_to_segment(p, a, b):
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if not length else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+@pytest.mark.parametrize("seg", CUBICS)
+@pytest.mark.parametrize("tolerance", [0.05, 0.5, 4.0])
+def test_polyline_stays_within_tolerance(seg, tolerance):
+    points = polyline(seg, tolerance)
+    segments = list(zip(points, points[1:]))
+    worst = max(min(distance_to_segment(p, a, b) for a, b in segments) for p in samples(seg))
+    assert worst <= tolerance * 1.0001
+
+
+@pytest.mark.parametrize("seg", CUBICS)
+def test_wang_steps_shrink_with_the_tolerance(seg):
+    steps = [_cubicSteps(seg, tolerance) for tolerance in (4.0, 0.5, 0.05)]
+    assert steps == sorted(steps) and steps[0] >= 1
+    # Wang's bound: a quarter of the tolerance needs at most twice the steps.
+    assert _cubicSteps(seg, 0.125) <= 2 * _cubicSteps(seg, 0.5) + 1
+
+
+@pytest.mark.parametrize("seg", CUBICS)
+def test_extremes_are_kept_exactly(seg):
+    # Coarse tolerance: without splits at the extrema the bumps would be cut.
+    points = polyline(seg, 8.0)
+    exact = samples(seg)
+    for axis in (0, 1):
+        values = [p[axis] for p in points]
+        assert max(values) >= max(p[axis] for p in exact) - 1e-9
+        assert min(values) <= min(p[axis] for p in exact) + 1e-9
+        assert max(values) <= max(p[axis] for p in exact) + 1e-3
+        assert min(values) >= min(p[axis] for p in exact) - 1e-3
+
+
+def test_closing_point_is_not_repeated():
+    contour = [((0.0, 0.0), (100.0, 0.0)), ((100.0, 0.0), (100.0, 50.0), (50.0, 100.0), (0.0, 100.0)),
+               ((0.0, 100.0), (0.0, 0.0))]
+    (flat,) = flattenContours([contour], 1.0)
+    assert (flat[0], flat[1]) == (0.0, 0.0) and (flat[-2], flat[-1]) == (0.0, 100.0)
+    with pytest.raises(ValueError):
+        flattenContours([contour], 0)
+
+
+def test_flattening_is_cached_per_tolerance():
+    outline = Outline([[CUBICS[1], ((500.0, 500.0), (500.0, 0.0)), ((500.0, 0.0), (0.0, 0.0))]], 600)
+    fine = flatPolylines(outline, 0.1)
+    assert flatPolylines(outline, 0.1) is fine
+    assert flatPolylines(outline, 1.0) is not fine
+    assert len(flatPolylines(outline, 1.0)[0]) < len(fine[0])
+
+    flat = flatOutline(outline, 0.1)
+    assert flatOutline(outline, 0.1) is flat and flatOutline(outline, 1.0) is not flat
+    assert flatOutline(outline, None) is outline and flatOutline(outline, 0) is outline
+    assert {key for key in outline.derived} >= {("polylines", 0.1), ("polylines", 1.0), ("flat", 0.1), ("flat", 1.0)}
+    assert all(len(seg) == 2 for contour in flat.contours for seg in contour)
+    assert flat.bounds == pytest.approx(outline.bounds)
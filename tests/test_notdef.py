@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# .notdef templates: PostScript direction by nesting depth (filled contours
+# counter-clockwise, counters clockwise) and scaled results that callers
+# share through the memo.
+
+import pytest
+
+from serebrotype import notdef
+from serebrotype.notdef import contour_points, notdef_marks, register_notdef_mark, scaled_notdef
+
+
+def signed_area(points):
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])) / 2.0
+
+
+def box(points):
+    xs, ys = [x for x, _ in points], [y for _, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def depths(polygons):
+    # The marks nest cleanly, so a contour lies inside another exactly when its box does.
+    boxes = [box(points) for points in polygons]
+    return [sum(1 for j, (x0, y0, x1, y1) in enumerate(boxes)
+                if j != i and x0 <= a0 and y0 <= b0 and a1 <= x1 and b1 <= y1)
+            for i, (a0, b0, a1, b1) in enumerate(boxes)]
+
+
+def check_direction(contours):
+    polygons = [list(contour_points(contour)) for contour in contours]
+    for points, depth in zip(polygons, depths(polygons)):
+        assert (signed_area(points) > 0) == (depth % 2 == 0), (depth, points)
+    return depths(polygons)
+
+
+@pytest.fixture
+def templates(monkeypatch):
+    monkeypatch.setattr(notdef, "_templates", dict(notdef._templates))
+    yield
+    scaled_notdef.cache_clear()
+
+
+@pytest.mark.parametrize("mark", ["empty", "demo"])
+@pytest.mark.parametrize("cap_height", [700, 512.5])
+def test_marks_have_postscript_direction(mark, cap_height):
+    _, contours = scaled_notdef(mark, cap_height)
+    found = check_direction(contours)
+    assert found[0] == 0 and 1 in found
+    if mark == "demo":
+        # The counters of D and O.
+        assert 2 in found
+
+
+def test_direction_follows_nesting_not_input(templates):
+    squares = [[(-s, -s), (s, -s), (s, s), (-s, s)] for s in (400, 300, 200, 100)]
+    squares[2].reverse()
+    register_notdef_mark("nested", squares, width=1000, height=1000)
+    _, contours = scaled_notdef("nested", 1000)
+    assert check_direction(contours) == [0, 1, 2, 3]
+    assert "nested" in notdef_marks()
+
+
+def test_scaled_marks_are_shared_and_immutable():
+    width, contours = scaled_notdef("demo", 350)
+    assert scaled_notdef("demo", 350) == (width, contours)
+    assert scaled_notdef("demo", 350)[1] is contours
+    assert isinstance(contours, tuple) and all(isinstance(contour, tuple) for contour in contours)
+    hash(contours)
+    assert width == notdef.NOTDEF_WIDTH // 2
+    assert contours[0] == tuple(v / 2.0 for v in scaled_notdef("demo", 700)[1][0])
+
+
+def test_registering_again_replaces_the_cached_mark(templates):
+    register_notdef_mark("square", [[(0, 0), (10, 0), (10, 10), (0, 10)]], width=20, height=10)
+    assert scaled_notdef("square", 100)[0] == 200
+    register_notdef_mark("square", [[(0, 0), (10, 0), (10, 10), (0, 10)]], width=30, height=10)
+    assert scaled_notdef("square", 100)[0] == 300
+    with pytest.raises(ValueError, match="Unknown .notdef mark"):
+        scaled_notdef("missing", 100)
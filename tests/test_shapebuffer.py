@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# ShapeBuffer merging and paths, and the claim Build Layer relies on to
+# skip removeOverlap: bar quads a positive gap apart never overlap.
+
+import itertools
+
+import pytest
+
+from serebrotype.bars import barQuads
+from serebrotype.glyphsapi import CURVE, LINE, OFFCURVE
+from serebrotype.outlinecache import cachedOutlineFromLayer
+from serebrotype.shapebuffer import ShapeBuffer
+from serebrotype.standin import syntheticFont
+
+
+def quad(x0, x1, yb, yt, shear=0.0):
+    return ((x0, yb), (x1, yb), (x1 + shear, yt), (x0 + shear, yt))
+
+
+def polygons(buf):
+    return [[(x, y) for x, y, _ in points] for points in buf.contours()]
+
+
+def test_touching_quads_in_a_row_are_merged():
+    buf = ShapeBuffer()
+    buf.addQuads([quad(0, 10, 0, 20, 4), quad(10, 30, 0, 20, 4), quad(30, 35, 0, 20, 4)])
+    assert polygons(buf) == [[(0, 0), (35, 0), (39, 20), (4, 20)]]
+
+
+@pytest.mark.parametrize("second", [
+    quad(12, 30, 0, 20),      # a gap between them
+    quad(10, 30, 0, 25),      # another top
+    quad(10, 30, 0, 20, 3),   # another shear
+])
+def test_quads_that_do_not_line_up_stay_apart(second):
+    buf = ShapeBuffer()
+    buf.addQuads([quad(0, 10, 0, 20), second])
+    assert len(buf) == 2
+
+
+def test_merge_can_be_turned_off():
+    buf = ShapeBuffer()
+    buf.addQuads([quad(0, 10, 0, 20), quad(10, 30, 0, 20)], merge=False)
+    assert list(buf.ends) == [4, 8]
+
+
+def test_paths_keep_contour_ends_and_node_types():
+    buf = ShapeBuffer()
+    buf.addPolygon([0, 0, 10, 0, 10, 10])
+    buf.addContour([((0, 0), (50, 0)), ((50, 0), (60, 10), (60, 40), (50, 50)), ((50, 50), (0, 0))])
+    assert list(buf.ends) == [3, 8] and buf.pointCount() == 8
+
+    triangle, curved = buf.paths()
+    assert triangle.closed and curved.closed
+    assert [(node.x, node.y, node.type) for node in triangle.nodes] == [
+        (0, 0, LINE), (10, 0, LINE), (10, 10, LINE)]
+    assert [(node.x, node.y, node.type) for node in curved.nodes] == [
+        (50, 0, LINE), (60, 10, OFFCURVE), (60, 40, OFFCURVE), (50, 50, CURVE), (0, 0, LINE)]
+
+
+def _overlap(p, q):
+    # Quads of one row share bottom, top and shear, so their bottom edges
+    # decide; rows are checked by their y extent.
+    (pyb, pyt), (qyb, qyt) = (p[0][1], p[2][1]), (q[0][1], q[2][1])
+    if pyt <= qyb or qyt <= pyb:
+        return False
+    return p[0][0] < q[1][0] and q[0][0] < p[1][0]
+
+
+@pytest.mark.parametrize("gap", [0.5, 10.0, 40.0])
+@pytest.mark.parametrize("angleDeg", [0.0, 15.0])
+def test_quads_with_a_positive_gap_never_overlap(gap, angleDeg):
+    # Odd stand-in glyphs are two overlapping rectangles, so this also holds
+    # for outlines that still overlap themselves.
+    font = syntheticFont(40)
+    for glyph in font.glyphs:
+        layer = glyph.layers[0]
+        outline = cachedOutlineFromLayer(layer)
+        if outline is None:
+            continue
+        quads = barQuads(outline, 9, gap, angleDeg, 0.0, layer.width)
+        buf = ShapeBuffer()
+        buf.addQuads(quads)
+        merged = [((p[0], p[1]), (p[2], p[3]), (p[4], p[5]), (p[6], p[7])) for p in
+                  ([c for point in points for c in point] for points in polygons(buf))]
+        for shapes in (quads, merged):
+            for p, q in itertools.combinations(shapes, 2):
+                assert not _overlap(p, q), (glyph.name, p, q)